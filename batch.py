@@ -0,0 +1,216 @@
+"""
+Evaluate portfolio workbooks without the Streamlit app.
+
+Each workbook must have the Properties, Loans and Cashflows sheets read by upload.py; a directory is
+read as a portfolio snapshot written by snapshot.save_snapshot. For every workbook the aggregate cash
+flows, monthly cash and DSCR reports are written to <output>/<workbook name>/, and the time spent in
+each stage is printed and saved to <output>/timings.csv. With --profile, the time spent in loan
+schedules, property cash flows, reports and workbook parsing is written to each workbook's profile.json.
+
+Run from the repository root:
+    python batch.py funds/*.xlsx --output results --format parquet --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from typing import Dict, List, Optional
+import pandas as pd
+import profiling
+from chatham import Chatham
+from rates import StaticRateProvider, set_default_rate_provider
+from snapshot import load_snapshot
+from upload import load_portfolio
+
+FORMATS = ('parquet', 'csv')
+STAGES = ('load', 'evaluate', 'reports', 'write')
+
+
+def _init_worker(sofr: Optional[Dict[str, float]]):
+    """Give a worker process the SOFR curve read by the parent, if one was given."""
+    if sofr is not None:
+        set_default_rate_provider(StaticRateProvider(sofr))
+
+
+def _write(df: pd.DataFrame, path: str, output_format: str):
+    df = df.rename_axis('Date')
+    if output_format == 'parquet':
+        df.to_parquet(path + '.parquet')
+    else:
+        df.to_csv(path + '.csv')
+
+
+def _workbook_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+
+
+def output_names(paths: List[str]) -> List[str]:
+    """
+    The output sub-directory of each path, in order: the workbook's name, with _2, _3, ... added
+    to names already taken by an earlier argument, so no two arguments write to the same
+    directory, even when the same path is given twice.
+    """
+    names = []
+    taken = set()
+    for path in paths:
+        base = name = _workbook_name(path)
+        suffix = 1
+        while name in taken:
+            suffix += 1
+            name = f"{base}_{suffix}"
+        taken.add(name)
+        names.append(name)
+    return names
+
+
+def run_workbook(path: str, output_dir: str, start_date: date, end_date: date, output_format: str = 'parquet',
+                 beg_cash: Optional[float] = None, minimum_cash: Optional[float] = None, profile: bool = False,
+                 name: Optional[str] = None) -> Dict[str, float]:
+    """
+    Evaluate one workbook and write its reports.
+
+    Parameters:
+    path (str): Workbook path, or a snapshot directory.
+    output_dir (str): Directory that receives a sub-directory named after the workbook.
+    start_date (date): Analysis start date.
+    end_date (date): Analysis end date.
+    output_format (str): 'parquet' or 'csv'.
+    beg_cash (float): Opening cash balance for the monthly cash report, the portfolio's own by default.
+    minimum_cash (float): Optional minimum balance for the liquidity shortfall columns.
+    profile (bool): Also time the model's hot paths and write them to profile.json next to the reports.
+    name (str): Output sub-directory, the workbook's file name without extension by default.
+
+    Returns:
+    Dict[str, float]: Seconds spent in each stage.
+    """
+    if name is None:
+        name = _workbook_name(path)
+    with profiling.profile(name) if profile else nullcontext() as run:
+        timings = _evaluate_workbook(path, name, output_dir, start_date, end_date, output_format, beg_cash, minimum_cash)
+    if run is not None:
+        run.dump(os.path.join(output_dir, name, 'profile.json'))
+    return timings
+
+
+def _evaluate_workbook(path: str, name: str, output_dir: str, start_date: date, end_date: date, output_format: str,
+                       beg_cash: Optional[float], minimum_cash: Optional[float]) -> Dict[str, float]:
+    timings = {}
+    start = time.perf_counter()
+    if os.path.isdir(path):
+        portfolio = load_snapshot(path)
+    else:
+        portfolio = load_portfolio(path, name=name, start_date=start_date, end_date=end_date)
+    if beg_cash is None:
+        beg_cash = portfolio.beg_cash
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = portfolio.evaluate(start_date, end_date)
+    timings['evaluate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reports = {
+        'cash_flows': result.aggregate,
+        'cash': result.monthly_cash(beg_cash=beg_cash, minimum_cash=minimum_cash),
+        'dscr': result.monthly_dscr(),
+        'dscr_unsecured': result.monthly_dscr_unsecured()
+    }
+    timings['reports'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    workbook_dir = os.path.join(output_dir, name)
+    os.makedirs(workbook_dir, exist_ok=True)
+    for report, df in reports.items():
+        _write(df, os.path.join(workbook_dir, report), output_format)
+    timings['write'] = time.perf_counter() - start
+    return timings
+
+
+def run(paths: List[str], output_dir: str, start_date: date, end_date: date, output_format: str = 'parquet',
+        workers: Optional[int] = None, sofr: Optional[Dict[str, float]] = None, beg_cash: Optional[float] = None,
+        minimum_cash: Optional[float] = None, profile: bool = False) -> pd.DataFrame:
+    """
+    Evaluate workbooks across a process pool, or in this process when workers is 1.
+
+    Workbooks that share a file name, or a path given more than once, are written to <name>_2,
+    <name>_3, ... in the order given.
+
+    Returns:
+    pd.DataFrame: One row per argument, indexed by path, with its output directory name, seconds
+    per stage and an 'error' column naming any failure.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {FORMATS}.")
+    os.makedirs(output_dir, exist_ok=True)
+    args = (output_dir, start_date, end_date, output_format, beg_cash, minimum_cash, profile)
+    names = output_names(paths)
+
+    # Rows are kept by position, so a path given twice gets two runs and two rows
+    rows = []
+    if workers == 1:
+        _init_worker(sofr)
+        for path, name in zip(paths, names):
+            try:
+                rows.append(run_workbook(path, *args, name=name))
+            except Exception as e:
+                rows.append({'error': f"{type(e).__name__}: {e}"})
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sofr,)) as pool:
+            futures = [pool.submit(run_workbook, path, *args, name=name) for path, name in zip(paths, names)]
+            for future in futures:
+                try:
+                    rows.append(future.result())
+                except Exception as e:
+                    rows.append({'error': f"{type(e).__name__}: {e}"})
+
+    timings = pd.DataFrame(rows, index=pd.Index(paths, name='workbook')).reindex(columns=list(STAGES) + ['error'])
+    timings.insert(0, 'output', names)
+    timings['total'] = timings[list(STAGES)].sum(axis=1, min_count=1)
+    return timings
+
+
+def _month_start(text: str) -> date:
+    d = date.fromisoformat(text)
+    return date(d.year, d.month, 1)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    now = date.today()
+    start_date = date(now.year, now.month, 1)
+    end_date = date(start_date.year + 3, start_date.month, 1)
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('workbooks', nargs='+', help='Excel workbooks in the upload format, or snapshot directories')
+    parser.add_argument('--output', default='batch_output', help='Output directory')
+    parser.add_argument('--format', choices=FORMATS, default='parquet')
+    parser.add_argument('--start', type=_month_start, default=start_date, help='Analysis start date (YYYY-MM-DD)')
+    parser.add_argument('--end', type=_month_start, default=end_date, help='Analysis end date (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes, 1 to run in this process')
+    parser.add_argument('--beg-cash', type=float, default=None, help="Opening cash, each portfolio's own by default")
+    parser.add_argument('--minimum-cash', type=float, default=None)
+    parser.add_argument('--sofr', default=None, help='Chatham curve JSON file to use instead of the curve store')
+    parser.add_argument('--profile', action='store_true', help="Write each workbook's hot-path timings to profile.json")
+    args = parser.parse_args(argv)
+
+    sofr = Chatham.from_file(args.sofr).get_monthly_rates() if args.sofr else None
+
+    start = time.perf_counter()
+    timings = run(args.workbooks, args.output, args.start, args.end, args.format, args.workers, sofr,
+                  args.beg_cash, args.minimum_cash, args.profile)
+    elapsed = time.perf_counter() - start
+
+    timings.to_csv(os.path.join(args.output, 'timings.csv'))
+    with pd.option_context('display.width', 200, 'display.max_colwidth', 60):
+        print(timings.drop(columns='error').round(3).to_string())
+    failed = timings['error'].notna()
+    for path, error in timings.loc[failed, 'error'].items():
+        print(f"FAILED {path}: {error}", file=sys.stderr)
+    print(f"{len(timings) - failed.sum()} of {len(timings)} workbooks in {elapsed:.2f}s")
+    return 1 if failed.any() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
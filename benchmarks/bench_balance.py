@@ -0,0 +1,73 @@
+"""
+Compare closed-form fixed-rate balances with reading them from each loan's full schedule.
+
+tests/test_balance.py checks that the two agree; this reports the speed and the largest difference.
+
+Run from the repository root:
+    python -m benchmarks.bench_balance --loans 5000 --dates 12
+"""
+import argparse
+import random
+import time
+from datetime import date
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from loan import Loan
+
+
+def make_loans(count: int, seed: int = 0):
+    """Fixed-rate loans of every day count, some with an interest-only period and some never amortizing."""
+    rng = random.Random(seed)
+    loans = []
+    for i in range(count):
+        origination = date(2015 + rng.randint(0, 9), rng.randint(1, 12), 1)
+        loans.append(Loan(
+            origination_date=origination,
+            maturity_date=origination + relativedelta(months=rng.choice([60, 120, 360])),
+            original_balance=rng.uniform(1e6, 5e7),
+            note_rate=rng.uniform(3, 7),
+            interest_only_period=rng.choice([0, 12, 24]),
+            amortization_period=rng.choice([0, 300, 360]),
+            day_count_method=rng.choice(["30/360", "Actual/360", "Actual/365"]),
+            loan_id=f'L{i}'
+        ))
+    return loans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--loans', type=int, default=5000)
+    parser.add_argument('--dates', type=int, default=12, help='Query dates per loan, monthly from 2025-01')
+    args = parser.parse_args()
+
+    dates = [date(2025, 1, 1) + relativedelta(months=m) for m in range(args.dates)]
+    days = np.array(dates, dtype='datetime64[D]')
+
+    # One balance per loan, as for a sale-date prepayment or a payoff quote
+    loans = make_loans(args.loans)
+    start = time.perf_counter()
+    walked_one = np.array([loan.build_schedule().balance_at(dates[-1]) for loan in loans], dtype=np.float64)
+    walk_one = time.perf_counter() - start
+    start = time.perf_counter()
+    single = np.array([loan.get_current_balance(dates[-1]) for loan in loans], dtype=np.float64)
+    scalar = time.perf_counter() - start
+
+    # Every date per loan
+    loans = make_loans(args.loans)
+    start = time.perf_counter()
+    walked = np.array([[schedule.balance_at(d) for d in dates] for schedule in (loan.build_schedule() for loan in loans)], dtype=np.float64)
+    walk = time.perf_counter() - start
+    start = time.perf_counter()
+    closed_form = np.array([loan.balances_at(days) for loan in loans])
+    vectorized = time.perf_counter() - start
+
+    # Agreement to rounding, measured against each loan's original balance
+    scale = np.array([loan.original_balance for loan in loans])
+    error = max(np.max(np.abs(closed_form - walked) / scale[:, None]), np.max(np.abs(single - walked_one) / scale))
+
+    print(f"{args.loans} fixed-rate loans, {args.dates} dates each; max relative difference {error:.1e}")
+    print(f"one date:  schedule + balance_at {walk_one:8.3f}s   get_current_balance {scalar:8.3f}s ({walk_one / scalar:.1f}x)")
+    print(f"all dates: schedule + balance_at {walk:8.3f}s   balances_at         {vectorized:8.3f}s ({walk / vectorized:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Time a full portfolio evaluation and measure its peak traced memory.
+
+Run from the repository root:
+    python -m benchmarks.bench_evaluate --properties 500 --repeat 3
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from rates import StaticRateProvider, set_default_rate_provider
+from benchmarks.generators import make_portfolio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--properties', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--executor', default='serial')
+    args = parser.parse_args()
+
+    start_date = date(2025, 1, 1)
+    set_default_rate_provider(StaticRateProvider({(start_date + relativedelta(months=m)).isoformat(): 0.04 for m in range(args.years * 12 + 1)}))
+    portfolio = make_portfolio(args.properties, start_date, args.years)
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        portfolio.invalidate()
+        start = time.perf_counter()
+        result = portfolio.evaluate(executor=args.executor)
+        best = min(best, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    result.monthly_dscr_unsecured()
+    reports = time.perf_counter() - start
+
+    portfolio.invalidate()
+    tracemalloc.start()
+    portfolio.evaluate(executor=args.executor)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{args.properties} properties, {args.years * 12 + 1} months, {args.executor}")
+    print(f"evaluate:         {best:8.3f}s (best of {args.repeat})")
+    print(f"unsecured DSCR:   {reports * 1000:8.1f}ms")
+    print(f"peak memory:      {peak / 1e6:8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
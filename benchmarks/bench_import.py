@@ -0,0 +1,47 @@
+"""
+Measure cold import time of the model layer and check that it does not load Streamlit.
+
+Run from the repository root:
+    python -m benchmarks.bench_import --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ['schedule', 'loanbook', 'loan', 'property', 'portfolio']
+
+_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': elapsed, 'streamlit': 'streamlit' in sys.modules}}))\n"
+)
+
+
+def import_time(module: str) -> dict:
+    """Import a module in a fresh interpreter so nothing is already cached in sys.modules."""
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(module=module)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        runs = [import_time(module) for _ in range(args.repeat)]
+        seconds = [run['seconds'] for run in runs]
+        streamlit = any(run['streamlit'] for run in runs)
+        print(f"{module:<10} median {statistics.median(seconds) * 1000:8.1f} ms  "
+              f"min {min(seconds) * 1000:8.1f} ms  streamlit loaded: {streamlit}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare reading a window of long-dated loan schedules through Loan.iter_schedule with slicing get_schedule.
+
+Run from the repository root:
+    python -m benchmarks.bench_iter_schedule --loans 2000 --window 36
+"""
+import argparse
+import random
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from loan import Loan
+
+
+def make_loans(count: int, seed: int = 0):
+    """30-year loans originated over the last ten years, so the window starts mid-schedule."""
+    rng = random.Random(seed)
+    loans = []
+    for i in range(count):
+        origination = date(2015 + rng.randint(0, 9), rng.randint(1, 12), 1)
+        loans.append(Loan(
+            origination_date=origination,
+            maturity_date=origination + relativedelta(months=360),
+            original_balance=rng.uniform(1e6, 5e7),
+            note_rate=rng.uniform(3, 7),
+            interest_only_period=rng.choice([0, 12, 24]),
+            amortization_period=360,
+            day_count_method=rng.choice(["30/360", "Actual/360", "Actual/365"]),
+            loan_id=f'L{i}'
+        ))
+    return loans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--loans', type=int, default=2000)
+    parser.add_argument('--window', type=int, default=36, help='Months read from the window start')
+    args = parser.parse_args()
+
+    start_date = date(2025, 1, 1)
+    end_date = start_date + relativedelta(months=args.window - 1)
+
+    loans = make_loans(args.loans)
+    start = time.perf_counter()
+    full = [[row for row in loan.get_schedule() if start_date <= row['date'] <= end_date] for loan in loans]
+    materialized = time.perf_counter() - start
+
+    loans = make_loans(args.loans)
+    start = time.perf_counter()
+    streamed = [list(loan.iter_schedule(start_date, end_date)) for loan in loans]
+    lazy = time.perf_counter() - start
+
+    assert streamed == full
+    print(f"{args.loans} 30-year loans, {args.window}-month window")
+    print(f"get_schedule + filter: {materialized:8.3f}s")
+    print(f"iter_schedule:         {lazy:8.3f}s ({materialized / lazy:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
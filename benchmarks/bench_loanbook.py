@@ -0,0 +1,57 @@
+"""
+Compare per-loan schedules with the batched LoanBook engine.
+
+Run from the repository root:
+    python -m benchmarks.bench_loanbook --loans 10000
+"""
+import argparse
+import random
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from loan import Loan
+from loanbook import LoanBook
+
+
+def make_loans(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    loans = []
+    for i in range(count):
+        origination = date(2015 + rng.randint(0, 10), rng.randint(1, 12), 1)
+        maturity = origination + relativedelta(months=rng.choice([60, 84, 120, 240, 360]))
+        loans.append(Loan(
+            origination_date=origination,
+            maturity_date=maturity,
+            original_balance=rng.uniform(1e6, 5e7),
+            note_rate=rng.uniform(3, 8),
+            interest_only_period=rng.choice([0, 12, 24, 36]),
+            amortization_period=rng.choice([0, 300, 360]),
+            day_count_method=rng.choice(["30/360", "Actual/360", "Actual/365"]),
+            loan_id=str(i)
+        ))
+    return loans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--loans', type=int, default=10000)
+    args = parser.parse_args()
+
+    loans = make_loans(args.loans)
+
+    start = time.perf_counter()
+    for loan in loans:
+        loan.build_schedule()
+    per_loan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    LoanBook.from_loans(loans).compute()
+    batch = time.perf_counter() - start
+
+    print(f"{args.loans} loans")
+    print(f"per-loan schedules: {per_loan:8.3f}s")
+    print(f"LoanBook.compute:   {batch:8.3f}s  ({per_loan / batch:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
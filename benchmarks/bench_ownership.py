@@ -0,0 +1,46 @@
+"""
+Measure the memory of a large book of properties and the time to apply ownership step changes.
+
+Run from the repository root:
+    python -m benchmarks.bench_ownership --properties 5000 --years 10 --steps 4
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from rates import StaticRateProvider, set_default_rate_provider
+from benchmarks.generators import make_portfolio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--properties', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--steps', type=int, default=4)
+    args = parser.parse_args()
+
+    start_date = date(2025, 1, 1)
+    set_default_rate_provider(StaticRateProvider({(start_date + relativedelta(months=m)).isoformat(): 0.04 for m in range(args.years * 12 + 1)}))
+
+    tracemalloc.start()
+    portfolio = make_portfolio(args.properties, start_date, args.years)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Partial sell-downs at random months, the same steps for every property
+    rng = random.Random(0)
+    steps = {start_date + relativedelta(months=rng.randint(1, args.years * 12)): rng.uniform(0.2, 1.0) for _ in range(args.steps)}
+    start = time.perf_counter()
+    for property in portfolio.properties:
+        property.set_ownership_steps(steps)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.properties} properties, {args.years * 12 + 1} months, {len(steps)} ownership steps")
+    print(f"book memory:      {current / 1e6:8.1f}MB ({current / args.properties / 1e3:.1f}KB per property with its loan and NOI)")
+    print(f"ownership steps:  {elapsed * 1000:8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Time Property.get_cash_flows_dataframe for a 30-year property with five loans.
+
+Run from the repository root:
+    python -m benchmarks.bench_property_cash_flows --repeat 20
+"""
+import argparse
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+import pandas as pd
+from loan import Loan
+from property import Property
+
+
+def make_property(years: int = 30, loan_count: int = 5) -> Property:
+    start = date(2025, 1, 1)
+    end = start + relativedelta(years=years)
+    months = [start + relativedelta(months=i) for i in range(years * 12 + 1)]
+    noi_capex = pd.DataFrame({
+        'Net Operating Income': [100000.0 + 250 * i for i in range(len(months))],
+        'Capital Expenditures': [5000.0] * len(months)
+    }, index=months)
+    loans = [
+        Loan(
+            origination_date=start + relativedelta(years=6 * i),
+            maturity_date=start + relativedelta(years=6 * i + 10),
+            original_balance=20000000.0,
+            note_rate=5.0 + 0.25 * i,
+            interest_only_period=24,
+            amortization_period=360,
+            day_count_method=["30/360", "Actual/360", "Actual/365"][i % 3],
+            loan_id=f"loan-{i}"
+        )
+        for i in range(loan_count)
+    ]
+    return Property(
+        property_id='bench',
+        name='Benchmark Tower',
+        address='1 Main St',
+        property_type='Office',
+        square_footage=500000,
+        year_built=2000,
+        purchase_price=150000000.0,
+        purchase_date=start,
+        analysis_start_date=start,
+        analysis_end_date=end,
+        sale_date=end,
+        sale_price=250000000.0,
+        loans=loans,
+        noi_capex=noi_capex,
+        ownership_share=0.8,
+        buyout_date=start + relativedelta(years=12),
+        buyout_amount=10000000.0
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--loans', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    property_ = make_property(args.years, args.loans)
+    property_.get_cash_flows_dataframe()
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        property_.get_cash_flows_dataframe()
+    elapsed = (time.perf_counter() - start) / args.repeat
+
+    print(f"{args.years}-year property, {args.loans} loans")
+    print(f"get_cash_flows_dataframe: {elapsed * 1000:8.2f} ms per call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Time the batched IRR solver against solving one cash-flow vector at a time.
+
+Run from the repository root:
+    python -m benchmarks.bench_returns --vectors 100000 --months 120
+"""
+import argparse
+import time
+import numpy as np
+from returns import irr
+
+
+def make_cash_flows(vectors: int, months: int, seed: int = 0) -> np.ndarray:
+    """Equity in the first month, monthly distributions, and a sale returning 50-180% of the equity."""
+    rng = np.random.default_rng(seed)
+    cash_flows = np.zeros((vectors, months))
+    cash_flows[:, 0] = -rng.uniform(5e6, 2e7, vectors)
+    cash_flows[:, 1:] = rng.uniform(0, 2e5, (vectors, months - 1))
+    cash_flows[:, -1] -= cash_flows[:, 0] * rng.uniform(0.5, 1.8, vectors)
+    return cash_flows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vectors', type=int, default=100000)
+    parser.add_argument('--months', type=int, default=120)
+    parser.add_argument('--looped', type=int, default=1000, help='Vectors to solve one at a time for comparison')
+    args = parser.parse_args()
+
+    cash_flows = make_cash_flows(args.vectors, args.months)
+
+    start = time.perf_counter()
+    batched = irr(cash_flows)
+    elapsed = time.perf_counter() - start
+
+    looped_count = min(args.looped, args.vectors)
+    start = time.perf_counter()
+    looped = np.array([irr(row) for row in cash_flows[:looped_count]])
+    looped_elapsed = time.perf_counter() - start
+
+    print(f"{args.vectors} vectors of {args.months} months")
+    print(f"batched: {elapsed:8.3f}s  {args.vectors / elapsed:10,.0f} IRRs/s  ({np.isnan(batched).sum()} without a root)")
+    print(f"looped:  {looped_elapsed:8.3f}s  {looped_count / looped_elapsed:10,.0f} IRRs/s  (first {looped_count})")
+    print(f"max difference: {np.nanmax(np.abs(batched[:looped_count] - looped)):.2e}")
+
+
+if __name__ == '__main__':
+    main()
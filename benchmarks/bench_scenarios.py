@@ -0,0 +1,88 @@
+"""
+Time Monte Carlo SOFR scenarios over a portfolio of floating-rate loans.
+
+Run from the repository root:
+    python -m benchmarks.bench_scenarios --paths 10000 --loans 400 --amortizing 0.25
+"""
+import argparse
+import random
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from loan import Loan
+from property import Property
+from portfolio import Portfolio
+from rates import StaticRateProvider, set_default_rate_provider
+from scenarios import hull_white_paths, simulate
+
+
+def make_portfolio(loans: int, amortizing: float, start_date: date, years: int, seed: int = 0) -> Portfolio:
+    """One floating loan per property; a share `amortizing` of them amortize after an interest-only period."""
+    rng = random.Random(seed)
+    end_date = start_date + relativedelta(years=years)
+    properties = []
+    for i in range(loans):
+        origination = start_date - relativedelta(months=rng.randint(0, 36))
+        amortizes = rng.random() < amortizing
+        loan = Loan(
+            origination_date=origination,
+            maturity_date=origination + relativedelta(months=rng.choice([36, 60, 84, 120])),
+            original_balance=rng.uniform(5e6, 5e7),
+            note_rate=5,
+            interest_only_period=rng.choice([12, 24]) if amortizes else 0,
+            amortization_period=360 if amortizes else 0,
+            day_count_method=rng.choice(["30/360", "Actual/360", "Actual/365"]),
+            fixed_floating='Floating',
+            spread=rng.uniform(1.5, 3.5),
+            loan_id=f'L{i}'
+        )
+        properties.append(Property(
+            property_id=f'P{i}', name=f'Property {i}', address=f'{i} Main St', property_type='Office',
+            square_footage=100000, year_built=2000, purchase_price=rng.uniform(1e7, 8e7),
+            purchase_date=origination, analysis_start_date=start_date, analysis_end_date=end_date,
+            loans=[loan], ownership_share=rng.choice([1, 0.5, 0.9])
+        ))
+    return Portfolio(name='Scenarios', start_date=start_date, end_date=end_date, properties=properties)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paths', type=int, default=10000)
+    parser.add_argument('--loans', type=int, default=400)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--amortizing', type=float, default=0.25, help='Share of loans with amortizing periods')
+    args = parser.parse_args()
+
+    start_date = date(2025, 1, 1)
+    horizon = args.years * 12 + 1
+    curve = {(start_date + relativedelta(months=m)).isoformat(): 0.04 + 0.0001 * m for m in range(horizon)}
+    set_default_rate_provider(StaticRateProvider(curve))
+    portfolio = make_portfolio(args.loans, args.amortizing, start_date, args.years)
+
+    start = time.perf_counter()
+    portfolio.evaluate()
+    base = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scenarios = hull_white_paths(curve, mean_reversion=0.1, volatility=0.01, start_date=start_date, horizon=horizon, n_paths=args.paths, seed=0)
+    generate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = simulate(portfolio, scenarios)
+    run = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cash = result.cash_bands()
+    result.dscr_bands()
+    bands = time.perf_counter() - start
+
+    print(f"{args.paths} paths, {args.loans} floating loans, {horizon} months")
+    print(f"base evaluation:  {base:8.3f}s")
+    print(f"generate paths:   {generate:8.3f}s")
+    print(f"simulate:         {run:8.3f}s")
+    print(f"percentile bands: {bands:8.3f}s")
+    print(cash.tail(1).round(0).to_string())
+
+
+if __name__ == '__main__':
+    main()
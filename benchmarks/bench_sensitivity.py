@@ -0,0 +1,49 @@
+"""
+Time a sensitivity grid of sale timing, exit cap, NOI and rate shocks over a portfolio.
+
+Run from the repository root:
+    python -m benchmarks.bench_sensitivity --properties 200 --offsets 20 --caps 20 --noi 10 --shocks 1
+"""
+import argparse
+import time
+from datetime import date
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from rates import StaticRateProvider, set_default_rate_provider
+from sensitivity import sensitivity_grid
+from benchmarks.generators import make_portfolio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--properties', type=int, default=200)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--offsets', type=int, default=20, help='Sale offsets, one month apart centred on the planned sale')
+    parser.add_argument('--caps', type=int, default=20, help='Exit caps from 4.5% to 8%')
+    parser.add_argument('--noi', type=int, default=10, help='NOI scales from 80% to 110%')
+    parser.add_argument('--shocks', type=int, default=1, help='Rate shocks from -100bp to +300bp')
+    parser.add_argument('--executor', default=None)
+    args = parser.parse_args()
+
+    start_date = date(2025, 1, 1)
+    set_default_rate_provider(StaticRateProvider({(start_date + relativedelta(months=m)).isoformat(): 0.04 for m in range(args.years * 12 + 1)}))
+    portfolio = make_portfolio(args.properties, start_date, args.years)
+
+    start = time.perf_counter()
+    grid = sensitivity_grid(
+        portfolio,
+        sale_offsets=range(-(args.offsets // 2), args.offsets - args.offsets // 2),
+        exit_caps=np.linspace(0.045, 0.08, args.caps),
+        noi_scales=np.linspace(0.8, 1.1, args.noi),
+        rate_shocks=np.linspace(-0.01, 0.03, args.shocks) if args.shocks > 1 else [0.0],
+        executor=args.executor
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(grid)} grid points, {args.properties} properties, {args.years * 12 + 1} months")
+    print(f"sensitivity grid: {elapsed:8.3f}s ({len(grid) / elapsed:,.0f} points/s)")
+    print(grid.describe().loc[['min', '50%', 'max'], ['IRR', 'Equity Multiple', 'Min DSCR']].round(3).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare Portfolio.stress over many curve shocks with re-evaluating the portfolio on each shocked curve.
+
+Run from the repository root:
+    python -m benchmarks.bench_stress --properties 500 --shocks 50
+"""
+import argparse
+import time
+from datetime import date
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from rates import StaticRateProvider, set_default_rate_provider
+from scenarios import KEY_RATE_TENORS, CurveShock
+from benchmarks.generators import make_portfolio
+
+
+def make_shocks(count: int):
+    """Key-rate shocks of +/-25bp at every tenor, then parallel shocks spread over +/-200bp."""
+    shocks = [CurveShock.key_rate(tenor, size) for size in (0.0025, -0.0025) for tenor in KEY_RATE_TENORS][:count]
+    return shocks + [CurveShock.parallel(size) for size in np.linspace(-0.02, 0.02, count - len(shocks))]
+
+
+def shifted_curve(start_date: date, months: int, shock: CurveShock):
+    shifts = shock.monthly(months) if shock is not None else np.zeros(months)
+    return {(start_date + relativedelta(months=m)).isoformat(): 0.04 + 0.0001 * m + shifts[m] for m in range(months)}
+
+
+def cold_evaluate(portfolio, months: int, shock: CurveShock = None):
+    """A full evaluation on the shocked curve, with every loan schedule rebuilt."""
+    set_default_rate_provider(StaticRateProvider(shifted_curve(portfolio.start_date, months, shock)))
+    for property in portfolio.properties:
+        for loan in property.loans:
+            loan.invalidate_schedule()
+    portfolio.invalidate()
+    return portfolio.evaluate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--properties', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--shocks', type=int, default=50)
+    parser.add_argument('--floating', type=float, default=0.5, help='Share of floating-rate loans')
+    parser.add_argument('--recompute', type=int, default=3, help='Shocks re-evaluated in full for the comparison')
+    args = parser.parse_args()
+
+    start_date = date(2025, 1, 1)
+    portfolio = make_portfolio(args.properties, start_date, args.years, floating_share=args.floating)
+    # The curve runs past the last maturity of loans bought up to two years in
+    curve_months = args.years * 12 + 145
+    shocks = make_shocks(args.shocks)
+
+    start = time.perf_counter()
+    cold_evaluate(portfolio, curve_months)
+    base = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = portfolio.stress(shocks)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    portfolio.stress(shocks)
+    repeat = time.perf_counter() - start
+
+    # Full re-evaluations on a few shocked curves, checked against the stress paths
+    start = time.perf_counter()
+    error = 0.0
+    for i in range(min(args.recompute, len(shocks))):
+        aggregate = cold_evaluate(portfolio, curve_months, shocks[i]).aggregate
+        error = max(error, np.max(np.abs(aggregate.sum(axis=1).to_numpy() - result.monthly_cash_flow[i])))
+    recompute = (time.perf_counter() - start) / max(min(args.recompute, len(shocks)), 1)
+    assert error < 1e-3, error
+
+    print(f"{args.properties} properties, {args.floating:.0%} floating, {args.shocks} shocks; max cash flow difference {error:.1e}")
+    print(f"base evaluation:            {base:8.3f}s")
+    print(f"stress, first call:         {first:8.3f}s ({(base + first) / base:.2f}x one base run)")
+    print(f"stress, evaluation reused:  {repeat:8.3f}s")
+    print(f"full re-evaluation x{args.shocks}:   {recompute * args.shocks:8.3f}s (estimated from {args.recompute})")
+    print(result.summary().head().to_string())
+
+
+if __name__ == '__main__':
+    main()
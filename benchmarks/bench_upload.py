@@ -0,0 +1,49 @@
+"""
+Time workbook ingestion in upload.py, stage by stage, on a large synthetic fund workbook.
+
+The workbook is generated once and reused from --workbook on later runs.
+
+Run from the repository root:
+    python -m benchmarks.bench_upload --properties 5000 --months 120
+"""
+import argparse
+import os
+import time
+from upload import EXCEL_ENGINE, load_cashflows, load_properties_and_loans, add_cashflows_to_properties, read_workbook
+from benchmarks.generators import make_workbook
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--properties', type=int, default=5000)
+    parser.add_argument('--months', type=int, default=120)
+    parser.add_argument('--workbook', default=None, help='Workbook path, generated if it does not exist')
+    args = parser.parse_args()
+
+    path = args.workbook or f'bench_upload_{args.properties}x{args.months}.xlsx'
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        make_workbook(path, args.properties, args.months)
+        print(f"generated {path} in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    sheets = read_workbook(path)
+    read = time.perf_counter() - start
+
+    start = time.perf_counter()
+    properties, loans = load_properties_and_loans(path, sheets)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    add_cashflows_to_properties(properties, load_cashflows(path, sheets))
+    split = time.perf_counter() - start
+
+    print(f"{len(properties)} properties, {len(loans)} loans, {len(sheets['Cashflows'])} cash-flow rows")
+    print(f"read sheets:       {read:8.3f}s  (engine: {EXCEL_ENGINE or 'openpyxl'})")
+    print(f"build objects:     {build:8.3f}s")
+    print(f"split NOI/CapEx:   {split:8.3f}s")
+    print(f"total:             {read + build + split:8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Synthetic portfolios and upload workbooks for the benchmarks.
+
+Every generator is seeded, so two runs with the same arguments build the same model.
+"""
+import random
+from datetime import date, datetime
+from typing import Optional
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from loan import Loan
+from property import Property
+from portfolio import Portfolio
+from upload import REQUIRED_COLUMNS
+
+PROPERTY_COLUMNS = REQUIRED_COLUMNS['Properties'] + ['Current Value', 'Sale Price', 'Ownership Share', 'Buyout Amount']
+LOAN_COLUMNS = REQUIRED_COLUMNS['Loans'] + ['Interest Only Period', 'Amortization Period', 'Day Count Method']
+
+
+def make_portfolio(
+    properties: int,
+    start_date: date,
+    years: int,
+    seed: int = 0,
+    loans_per_property: int = 1,
+    term_months: Optional[int] = None,
+    floating_share: float = 0.5
+) -> Portfolio:
+    """
+    Properties bought in the first years of the window with monthly NOI, their loans and a planned sale.
+
+    Parameters:
+    properties (int): Number of properties.
+    start_date (date): First month of the analysis window.
+    years (int): Length of the analysis window.
+    seed (int): Seed of the random draws.
+    loans_per_property (int): Loans on each property, splitting its leverage evenly.
+    term_months (int): Term of every loan. Defaults to a mix of 5, 7 and 10 years.
+    floating_share (float): Probability that a loan is floating rather than fixed.
+
+    Returns:
+    Portfolio: The portfolio over the analysis window.
+    """
+    rng = random.Random(seed)
+    end_date = start_date + relativedelta(years=years)
+    months = [start_date + relativedelta(months=m) for m in range(years * 12 + 1)]
+    result = []
+    for i in range(properties):
+        purchase = start_date + relativedelta(months=rng.randint(0, 24))
+        price = rng.uniform(1e7, 8e7)
+        loans = []
+        for j in range(loans_per_property):
+            floating = rng.random() < floating_share
+            loans.append(Loan(
+                origination_date=purchase,
+                maturity_date=purchase + relativedelta(months=term_months or rng.choice([60, 84, 120])),
+                original_balance=price * rng.uniform(0.4, 0.65) / loans_per_property,
+                note_rate=rng.uniform(4, 7),
+                interest_only_period=rng.choice([0, 12, 24]),
+                amortization_period=rng.choice([0, 300, 360]),
+                fixed_floating='Floating' if floating else 'Fixed',
+                spread=rng.uniform(1.5, 3.5),
+                loan_id=f'L{i}' if j == 0 else f'L{i}-{j}'
+            ))
+        property = Property(
+            property_id=f'P{i}', name=f'Property {i}', address=f'{i} Main St', property_type=rng.choice(['Office', 'Industrial', 'Retail']),
+            square_footage=100000, year_built=2000, purchase_price=price, purchase_date=purchase,
+            analysis_start_date=start_date, analysis_end_date=end_date, loans=loans,
+            sale_date=purchase + relativedelta(months=rng.randint(48, 84)), sale_price=price * rng.uniform(1.0, 1.4),
+            ownership_share=rng.choice([1, 0.5, 0.9])
+        )
+        noi = price * rng.uniform(0.05, 0.07) / 12 * np.cumprod(np.full(len(months), 1 + rng.uniform(0, 0.003)))
+        property.add_noi_capex(pd.DataFrame({'Net Operating Income': noi, 'Capital Expenditures': noi * -0.1}, index=pd.Index(months, name='Date')))
+        result.append(property)
+    return Portfolio(name='Benchmark', start_date=start_date, end_date=end_date, properties=result)
+
+
+def make_workbook(path: str, properties: int, months: int, seed: int = 0, max_loans: int = 2):
+    """Write a workbook in the upload format with up to max_loans loans per property and `months` cash-flow rows each."""
+    # openpyxl is only needed to write workbooks, so the other benchmarks run without it
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    property_sheet = workbook.create_sheet('Properties')
+    loan_sheet = workbook.create_sheet('Loans')
+    cashflow_sheet = workbook.create_sheet('Cashflows')
+    property_sheet.append(PROPERTY_COLUMNS)
+    loan_sheet.append(LOAN_COLUMNS)
+    cashflow_sheet.append(REQUIRED_COLUMNS['Cashflows'])
+
+    analysis_start = date(2024, 1, 1)
+    for i in range(properties):
+        property_id = f'P{i:05d}'
+        purchase_date = date(2015 + rng.randint(0, 9), rng.randint(1, 12), 1)
+        loan_ids = []
+        for j in range(rng.randint(0, max_loans)):
+            loan_id = f'{property_id}-L{j}'
+            loan_ids.append(loan_id)
+            origination = purchase_date + relativedelta(months=rng.randint(0, 24))
+            loan_sheet.append([
+                loan_id, datetime(origination.year, origination.month, 1),
+                datetime.combine(origination + relativedelta(months=rng.choice([60, 84, 120])), datetime.min.time()),
+                rng.uniform(1e6, 2e7), rng.uniform(3, 7), rng.choice([0, 12, 24]), rng.choice([0, 300, 360]),
+                rng.choice(["30/360", "Actual/360", "Actual/365"])
+            ])
+        sale_date = datetime(2026 + rng.randint(0, 8), rng.randint(1, 12), 1) if rng.random() < 0.5 else None
+        property_sheet.append([
+            property_id, f'Property {i}', f'{i} Main St', rng.choice(['Office', 'Industrial', 'Retail']),
+            rng.randint(10000, 500000), rng.randint(1960, 2020), rng.uniform(1e7, 5e7),
+            datetime(purchase_date.year, purchase_date.month, 1), datetime(2024, 1, 1), datetime(2033, 12, 1),
+            sale_date, ','.join(loan_ids) or None, None,
+            rng.uniform(1e7, 6e7), rng.uniform(1e7, 6e7) if sale_date else None, rng.choice([1, 0.5, 0.9]), 0
+        ])
+        for m in range(months):
+            month = analysis_start + relativedelta(months=m)
+            cashflow_sheet.append([property_id, datetime(month.year, month.month, 1), rng.uniform(5e4, 3e5), -rng.uniform(0, 5e4)])
+    workbook.save(path)
@@ -0,0 +1,165 @@
+"""
+Time the model's hot paths on a synthetic portfolio, record peak memory, and compare with a previous run.
+
+Each case is timed best-of --repeat on cold caches, then run once more under tracemalloc for its
+peak. Results are written as JSON; with --baseline, cases slower or larger than the baseline by
+more than --threshold are flagged and the exit status is 1.
+
+Run from the repository root:
+    python -m benchmarks.suite --properties 500 --output bench.json
+    python -m benchmarks.suite --properties 500 --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from portfolio import Portfolio
+from rates import StaticRateProvider, set_default_rate_provider
+from benchmarks.generators import make_portfolio, make_workbook
+
+FORMAT_VERSION = 1
+
+# A case prepares its inputs and returns the function to time; preparation is not measured
+Case = Callable[[Portfolio, argparse.Namespace], Callable[[], object]]
+
+
+def _loan_schedules(portfolio: Portfolio, args: argparse.Namespace) -> Callable[[], object]:
+    loans = [loan for property in portfolio.properties for loan in property.loans]
+    for loan in loans:
+        loan.invalidate_schedule()
+    return lambda: [loan.get_schedule() for loan in loans]
+
+
+def _property_cash_flows(portfolio: Portfolio, args: argparse.Namespace) -> Callable[[], object]:
+    for property in portfolio.properties:
+        for loan in property.loans:
+            loan.invalidate_schedule()
+    return lambda: [property.get_cash_flows_dataframe() for property in portfolio.properties]
+
+
+def _aggregate_cash_flows(portfolio: Portfolio, args: argparse.Namespace) -> Callable[[], object]:
+    for property in portfolio.properties:
+        for loan in property.loans:
+            loan.invalidate_schedule()
+    portfolio.invalidate()
+    return lambda: portfolio.aggregate_hold_period_cash_flows(executor=args.executor)
+
+
+def _upload(portfolio: Portfolio, args: argparse.Namespace) -> Callable[[], object]:
+    from upload import load_properties_and_loans
+
+    path = os.path.join(args.workdir, f'suite_{args.properties}x{args.years * 12}_{args.loans}_{args.seed}.xlsx')
+    if not os.path.exists(path):
+        make_workbook(path, args.properties, args.years * 12, seed=args.seed, max_loans=args.loans)
+    return lambda: load_properties_and_loans(path)
+
+
+CASES: Dict[str, Case] = {
+    'loan.get_schedule': _loan_schedules,
+    'property.get_cash_flows_dataframe': _property_cash_flows,
+    'portfolio.aggregate_hold_period_cash_flows': _aggregate_cash_flows,
+    'upload.load_properties_and_loans': _upload,
+}
+
+
+def run_case(case: Case, portfolio: Portfolio, args: argparse.Namespace) -> Dict[str, float]:
+    """Best and mean time over args.repeat cold runs, and the tracemalloc peak of one more."""
+    times = []
+    for _ in range(args.repeat):
+        run = case(portfolio, args)
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    run = case(portfolio, args)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'best_s': min(times), 'mean_s': sum(times) / len(times), 'peak_mb': peak / 1e6}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[Tuple[str, str, float, float]]:
+    """
+    The cases whose best time or memory peak exceeds the baseline's by more than threshold.
+
+    Returns:
+    List[Tuple[str, str, float, float]]: (case, metric, baseline value, new value) per regression.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric in ('best_s', 'peak_mb'):
+            before = baseline.get(name, {}).get(metric)
+            if before and metrics[metric] > before * (1 + threshold):
+                regressions.append((name, metric, before, metrics[metric]))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--properties', type=int, default=200)
+    parser.add_argument('--loans', type=int, default=1, help='Loans per property')
+    parser.add_argument('--term', type=int, default=None, help='Loan term in months; a mix of 5, 7 and 10 years by default')
+    parser.add_argument('--floating', type=float, default=0.5, help='Share of floating-rate loans')
+    parser.add_argument('--years', type=int, default=10, help='Analysis horizon')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--executor', default='serial')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--workdir', default=tempfile.gettempdir(), help='Where generated workbooks are kept between runs')
+    parser.add_argument('--output', default=None, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='A previous JSON result to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown or memory growth, 0.2 = 20%%')
+    args = parser.parse_args(argv)
+
+    start_date = date(2025, 1, 1)
+    # Floating loans read SOFR from the default provider; a flat curve keeps runs comparable
+    sofr_months = max(args.years * 12, args.term or 120) + 25
+    set_default_rate_provider(StaticRateProvider({(start_date + relativedelta(months=m)).isoformat(): 0.04 for m in range(sofr_months)}))
+    portfolio = make_portfolio(args.properties, start_date, args.years, seed=args.seed, loans_per_property=args.loans,
+                               term_months=args.term, floating_share=args.floating)
+
+    config = {name: getattr(args, name) for name in ('properties', 'loans', 'term', 'floating', 'years', 'seed', 'repeat', 'executor')}
+    results = {}
+    for name in args.cases:
+        results[name] = run_case(CASES[name], portfolio, args)
+        print(f"{name:45s} {results[name]['best_s']:9.3f}s  {results[name]['peak_mb']:9.1f}MB")
+
+    report = {
+        'format_version': FORMAT_VERSION,
+        'config': config,
+        'environment': {
+            'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform()
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print(f"warning: baseline was run with {baseline.get('config')}")
+        regressions = compare(results, baseline.get('results', {}), args.threshold)
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name} {metric}: {before:.3f} -> {after:.3f} ({after / before - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+from datetime import date
+from typing import List, Dict, Optional
+import numpy as np
+import pandas as pd
+from months import MONTH_DTYPE, month_dates, to_month
+
+
+class CashFlowBuilder:
+    """
+    Assemble a monthly cash-flow DataFrame from float64 NumPy columns.
+
+    Rows are first-of-month dates from start_date to end_date, addressed by integer month offset.
+    Setting a value on a date outside that window appends a row at the end of the frame, the
+    way DataFrame.at enlarges a frame for a missing label; appended rows start at 0 in every column.
+    The DataFrame is created once, in build().
+    """
+
+    def __init__(self, start_date: date, end_date: date, columns: List[str]):
+        # Same rows as pd.date_range(start_date, end_date, freq='MS')
+        self.start_month = to_month(start_date) + (1 if start_date.day != 1 else 0)
+        self.window_length = max(to_month(end_date) - self.start_month + 1, 0)
+        self.window_months = np.arange(self.start_month, self.start_month + self.window_length, dtype=MONTH_DTYPE)
+        self.window_dates = month_dates(self.window_months)
+        self._extra_rows: Dict[date, int] = {}
+        self._columns = {name: np.zeros(self.window_length) for name in columns}
+
+    def __len__(self):
+        return self.window_length + len(self._extra_rows)
+
+    @property
+    def index(self) -> List[date]:
+        return self.window_dates + list(self._extra_rows)
+
+    def column(self, name: str) -> np.ndarray:
+        """The float64 array backing a column, created on first use."""
+        if name not in self._columns:
+            self._columns[name] = np.zeros(len(self))
+        return self._columns[name]
+
+    def set_column(self, name: str, values: np.ndarray):
+        self._columns[name] = np.asarray(values, dtype=np.float64)
+
+    def window_position(self, d: date) -> Optional[int]:
+        """Row offset of d within the month window, or None if d is not a month start inside it."""
+        if d.day != 1:
+            return None
+        offset = to_month(d) - self.start_month
+        if 0 <= offset < self.window_length:
+            return offset
+        return None
+
+    def set(self, d: date, column: str, value: Optional[float]):
+        """Assign a value on date d, appending a row when d falls outside the window."""
+        position = self.window_position(d)
+        if position is None:
+            position = self._extra_rows.get(d)
+        if position is None:
+            position = len(self)
+            self._extra_rows[d] = position
+            for name, values in self._columns.items():
+                self._columns[name] = np.append(values, 0.0)
+        self.column(column)[position] = np.nan if value is None else value
+
+    def add(self, d: date, column: str, value: float):
+        """Add a value on date d. Dates outside the window are ignored."""
+        position = self.window_position(d)
+        if position is not None:
+            self.column(column)[position] += value
+
+    def scatter_add(self, column: str, months: np.ndarray, values: np.ndarray):
+        """
+        Add values at month numbers (months since 1970-01), accumulating repeated months.
+        Months outside the window are ignored.
+        """
+        offsets = np.asarray(months, dtype=np.int64) - self.start_month
+        mask = (offsets >= 0) & (offsets < self.window_length)
+        np.add.at(self.column(column), offsets[mask], np.asarray(values, dtype=np.float64)[mask])
+
+    def row_positions(self, months: np.ndarray) -> np.ndarray:
+        """
+        Row of each month number: its window row, or the appended row dated the first of that
+        month, or -1 when the frame has no row for it.
+        """
+        offsets = np.asarray(months, dtype=np.int64) - self.start_month
+        positions = np.where((offsets >= 0) & (offsets < self.window_length), offsets, -1)
+        for d, position in self._extra_rows.items():
+            if d.day == 1:
+                positions[(positions < 0) & (offsets == to_month(d) - self.start_month)] = position
+        return positions
+
+    def values(self, name: str) -> np.ndarray:
+        """A column's values with NaN replaced by 0, as they appear in the built frame."""
+        values = self.column(name)
+        return np.where(np.isnan(values), 0.0, values)
+
+    def build(self, columns: List[str]) -> pd.DataFrame:
+        """Create the DataFrame once, with NaN values replaced by 0."""
+        return pd.DataFrame({name: self.values(name) for name in columns}, index=self.index)
@@ -1,77 +1,218 @@
+import json
+import logging
+import sqlite3
+import threading
 import requests
 from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
-import streamlit as st
+from curve_store import CurveStore, CURVE_TTL, OFFLINE
+from profiling import profiled
+
+MONTHLY_METHODS = ('next', 'first', 'average', 'end')
+
+logger = logging.getLogger(__name__)
+
 
 class Chatham:
-    def __init__(self):
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Connection': 'keep-alive',
+        'Host': 'www.chathamfinancial.com',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+    }
+
+    def __init__(self, store: Optional[CurveStore] = None, ttl: float = CURVE_TTL, offline: bool = OFFLINE):
         self.url = "https://www.chathamfinancial.com/getrates/285116"
         self.curve_date = None
         self.rates = {}
+        self._dates = np.array([], dtype='datetime64[D]')
+        self._values = np.array([], dtype=np.float64)
+        self._monthly = {}
+        self.error = None
+        self.store = store if store is not None else CurveStore()
+        self.ttl = ttl
+        self.offline = offline
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Chatham':
+        """Loads a curve saved in the endpoint's JSON format, without touching the network or the store."""
+        with open(path) as f:
+            data = json.load(f)
+        chatham = cls(offline=True)
+        chatham._set_curve(*cls._parse(data))
+        return chatham
+
+    def _set_curve(self, curve_date: Optional[str], rates: Dict[str, float]):
+        """Stores the curve as sorted datetime64/float64 arrays and drops monthly rates of the previous curve."""
+        self.curve_date = curve_date
+        self.rates = rates
+        dates = np.array(list(rates), dtype='datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+        self._dates = dates[order]
+        self._values = np.array(list(rates.values()), dtype=np.float64)[order]
+        self._monthly = {}
+
+    @staticmethod
+    def _parse(data: dict) -> Tuple[str, Dict[str, float]]:
+        curve_date = data["CurveDate"].split("T")[0]
+        rates = {rate["Date"].split("T")[0]: rate["Rate"] for rate in data["Rates"]}
+        return curve_date, rates
 
+    def _download(self) -> Tuple[str, Dict[str, float]]:
+        response = requests.get(self.url, headers=self.HEADERS, timeout=30)
+        response.raise_for_status()  # Check for HTTP errors
+        return self._parse(response.json())
+
+    def _save(self):
+        try:
+            self.store.save(self.curve_date, self.rates)
+        except (OSError, sqlite3.Error):
+            logger.warning("Could not save the SOFR curve to the store", exc_info=True)
+
+    def _refresh(self):
+        """Fetches a new curve into the store, keeping the stale copy if the fetch fails."""
+        try:
+            curve_date, rates = self._download()
+            self.store.save(curve_date, rates)
+        except Exception:
+            logger.exception("Background refresh of the SOFR curve failed; keeping the stored curve")
+
+    @profiled('Chatham.load')
+    def load(self):
+        """
+        Loads the curve from the local store, fetching it only when no stored copy exists.
+
+        A copy older than the TTL is still returned, and a background fetch refreshes the store
+        for the next load. In offline mode the network is never used.
+        """
+        try:
+            stored = self.store.latest()
+        except (OSError, sqlite3.Error, ValueError):
+            stored = None
+        if stored is not None:
+            self._set_curve(stored.curve_date, stored.rates)
+            if stored.age() > self.ttl and not self.offline:
+                threading.Thread(target=self._refresh, daemon=True).start()
+            return
+        if not self.offline:
+            self.fetch_data()
+        else:
+            self._fail("No SOFR curve is stored and offline mode is on; floating-rate loans have no SOFR to price from.")
+
+    @profiled('Chatham.fetch_data')
     def fetch_data(self):
-        """Fetches data from the given URL and updates the curve_date and rates."""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Connection': 'keep-alive',
-            'Host': 'www.chathamfinancial.com',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-        }
+        """
+        Fetches data from the given URL and updates the curve_date and rates.
+
+        A failed fetch leaves the rates empty and its message in self.error for the caller to display.
+        """
+        self.error = None
         try:
-            response = requests.get(self.url, headers=headers)
-            response.raise_for_status()  # Check for HTTP errors
-            data = response.json()
-            self.curve_date = data["CurveDate"].split("T")[0]
-            self.rates = {rate["Date"].split("T")[0]: rate["Rate"] for rate in data["Rates"]}
+            self._set_curve(*self._download())
+            self._save()
         except requests.exceptions.RequestException as e:
-            st.error(f"Request error: {e}")
+            self._fail(f"Request error: {e}")
         except requests.exceptions.HTTPError as e:
-            st.error(f"HTTP error: {e}")
+            self._fail(f"HTTP error: {e}")
         except requests.exceptions.JSONDecodeError as e:
-            st.error(f"JSON decode error: {e}")
+            self._fail(f"JSON decode error: {e}")
         except KeyError as e:
-            st.error(f"Key error: {e}")
+            self._fail(f"Key error: {e}")
         except Exception as e:
-            st.error(f"An unexpected error occurred: {e}")
+            self._fail(f"An unexpected error occurred: {e}")
         finally:
             pass
 
+    def _fail(self, message: str):
+        self.error = message
+        logger.error(message)
+
     def get_rate(self, date):
         """Gets the rate for a specific date. If the date is not found, it finds the closest next date."""
         if not self.rates:
-            self.fetch_data()
-        while date.strftime("%Y-%m-%d") not in self.rates and date <= datetime.today():
-            date += timedelta(days=1)
-        return self.rates.get(date.strftime("%Y-%m-%d"), None)
+            self.load()
+        # The next curve date is only taken up to the day after today, as the day-by-day search did
+        today = datetime.today()
+        limit = date if date > today else date + timedelta(days=(today - date).days + 1)
+        position = np.searchsorted(self._dates, np.datetime64(date.strftime("%Y-%m-%d"), 'D'))
+        if position == len(self._dates) or self._dates[position] > np.datetime64(limit.strftime("%Y-%m-%d"), 'D'):
+            return None
+        return float(self._values[position])
+
+    def get_rates(self, dates) -> np.ndarray:
+        """
+        Rates for many dates at once, with the same next-date rule as get_rate.
+
+        Parameters:
+        dates: Array-like of dates, converted to datetime64[D].
+
+        Returns:
+        np.ndarray: float64 rates, NaN where get_rate would return None.
+        """
+        if not self.rates:
+            self.load()
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        tomorrow = np.datetime64(datetime.today().date(), 'D') + 1
+        limit = np.maximum(dates, tomorrow)
+        position = np.searchsorted(self._dates, dates)
+        found = position < len(self._dates)
+        position = np.minimum(position, max(len(self._dates) - 1, 0))
+        rates = np.full(dates.shape, np.nan)
+        if len(self._dates):
+            found &= self._dates[position] <= limit
+            rates[found] = self._values[position[found]]
+        return rates
 
     def get_all_rates(self):
         """Returns all rates after fetching data if not already done."""
         if not self.rates:
-            self.fetch_data()
+            self.load()
         return self.rates
 
-    def get_monthly_rates(self):
-        """Returns rates for the first available date of each month."""
+    def get_monthly_curve(self, method: str = 'next') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resamples the curve to one rate per calendar month, computed once per curve and method.
+
+        Parameters:
+        method (str): 'next' takes the rate on the first available date after the month, as the
+            original monthly curve did, so the last month on the curve is left out. 'first' takes
+            the first available date in the month, 'average' the mean of the month's rates and
+            'end' the last available date in the month.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray]: datetime64[M] months and their float64 rates.
+        """
+        if method not in MONTHLY_METHODS:
+            raise ValueError(f"Unknown monthly method '{method}', expected one of {MONTHLY_METHODS}.")
         if not self.rates:
-            self.fetch_data()
-        monthly_rates = {}
-        sorted_dates = sorted(self.rates.keys())
-        if not sorted_dates:
-            return monthly_rates  # Return empty if no dates are available
-
-        current_month = datetime.strptime(sorted_dates[0], "%Y-%m-%d").month
-        current_year = datetime.strptime(sorted_dates[0], "%Y-%m-%d").year
-
-        for date_str in sorted_dates:
-            date = datetime.strptime(date_str, "%Y-%m-%d")
-            if date.month != current_month or date.year != current_year:
-                monthly_rates[f"{current_year}-{current_month:02d}-01"] = self.rates[date_str]
-                current_month = date.month
-                current_year = date.year
-        return monthly_rates
+            self.load()
+        if not len(self._dates):
+            return np.array([], dtype='datetime64[M]'), np.array([], dtype=np.float64)
+        if method not in self._monthly:
+            months = self._dates.astype('datetime64[M]')
+            starts = np.flatnonzero(np.concatenate(([True], months[1:] != months[:-1])))
+            if method == 'next':
+                monthly = (months[starts[:-1]], self._values[starts[1:]])
+            elif method == 'first':
+                monthly = (months[starts], self._values[starts])
+            elif method == 'average':
+                counts = np.diff(np.append(starts, len(months)))
+                monthly = (months[starts], np.add.reduceat(self._values, starts) / counts)
+            else:
+                ends = np.append(starts[1:], len(months)) - 1
+                monthly = (months[starts], self._values[ends])
+            self._monthly[method] = monthly
+        return self._monthly[method]
 
+    def get_monthly_rates(self, method: str = 'next'):
+        """Returns one rate per month keyed by 'YYYY-MM-01', see get_monthly_curve for the methods."""
+        months, values = self.get_monthly_curve(method)
+        keys = np.datetime_as_string(months.astype('datetime64[D]'), unit='D').tolist()
+        return dict(zip(keys, values.tolist()))
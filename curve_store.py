@@ -0,0 +1,84 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+# Settings for the local curve cache, overridable through the environment
+CURVE_DIR = os.environ.get('PORTFOLIO_CURVE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'portfoliomanager'))
+CURVE_TTL = float(os.environ.get('PORTFOLIO_CURVE_TTL', 12 * 60 * 60))
+OFFLINE = os.environ.get('PORTFOLIO_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+class StoredCurve:
+    def __init__(self, curve_date: str, rates: Dict[str, float], fetched_at: float):
+        self.curve_date = curve_date
+        self.rates = rates
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        """Seconds since the curve was fetched."""
+        return time.time() - self.fetched_at
+
+
+class CurveStore:
+    """
+    SQLite-backed store of forward curves keyed by curve date.
+
+    Each curve is one row, so loading the latest curve costs a single read of a small local file.
+    """
+
+    def __init__(self, directory: Optional[str] = None, name: str = 'sofr'):
+        self.directory = directory or CURVE_DIR
+        self.name = name
+        self.path = os.path.join(self.directory, 'curves.sqlite')
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS curves ("
+            "name TEXT NOT NULL, curve_date TEXT NOT NULL, fetched_at REAL NOT NULL, rates TEXT NOT NULL, "
+            "PRIMARY KEY (name, curve_date))"
+        )
+        return connection
+
+    def save(self, curve_date: str, rates: Dict[str, float], fetched_at: Optional[float] = None):
+        """Store a curve, replacing any copy with the same curve date."""
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO curves (name, curve_date, fetched_at, rates) VALUES (?, ?, ?, ?)",
+                    (self.name, curve_date, fetched_at, json.dumps(rates))
+                )
+        finally:
+            connection.close()
+
+    def _read(self, query: str, params: tuple) -> Optional[StoredCurve]:
+        if not os.path.exists(self.path):
+            return None
+        connection = self._connect()
+        try:
+            row = connection.execute(query, params).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        curve_date, fetched_at, rates = row
+        return StoredCurve(curve_date, json.loads(rates), fetched_at)
+
+    def latest(self) -> Optional[StoredCurve]:
+        """The most recent curve in the store, or None if the store is empty."""
+        return self._read(
+            "SELECT curve_date, fetched_at, rates FROM curves WHERE name = ? ORDER BY curve_date DESC, fetched_at DESC LIMIT 1",
+            (self.name,)
+        )
+
+    def get(self, curve_date: str) -> Optional[StoredCurve]:
+        """The curve published on curve_date, or None if it was never stored."""
+        return self._read(
+            "SELECT curve_date, fetched_at, rates FROM curves WHERE name = ? AND curve_date = ?",
+            (self.name, curve_date)
+        )
@@ -1,14 +1,29 @@
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
-from typing import List, Tuple, Optional, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 import uuid
 import pandas as pd
 import json
-from chatham import Chatham
-import streamlit as st
+import numpy as np
+from rates import RateProvider, get_default_rate_provider
+from schedule import AmortizationSchedule, annuity_balance, build_schedule, fixed_rate_balances, iter_schedule, month_grid, to_dates
+from versioning import digest, next_stamp
+from profiling import count, profiled
 
 
-class Loan:    
+class Loan:
+    __slots__ = (
+        'rate_provider', 'loan_id', 'origination_date', 'maturity_date', 'original_balance', 'note_rate',
+        'day_count_method', 'total_months', 'interest_only_period', 'amortization_period', 'fixed_floating',
+        'spread', 'monthly_payment', '_stamp', '_content_hash', '_schedule_cache', '_schedule_curve'
+    )
+
+    # Attributes that determine the schedule; assigning any of them drops the cached schedule.
+    _SCHEDULE_TERMS = frozenset({
+        'origination_date', 'maturity_date', 'original_balance', 'note_rate', 'interest_only_period',
+        'amortization_period', 'day_count_method', 'fixed_floating', 'spread'
+    })
+
     def __init__(
         self,
         origination_date: date,
@@ -20,8 +35,10 @@ class Loan:
         day_count_method: str = "30/360",
         fixed_floating: str = "Fixed",    
         loan_id: Optional[str] = None,
-        spread: Optional[int] = 0
+        spread: Optional[int] = 0,
+        rate_provider: Optional[RateProvider] = None
     ):
+        self.rate_provider = rate_provider
         self.loan_id = loan_id if loan_id is not None else str(uuid.uuid4())
         self.origination_date = self._adjust_to_month_start(origination_date)
         self.maturity_date = self._adjust_to_month_start(maturity_date)
@@ -39,9 +56,38 @@ class Loan:
         self.fixed_floating = fixed_floating
         self.spread = spread if spread is not None else 0
         self.monthly_payment = self._calculate_monthly_payment()
-        self.schedule = self.get_schedule()
         self._validate_inputs()
-        
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self._stamp = next_stamp()
+        if name in Loan._SCHEDULE_TERMS:
+            self.invalidate_schedule()
+
+    @property
+    def stamp(self) -> int:
+        """Version stamp, replaced whenever a public attribute is assigned."""
+        return self._stamp
+
+    def content_hash(self) -> str:
+        """
+        Digest of the loan's terms, equal for loans with equal terms in any process.
+
+        The SOFR curve of a floating loan is not part of the hash; callers caching floating results
+        key on the curve as well. The digest is memoized until the next attribute assignment.
+        """
+        memo = getattr(self, '_content_hash', None)
+        if memo is None or memo[0] != self.stamp:
+            memo = (self.stamp, digest(*(getattr(self, term) for term in sorted(Loan._SCHEDULE_TERMS)), self.loan_id))
+            self._content_hash = memo
+        return memo[1]
+
+    def invalidate_schedule(self):
+        """Drop the cached schedule so the next query recomputes it."""
+        self._schedule_cache = None
+        self._schedule_curve = None
+
     def to_dict(self):
         return {
             'origination_date': self.origination_date.isoformat(),
@@ -91,11 +137,8 @@ class Loan:
         if self.fixed_floating == 'Fixed':
             note_rate = self.note_rate
         else:
-            if 'sofr' not in st.session_state:
-                chatham = Chatham()
-                st.session_state.sofr = chatham.get_monthly_rates()
             start_date_str = self._standardize_date(start_date).strftime("%Y-%m-%d")
-            note_rate =  st.session_state.sofr.get(start_date_str, 0) + self.spread / 100
+            note_rate =  self.sofr_curve().get(start_date_str, 0) + self.spread / 100
 
         if self.day_count_method == "30/360":
             days = 30
@@ -131,103 +174,116 @@ class Loan:
         """Standardize a date to the first of its month."""
         return d.replace(day=1)
 
-    def get_schedule(self) -> List[Dict[str, float]]:
-        self._calculate_monthly_payment()
-        cash_flows = []
-        current_date = self.origination_date
-        current_balance = self.original_balance
-
-        # Add the initial cash flow (loan disbursement)
-        cash_flows.append({
-            'date': self._standardize_date(current_date),
-            'Beginning Balance': self.original_balance,
-            'Interest Expense': 0,
-            'Principal Payments': 0,
-            'Total Payment': -self.original_balance,
-            'Ending Balance': self.original_balance
-        })
-
-        while current_date < self.maturity_date:
-            next_date = min(
-                current_date + relativedelta(months=1), self.maturity_date)
-            standardized_date = self._standardize_date(next_date)
-            interest = self._calculate_interest(
-                current_balance, current_date, next_date)
+    def sofr_curve(self) -> Optional[Dict[str, float]]:
+        """
+        Monthly SOFR curve used by floating loans, or None for fixed loans.
 
-            months_since_origination = (current_date.year - self.origination_date.year) * 12 + \
-                current_date.month - self.origination_date.month
+        The curve comes from the loan's rate_provider, or from the default provider in rates.py
+        when the loan was not given one.
+        """
+        if self.fixed_floating == 'Fixed':
+            return None
+        provider = self.rate_provider if self.rate_provider is not None else get_default_rate_provider()
+        return provider.monthly_curve()
 
-            if self.interest_only_period == 0 and self.amortization_period == 0:
-                principal = 0
-                payment = interest
-            elif months_since_origination < self.interest_only_period:
-                principal = 0
-                payment = interest
-            else:
-                payment = self._calculate_monthly_payment()
-                principal = payment - interest
-
-            current_balance -= principal
-            cash_flows.append({
-                'date': standardized_date,
-                'Beginning Balance': cash_flows[-1]['Ending Balance'],
-                'Interest Expense': interest,
-                'Principal Payments': principal,
-                'Total Payment': payment,
-                'Ending Balance': current_balance
-            })
-            current_date = next_date
-        self.schedule = cash_flows
+    def _period_rates(self, period_dates: List[date], sofr: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Annual note rate (decimal) in effect for each period starting on the given dates."""
+        if self.fixed_floating == 'Fixed':
+            return np.full(len(period_dates), self.note_rate)
+        if sofr is None:
+            sofr = self.sofr_curve()
+        return np.array([sofr.get(d.strftime("%Y-%m-%d"), 0) for d in period_dates], dtype=np.float64) + self.spread / 100
 
-        return cash_flows
+    def build_schedule(self, sofr: Optional[Dict[str, float]] = None) -> AmortizationSchedule:
+        """Compute the loan schedule as column arrays with the vectorized schedule engine."""
+        grid = month_grid(self.origination_date, self.maturity_date)
+        return build_schedule(
+            grid=grid,
+            original_balance=self.original_balance,
+            period_rates=self._period_rates(to_dates(grid[:-1]), sofr),
+            day_count_method=self.day_count_method,
+            interest_only_period=self.interest_only_period,
+            amortization_period=self.amortization_period,
+            monthly_payment=self._calculate_monthly_payment()
+        )
 
+    def cached_schedule(self) -> AmortizationSchedule:
+        """
+        Return the memoized schedule, rebuilding it only after a term attribute changed
+        or, for floating loans, after the SOFR curve was replaced.
+        """
+        sofr = self.sofr_curve()
+        cache = getattr(self, '_schedule_cache', None)
+        if cache is None or getattr(self, '_schedule_curve', None) is not sofr:
+            count('Loan schedules built')
+            cache = self.build_schedule(sofr)
+            self._schedule_cache = cache
+            self._schedule_curve = sofr
+        return cache
+
+    @property
+    def schedule(self) -> List[Dict[str, float]]:
+        """The schedule records, computed on first access rather than when the loan is created."""
+        return self.get_schedule()
+
+    @profiled('Loan.get_schedule')
+    def get_schedule(self) -> List[Dict[str, float]]:
+        return self.cached_schedule().to_records()
+
+    @profiled('Loan.get_unsecured_schedule')
     def get_unsecured_schedule(self) -> List[Dict[str, float]]:
-        self._calculate_monthly_payment()
-        cash_flows = []
-        current_date = self.origination_date
-        current_balance = self.original_balance
-
-        # Add the initial cash flow (loan disbursement)
-        cash_flows.append({
-            'date': self._standardize_date(current_date),
-            'Adjusted Loan Proceeds': self.original_balance,
-            'Adjusted Interest Expense': 0,
-            'Adjusted Principal Payments': 0,
-            'Adjusted Debt Scheduled Repayment': 0
-        })
-
-        while current_date < self.maturity_date:
-            next_date = min(current_date + relativedelta(months=1), self.maturity_date)
-            standardized_date = self._standardize_date(next_date)
-            interest = self._calculate_interest(current_balance, current_date, next_date)
-
-            months_since_origination = (current_date.year - self.origination_date.year) * 12 + \
-                current_date.month - self.origination_date.month
-
-            if self.interest_only_period == 0 and self.amortization_period == 0:
-                principal = 0
-                payment = interest
-            elif months_since_origination < self.interest_only_period:
-                principal = 0
-                payment = interest
-            else:
-                payment = self._calculate_monthly_payment()
-                principal = payment - interest
-
-            current_balance -= principal
-            cash_flows.append({
-                'date': standardized_date,
-                'Adjusted Loan Proceeds': 0,
-                'Adjusted Interest Expense': -interest,
-                'Adjusted Principal Payments': -principal,
-                'Adjusted Debt Scheduled Repayment': 0
-            })
-            current_date = next_date
-
-        # Add the final repayment adjustment
-        cash_flows[-1]['Adjusted Debt Scheduled Repayment'] = -current_balance
-    
-        return cash_flows
+        return self.cached_schedule().to_unsecured_records()
+
+    def _row(self, d: date) -> int:
+        """Schedule row of the month containing d, counted from the origination row."""
+        return (d.year - self.origination_date.year) * 12 + d.month - self.origination_date.month
+
+    def iter_schedule(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Iterator[Dict[str, float]]:
+        """
+        Yield the get_schedule rows of the months from start_date through end_date, one at a time.
+
+        Only the periods up to end_date are priced, and the balance at start_date is reached in
+        closed form rather than through the earlier rows, so reading a 30-year loan over a
+        3-year window builds 36 rows. A schedule already cached by get_schedule is read instead.
+        The rows equal get_schedule's.
+
+        Parameters:
+        start_date (date): First month to yield, the origination month by default.
+        end_date (date): Last month to yield, the maturity month by default.
+        """
+        grid = month_grid(self.origination_date, self.maturity_date)
+        first = 0 if start_date is None else max(self._row(start_date), 0)
+        last = len(grid) - 1 if end_date is None else min(self._row(end_date), len(grid) - 1)
+        if last < first:
+            return
+        sofr = self.sofr_curve()
+        cache = getattr(self, '_schedule_cache', None)
+        if cache is not None and getattr(self, '_schedule_curve', None) is sofr:
+            yield from cache.iter_records(first, last + 1)
+            return
+        yield from iter_schedule(
+            grid=grid[:last + 1],
+            original_balance=self.original_balance,
+            period_rates=self._period_rates(to_dates(grid[:last]), sofr),
+            day_count_method=self.day_count_method,
+            interest_only_period=self.interest_only_period,
+            amortization_period=self.amortization_period,
+            monthly_payment=self._calculate_monthly_payment(),
+            start=first
+        )
+
+    def iter_unsecured_schedule(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Iterator[Dict[str, float]]:
+        """Yield the get_unsecured_schedule rows of the months from start_date through end_date, one at a time."""
+        last_row = self._row(self.maturity_date)
+        for row in self.iter_schedule(start_date, end_date):
+            position = self._row(row['date'])
+            yield {
+                'date': row['date'],
+                'Adjusted Loan Proceeds': row['Beginning Balance'] if position == 0 else 0.0,
+                'Adjusted Interest Expense': -row['Interest Expense'],
+                'Adjusted Principal Payments': -row['Principal Payments'],
+                'Adjusted Debt Scheduled Repayment': -row['Ending Balance'] if position == last_row and last_row > 0 else 0.0
+            }
 
     def get_cash_flows(self) -> Dict[date, float]:
         """
@@ -241,8 +297,8 @@ class Loan:
         # Add the loan proceeds at origination as a positive cash flow
         cash_flows[self.origination_date] = self.original_balance
     
-        # Add the regular loan payments as negative cash flows
-        for entry in self.schedule[1:]:
+        # Add the regular loan payments as negative cash flows, skipping the disbursement row
+        for entry in self.iter_schedule(self.origination_date + relativedelta(months=1)):
             date = entry['date']
             cash_flows[date] = cash_flows.get(date, 0) - entry['Total Payment']
     
@@ -266,25 +322,60 @@ class Loan:
         else:
             return 0
     
+    @profiled('Loan.get_current_balance')
     def get_current_balance(self, as_of_date: date) -> float:
-        self.get_schedule()
-        closest_entry = None
-        for entry in self.schedule:
-            entry_date = entry['date']
-            if entry_date <= as_of_date:
-                closest_entry = entry
-            else:
-                break
-    
-        # If the as_of_date is past the maturity date, return the last entry's balance
-        if as_of_date > self.schedule[-1]['date']:
+        # Past maturity or before origination the balance is 0
+        if as_of_date < self.origination_date or as_of_date > self.maturity_date:
             return 0
-        
-        # If no entry is found before the as_of_date, return 0
-        if closest_entry is None:
-            return 0
-    
-        return closest_entry['Ending Balance']
+        if self.fixed_floating == 'Fixed':
+            row = self._row(as_of_date)
+            if self.day_count_method == "30/360":
+                # The annuity, O(1); computed on an array so it matches balances_at to the last bit
+                if self.interest_only_period == 0 and self.amortization_period == 0:
+                    return self.original_balance
+                amortized = np.array([max(row - self.interest_only_period, 0)], dtype=np.float64)
+                return float(annuity_balance(amortized, self.original_balance, self.note_rate * (30.0 / 360), self._calculate_monthly_payment())[0])
+            # Actual day counts: a cached schedule holds the same balances, otherwise the prefix's closed form
+            cache = getattr(self, '_schedule_cache', None)
+            if cache is None:
+                return float(self._fixed_rate_balances(np.array([row]))[0])
+        return self.cached_schedule().balance_at(as_of_date)
+
+    def balances_at(self, dates) -> np.ndarray:
+        """
+        Balance outstanding at each date, 0 before the origination month or after the maturity date.
+
+        Fixed-rate balances are computed in closed form from the loan terms without building the
+        schedule; floating-rate balances are read from the cached schedule.
+
+        Parameters:
+        dates: Array-like of dates, converted to datetime64[D].
+
+        Returns:
+        np.ndarray: float64 balances, one per date.
+        """
+        days = np.asarray(dates, dtype='datetime64[D]')
+        inside = (days >= np.datetime64(self.origination_date, 'D')) & (days <= np.datetime64(self.maturity_date, 'D'))
+        rows = days.astype('datetime64[M]').astype(np.int64) - np.datetime64(self.origination_date, 'M').astype(np.int64)
+        balances = np.zeros(days.shape)
+        if inside.any():
+            if self.fixed_floating == 'Fixed':
+                balances[inside] = self._fixed_rate_balances(rows[inside])
+            else:
+                balances[inside] = self.cached_schedule().ending_balance[rows[inside]]
+        return balances
+
+    def _fixed_rate_balances(self, rows: np.ndarray) -> np.ndarray:
+        return fixed_rate_balances(
+            rows=rows,
+            grid=month_grid(self.origination_date, self.maturity_date) if self.day_count_method != "30/360" else None,
+            original_balance=self.original_balance,
+            note_rate=self.note_rate,
+            day_count_method=self.day_count_method,
+            interest_only_period=self.interest_only_period,
+            amortization_period=self.amortization_period,
+            monthly_payment=self._calculate_monthly_payment()
+        )
     
     def get_payoff_amount(self, payoff_date: date) -> float:
         current_balance = self.get_current_balance(payoff_date)
@@ -299,10 +390,8 @@ class Loan:
                 'remaining_balance': self.get_current_balance(payment_date)
             }
     
-        # Find the closest date in the schedule that is less than or equal to the payment_date
-        closest_date = max(
-            d['date'] for d in self.schedule if d['date'] <= payment_date)
-        schedule_entry = next(entry for entry in self.schedule if entry['date'] == closest_date)
+        # The schedule row of payment_date's month, without building the rows after it
+        schedule_entry = next(self.iter_schedule(payment_date, payment_date))
     
         interest = schedule_entry['Interest Expense']
         principal = schedule_entry['Principal Payments']
@@ -0,0 +1,284 @@
+from datetime import date
+from typing import List, Dict, Optional
+import numpy as np
+import pandas as pd
+from months import MONTH_DTYPE, to_month
+from profiling import profiled
+from schedule import to_dates
+
+DAY_COUNT_CODES = {
+    "30/360": 0,
+    "Actual/360": 1,
+    "Actual/365": 2,
+}
+
+
+class LoanBookSchedule:
+    """
+    Schedules for every loan in a LoanBook on a shared calendar-month axis.
+
+    Matrices are shaped (loans x months). Column j is the period ending on months[j]; the
+    origination column holds the disbursement row, so interest and principal are 0 there.
+    """
+
+    def __init__(self, loan_ids: List[str], months: np.ndarray, origination_index: np.ndarray,
+                 maturity_index: np.ndarray, interest: np.ndarray, principal: np.ndarray,
+                 payment: np.ndarray, balance: np.ndarray):
+        self.loan_ids = loan_ids
+        self.months = months
+        self.origination_index = origination_index
+        self.maturity_index = maturity_index
+        self.interest = interest
+        self.principal = principal
+        self.payment = payment
+        self.balance = balance
+
+    @property
+    def dates(self) -> List[date]:
+        return to_dates(self.months)
+
+    def active(self) -> np.ndarray:
+        """Boolean (loans x months) mask of the columns each loan's schedule has a row for."""
+        col = np.arange(len(self.months))
+        return (col >= self.origination_index[:, None]) & (col <= np.maximum(self.maturity_index, self.origination_index)[:, None])
+
+    def loan_proceeds(self) -> np.ndarray:
+        """Disbursed balances placed on each loan's origination column."""
+        proceeds = np.zeros_like(self.balance)
+        rows = np.arange(len(self.loan_ids))
+        proceeds[rows, self.origination_index] = self.balance[rows, self.origination_index]
+        return proceeds
+
+    def scheduled_repayment(self) -> np.ndarray:
+        """Balances outstanding at maturity placed on each loan's maturity column."""
+        repayment = np.zeros_like(self.balance)
+        rows = np.flatnonzero(self.maturity_index > self.origination_index)
+        repayment[rows, self.maturity_index[rows]] = self.balance[rows, self.maturity_index[rows]]
+        return repayment
+
+    def totals(self) -> pd.DataFrame:
+        """
+        Sum the book over loans by month.
+
+        Returns:
+        pd.DataFrame: Loan Proceeds, Interest Expense, Principal Payments, Debt Scheduled Repayment
+        and Ending Balance, indexed by date over the months at least one loan has a schedule row for.
+        """
+        active = self.active()
+        keep = active.any(axis=0)
+        totals = pd.DataFrame({
+            'Loan Proceeds': self.loan_proceeds().sum(axis=0),
+            'Interest Expense': self.interest.sum(axis=0),
+            'Principal Payments': self.principal.sum(axis=0),
+            'Debt Scheduled Repayment': self.scheduled_repayment().sum(axis=0),
+            'Ending Balance': self.balance.sum(axis=0)
+        }, index=self.dates)
+        return totals[keep]
+
+
+class LoanBook:
+    """
+    Struct-of-arrays representation of many loans, used to compute all schedules as one
+    (loans x months) calculation instead of one Loan.get_schedule call per loan.
+
+    Floating loans may price off different SOFR curves. The book keeps each distinct curve once
+    in curves, and curve_index gives each loan's position in that list, or -1 for fixed loans.
+    """
+
+    def __init__(
+        self,
+        loan_ids: List[str],
+        origination_month: np.ndarray,
+        maturity_month: np.ndarray,
+        original_balance: np.ndarray,
+        note_rate: np.ndarray,
+        interest_only_period: np.ndarray,
+        amortization_period: np.ndarray,
+        day_count_code: np.ndarray,
+        spread: np.ndarray,
+        floating: np.ndarray,
+        sofr: Optional[Dict[str, float]] = None,
+        curves: Optional[List[Optional[Dict[str, float]]]] = None
+    ):
+        """
+        sofr is one curve for every floating loan; curves gives each loan its own curve instead,
+        None for fixed loans, and takes precedence.
+        """
+        self.loan_ids = list(loan_ids)
+        self.origination_month = np.asarray(origination_month, dtype=MONTH_DTYPE)
+        self.maturity_month = np.asarray(maturity_month, dtype=MONTH_DTYPE)
+        self.original_balance = np.asarray(original_balance, dtype=np.float64)
+        self.note_rate = np.asarray(note_rate, dtype=np.float64)
+        self.interest_only_period = np.asarray(interest_only_period, dtype=np.int64)
+        self.amortization_period = np.asarray(amortization_period, dtype=np.int64)
+        self.day_count_code = np.asarray(day_count_code, dtype=np.int8)
+        self.spread = np.asarray(spread, dtype=np.float64)
+        self.floating = np.asarray(floating, dtype=bool)
+        if curves is None:
+            curves = [sofr if sofr is not None else {}] * len(self.loan_ids)
+        self.curves = []
+        positions = {}
+        index = []
+        for floating, curve in zip(self.floating, curves):
+            if not floating:
+                index.append(-1)
+                continue
+            curve = curve if curve is not None else {}
+            if id(curve) not in positions:
+                positions[id(curve)] = len(self.curves)
+                self.curves.append(curve)
+            index.append(positions[id(curve)])
+        self.curve_index = np.array(index, dtype=np.int64)
+
+    @classmethod
+    def from_loans(cls, loans: List['Loan'], sofr: Optional[Dict[str, float]] = None) -> 'LoanBook':
+        """A book of the loans, each floating loan on its own sofr_curve() unless one sofr curve is given for all."""
+        return cls(
+            loan_ids=[loan.loan_id for loan in loans],
+            origination_month=[to_month(loan.origination_date) for loan in loans],
+            maturity_month=[to_month(loan.maturity_date) for loan in loans],
+            original_balance=[loan.original_balance for loan in loans],
+            note_rate=[loan.note_rate for loan in loans],
+            interest_only_period=[loan.interest_only_period for loan in loans],
+            amortization_period=[loan.amortization_period for loan in loans],
+            day_count_code=[DAY_COUNT_CODES.get(loan.day_count_method, 2) for loan in loans],
+            spread=[loan.spread for loan in loans],
+            floating=[loan.fixed_floating != 'Fixed' for loan in loans],
+            sofr=sofr,
+            curves=None if sofr is not None else [loan.sofr_curve() for loan in loans]
+        )
+
+    def __len__(self):
+        return len(self.loan_ids)
+
+    def monthly_payment(self) -> np.ndarray:
+        """Level payment per loan, matching Loan._calculate_monthly_payment."""
+        monthly_rate = self.note_rate / 12
+        n = self.amortization_period
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = (1 + monthly_rate) ** n
+            payment = self.original_balance * (monthly_rate * growth) / (growth - 1)
+        return np.where((n > 0) & ~self.floating, payment, 0.0)
+
+    def calendar(self, end_month: Optional[int] = None) -> np.ndarray:
+        """datetime64[M] months from the first origination to the last maturity, or to end_month when given."""
+        start = int(self.origination_month.min())
+        end = int(max(self.maturity_month.max(), start)) if end_month is None else max(end_month, start)
+        return np.arange(start, end + 1).astype('datetime64[M]')
+
+    def curve_sofr(self, months: np.ndarray) -> np.ndarray:
+        """
+        (curves x months) SOFR from each of the book's curves for the period ending in each month,
+        keyed on the period's start month.
+        """
+        keys = [d.strftime("%Y-%m-%d") for d in to_dates(np.concatenate((months[:1], months[:-1])))]
+        return np.array([[curve.get(key, 0) for key in keys] for curve in self.curves], dtype=np.float64).reshape(len(self.curves), len(months))
+
+    def period_sofr(self, months: np.ndarray) -> np.ndarray:
+        """(loans x months) SOFR of each loan's curve for the period ending in each month; 0 for fixed loans."""
+        rows = np.vstack((self.curve_sofr(months), np.zeros((1, len(months)))))
+        return rows[self.curve_index]
+
+    def year_fractions(self, months: np.ndarray) -> np.ndarray:
+        """(loans x months) accrual fraction of a year for the period ending in each month."""
+        actual_days = np.concatenate(([30.0], np.diff(months.astype('datetime64[D]')).astype(np.float64)))
+        fractions = np.stack((np.full(len(months), 30.0) / 360, actual_days / 360, actual_days / 365))
+        return fractions[self.day_count_code]
+
+    def periods(self, months: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Index of each loan's origination and maturity on the months axis and the (loans x months)
+        masks of the columns in its term, with a balance outstanding, and amortizing.
+        """
+        start = months[0].astype(np.int64)
+        col = np.arange(len(months), dtype=np.int32)
+        origination_index = self.origination_month - start
+        maturity_index = self.maturity_month - start
+        term = np.maximum(maturity_index - origination_index, 0)
+
+        # Period number relative to origination; column j accrues from months[j - 1] to months[j]
+        period = col[None, :] - origination_index[:, None].astype(np.int32)
+        in_term = (period >= 1) & (period <= term[:, None])
+        amortizing_loan = ~((self.interest_only_period == 0) & (self.amortization_period == 0))
+        return {
+            'origination_index': origination_index,
+            'maturity_index': maturity_index,
+            'in_term': in_term,
+            'outstanding': (period >= 0) & (period <= term[:, None]),
+            'amortizing': in_term & (period > self.interest_only_period[:, None]) & amortizing_loan[:, None]
+        }
+
+    def solve(self, accrual: np.ndarray, periods: Dict[str, np.ndarray], opening_balance: Optional[np.ndarray] = None):
+        """
+        Interest, principal, payment and balance from the accrual factors (year fraction times rate).
+
+        accrual is shaped (loans x months), or (scenarios x loans x months) to solve many rate
+        scenarios at once, and is overwritten. opening_balance, the original balances by default,
+        is the balance before the first column; with periods sliced to start at a later month it
+        continues the schedules from there.
+
+        Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: interest, principal, payment and
+        balance, each shaped like accrual.
+        """
+        in_term = periods['in_term']
+        amortizing = periods['amortizing']
+        monthly_payment = self.monthly_payment()[:, None]
+        original_balance = (self.original_balance if opening_balance is None else opening_balance)[..., :, None]
+
+        # Same closed form as schedule.build_schedule, run along the month axis for all loans at once:
+        # b[j] = G[j] * (b0 - cumsum(P / G)[j]) with G the cumulative product of the growth factors
+        cumulative_growth = accrual + 1.0
+        np.copyto(cumulative_growth, 1.0, where=~amortizing)
+        np.cumprod(cumulative_growth, axis=-1, out=cumulative_growth)
+        balance = np.broadcast_to(amortizing * monthly_payment, accrual.shape).copy()
+        np.divide(balance, cumulative_growth, out=balance)
+        np.cumsum(balance, axis=-1, out=balance)
+        np.subtract(original_balance, balance, out=balance)
+        np.multiply(balance, cumulative_growth, out=balance)
+        del cumulative_growth
+
+        interest = np.empty_like(accrual)
+        np.multiply(original_balance, accrual[..., :1], out=interest[..., :1])
+        np.multiply(balance[..., :-1], accrual[..., 1:], out=interest[..., 1:])
+        np.copyto(interest, 0.0, where=~in_term)
+        del accrual
+
+        principal = monthly_payment - interest
+        np.copyto(principal, 0.0, where=~amortizing)
+        payment = interest.copy()
+        np.copyto(payment, np.broadcast_to(monthly_payment, payment.shape), where=amortizing)
+        np.copyto(balance, 0.0, where=~periods['outstanding'])
+        return interest, principal, payment, balance
+
+    @profiled('LoanBook.compute')
+    def compute(self, end_month: Optional[int] = None) -> LoanBookSchedule:
+        """
+        Compute interest, principal and balance for every loan and month in one vectorized pass.
+
+        With end_month, the calendar stops at that month number instead of the last maturity;
+        the months it keeps hold the same values as in the full calendar.
+        """
+        months = self.calendar(end_month)
+        periods = self.periods(months)
+
+        # Year fractions per day-count code and column, gathered into a (loans x months) matrix
+        accrual = self.year_fractions(months)
+        if self.floating.any():
+            rates = np.where(self.floating[:, None], self.period_sofr(months) + (self.spread / 100)[:, None], self.note_rate[:, None])
+            accrual *= rates
+            del rates
+        else:
+            accrual *= self.note_rate[:, None]
+
+        interest, principal, payment, balance = self.solve(accrual, periods)
+        return LoanBookSchedule(
+            loan_ids=self.loan_ids,
+            months=months,
+            origination_index=periods['origination_index'],
+            maturity_index=periods['maturity_index'],
+            interest=interest,
+            principal=principal,
+            payment=payment,
+            balance=balance
+        )
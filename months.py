@@ -0,0 +1,57 @@
+"""
+Month numbers, the model's internal representation of calendar months.
+
+A month number counts months since January 1970, the integer behind numpy's datetime64[M], and
+is stored as int32. Loan schedules, property cash flows and the portfolio aggregate are aligned
+by subtracting month numbers instead of looking dates up in object-dtype indexes; date objects
+are created only for the DataFrames handed to reports and the UI.
+"""
+from datetime import date
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from schedule import to_dates
+
+MONTH_DTYPE = np.int32
+
+
+def to_month(d: date) -> int:
+    """Month number of a date, matching np.datetime64(d, 'M').astype(int)."""
+    return (d.year - 1970) * 12 + d.month - 1
+
+
+def to_months(dates) -> np.ndarray:
+    """int32 month numbers of a sequence of dates."""
+    return np.fromiter((to_month(d) for d in dates), dtype=MONTH_DTYPE, count=len(dates))
+
+
+def month_dates(months) -> List[date]:
+    """First-of-month dates of the given month numbers."""
+    return to_dates(np.asarray(months, dtype=np.int64).astype('datetime64[M]'))
+
+
+def month_range(start_date: date, end_date: date) -> np.ndarray:
+    """Month numbers of pd.date_range(start_date, end_date, freq='MS'): the first of each month in the window."""
+    first = to_month(start_date) + (1 if start_date.day != 1 else 0)
+    return np.arange(first, max(to_month(end_date) + 1, first), dtype=MONTH_DTYPE)
+
+
+def is_date_index(index: pd.Index) -> bool:
+    """Whether every label of the index is a date, datetime or Timestamp, read from its dtype."""
+    if isinstance(index, pd.DatetimeIndex):
+        return True
+    return pd.api.types.infer_dtype(index, skipna=False) in ('date', 'datetime', 'empty')
+
+
+def month_index(index: pd.Index) -> Optional[np.ndarray]:
+    """
+    Month numbers of an index of first-of-month datetime.date labels, or None for any other index.
+
+    Datetimes and Timestamps never equal a date in a lookup, so an index of them is not a month
+    index here; callers fall back to label alignment for it and for dates past the first.
+    """
+    if index.dtype != object or pd.api.types.infer_dtype(index, skipna=False) not in ('date', 'empty'):
+        return None
+    if any(d.day != 1 for d in index):
+        return None
+    return to_months(index)
@@ -0,0 +1,157 @@
+"""
+Ownership share by month, held as one float64 array over consecutive month numbers.
+
+OwnershipSeries replaces the dict of first-of-month date -> share that Property used to keep,
+and still answers the dict's read API (get, [], in, len, keys, items), so code that treated the
+series as a mapping keeps working. Months without an entry hold NaN and read as the default, as
+a missing date key did. Step changes, such as buyouts and partial sell-downs, are applied to all
+months at once.
+"""
+from datetime import date
+from typing import Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from months import month_dates, to_month
+from versioning import digest
+
+# The share a month without an entry reads as
+DEFAULT_SHARE = 1.0
+
+
+class OwnershipSeries:
+    """Ownership shares for the months from start_month, NaN where a month has no entry."""
+
+    __slots__ = ('start_month', 'shares')
+
+    def __init__(self, start_month: int = 0, shares: Optional[np.ndarray] = None):
+        self.start_month = int(start_month)
+        self.shares = np.asarray(shares if shares is not None else [], dtype=np.float64)
+
+    @classmethod
+    def constant(cls, start_date: date, end_date: date, share: float) -> 'OwnershipSeries':
+        """share on every month from start_date to end_date; empty when end_date is before start_date."""
+        start = to_month(start_date)
+        return cls(start, np.full(max(to_month(end_date) - start + 1, 0), share, dtype=np.float64))
+
+    @classmethod
+    def from_items(cls, dates: Sequence[date], shares: Sequence[float]) -> 'OwnershipSeries':
+        """A series with the given entries; a month given twice keeps its last share."""
+        series = cls()
+        if len(dates):
+            months = np.array([to_month(d) for d in dates], dtype=np.int64)
+            series._cover(int(months.min()), int(months.max()))
+            series.shares[months - series.start_month] = np.asarray(shares, dtype=np.float64)
+        return series
+
+    def _offset(self, d: date) -> int:
+        return to_month(d) - self.start_month
+
+    def _cover(self, first: int, last: int):
+        """Grow the array with empty months so it spans the months first to last."""
+        if not len(self.shares):
+            self.start_month, self.shares = first, np.full(last - first + 1, np.nan)
+            return
+        start = min(first, self.start_month)
+        end = max(last, self.start_month + len(self.shares) - 1)
+        if start != self.start_month or end - start + 1 != len(self.shares):
+            shares = np.full(end - start + 1, np.nan)
+            shares[self.start_month - start:self.start_month - start + len(self.shares)] = self.shares
+            self.start_month, self.shares = start, shares
+
+    def _entries(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Month numbers and shares of the months with an entry."""
+        present = ~np.isnan(self.shares)
+        return np.flatnonzero(present) + self.start_month, self.shares[present]
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.shares)))
+
+    def __contains__(self, d: date) -> bool:
+        offset = self._offset(d)
+        return 0 <= offset < len(self.shares) and not np.isnan(self.shares[offset])
+
+    def __getitem__(self, d: date) -> float:
+        if d not in self:
+            raise KeyError(d)
+        return float(self.shares[self._offset(d)])
+
+    def __setitem__(self, d: date, share: float):
+        month = to_month(d)
+        self._cover(month, month)
+        self.shares[month - self.start_month] = share
+
+    def get(self, d: date, default: Optional[float] = None) -> Optional[float]:
+        return self[d] if d in self else default
+
+    def keys(self) -> List[date]:
+        return month_dates(self._entries()[0])
+
+    def values(self) -> List[float]:
+        return self._entries()[1].tolist()
+
+    def items(self) -> List[Tuple[date, float]]:
+        months, shares = self._entries()
+        return list(zip(month_dates(months), shares.tolist()))
+
+    def __iter__(self) -> Iterator[date]:
+        return iter(self.keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        if not isinstance(other, OwnershipSeries):
+            return NotImplemented
+        months, shares = self._entries()
+        other_months, other_shares = other._entries()
+        return np.array_equal(months, other_months) and np.array_equal(shares, other_shares)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"OwnershipSeries({dict(self.items())!r})"
+
+    def copy(self) -> 'OwnershipSeries':
+        return OwnershipSeries(self.start_month, self.shares.copy())
+
+    def digest(self) -> str:
+        """Digest of the entries, equal for series with equal entries however their arrays are padded."""
+        months, shares = self._entries()
+        return digest(months.tobytes(), shares.tobytes())
+
+    def values_for(self, months: np.ndarray, default: float = DEFAULT_SHARE) -> np.ndarray:
+        """The share of each month number, default for months without an entry."""
+        offsets = np.asarray(months, dtype=np.int64) - self.start_month
+        inside = (offsets >= 0) & (offsets < len(self.shares))
+        values = np.full(len(offsets), default, dtype=np.float64)
+        values[inside] = self.shares[offsets[inside]]
+        return np.where(np.isnan(values), default, values)
+
+    def apply_steps(self, dates: Sequence[date], shares: Sequence[float], end_date: Optional[date]) -> bool:
+        """
+        Change the share from each date onward, until the next later date, in one vectorized pass.
+
+        The result equals one update per step in date order: every entry on or after a step's date
+        takes that step's share, and the months from the first step, or the last entry when that
+        is later, through end_date gain entries.
+
+        Returns:
+        bool: Whether any entry changed.
+        """
+        if not len(dates):
+            return False
+        months = np.array([to_month(d) for d in dates], dtype=np.int64)
+        order = np.argsort(months, kind='stable')
+        months, step_shares = months[order], np.asarray(shares, dtype=np.float64)[order]
+        before = self.copy()
+
+        entry_months = self._entries()[0]
+        first = int(months[0])
+        extend_from = max(first, int(entry_months.max())) if len(entry_months) else first
+        extend_to = to_month(end_date) if end_date is not None else extend_from - 1
+        if extend_from <= extend_to:
+            self._cover(extend_from, extend_to)
+        if len(self.shares):
+            covered = np.arange(self.start_month, self.start_month + len(self.shares))
+            stepped = ~np.isnan(self.shares) | ((covered >= extend_from) & (covered <= extend_to))
+            stepped &= covered >= first
+            self.shares[stepped] = step_shares[np.searchsorted(months, covered[stepped], side='right') - 1]
+        return self != before
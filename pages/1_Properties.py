@@ -6,6 +6,9 @@ from config import adjusted_column_config
 from loan import Loan
 from property import Property
 import pandas as pd
+from streamlit_rates import use_session_state_rates
+
+use_session_state_rates()
 
 def _standardize_date(d: date) -> date:
     """Standardize a date to the first of its month."""
@@ -2,9 +2,13 @@ import streamlit as st
 import pandas as pd
 from loan import Loan
 from property import Property
-from upload import load_cashflows, load_properties_and_loans
+from upload import load_workbook
+from snapshot import load_snapshot, save_snapshot
 from portfolio import Portfolio
 from datetime import date, datetime
+from streamlit_rates import use_session_state_rates
+
+use_session_state_rates()
 
 st.title('Property and Loan Importer')
 
@@ -17,18 +21,26 @@ properties_and_loans_file = st.file_uploader('Upload Properties and Loans Excel
 
 if st.button("Upload Portfolio"):
     if properties_and_loans_file:
-        properties, loans = load_properties_and_loans(properties_and_loans_file)
-        df = load_cashflows(properties_and_loans_file)
-        
-        for property_obj in properties:
-            property_id = property_obj.property_id
-            # Filter NOI and CapEx data for the current property
-            fin_df = df[df['Property ID'] == property_id]
-            fin_df.set_index("Date",inplace=True)
-            fin_df = fin_df[['Net Operating Income','Capital Expenditures']]
-            # Convert to dictionary with date keys
-            property_obj.add_noi_capex(fin_df)
+        properties, loans = load_workbook(properties_and_loans_file)
         
         st.session_state.properties = properties
         portfolio = Portfolio(name='Dunphy', properties=properties, start_date=start_date, end_date=end_date)
         st.session_state.portfolio = portfolio
+
+# Snapshots reload a portfolio without parsing the workbook again
+st.subheader('Portfolio Snapshot')
+snapshot_dir = st.text_input('Snapshot Directory', value='snapshots/portfolio')
+col1, col2 = st.columns(2)
+with col1:
+    if st.button("Save Snapshot"):
+        if 'portfolio' in st.session_state:
+            save_snapshot(st.session_state.portfolio, snapshot_dir)
+            st.success(f"Snapshot saved to {snapshot_dir}")
+        else:
+            st.warning("Upload a portfolio before saving a snapshot.")
+with col2:
+    if st.button("Load Snapshot"):
+        portfolio = load_snapshot(snapshot_dir)
+        st.session_state.properties = portfolio.properties
+        st.session_state.portfolio = portfolio
+        st.success(f"Loaded {len(portfolio.properties)} properties from {snapshot_dir}")
@@ -4,6 +4,9 @@ import streamlit as st
 import pandas as pd
 import uuid
 from loan import Loan
+from streamlit_rates import use_session_state_rates
+
+use_session_state_rates()
 
 # Debug: Log start of script
 st.write("Starting unsecured loan script...")
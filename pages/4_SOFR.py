@@ -5,6 +5,8 @@ import pandas as pd
 # Initialize Chatham and get monthly rates
 chatham = Chatham()
 rates = chatham.get_monthly_rates()
+if chatham.error:
+    st.error(chatham.error)
 
 # Convert the rates dictionary to a DataFrame
 rates_df = pd.DataFrame(list(rates.items()), columns=['Date', 'Rate'])
@@ -1,26 +1,88 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from property import Property
 from loan import Loan
+from loanbook import LoanBook
+from months import is_date_index, month_dates, month_index, month_range
+from portfolio_result import PortfolioResult
+from profiling import count, profiled, run_in_context
 from datetime import date
-from typing import List
-import streamlit as st
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+from rates import StaticRateProvider, get_default_rate_provider, set_default_rate_provider
+from scenarios import CurveShock, StressResult, stress
+from versioning import digest, frame_digest
+
+EXECUTORS = ('serial', 'thread', 'process')
+
+# Analysis windows whose evaluation state is kept; the least recently used is dropped first
+WINDOW_CACHE_SIZE = 4
+
+COLUMNS_ORDER = [
+    'Capital Call', 'Redemption Payment', 'Adjusted Purchase Price', 'Adjusted Loan Proceeds', 'Adjusted Net Operating Income',
+    'Adjusted Capital Expenditures', 'Adjusted Interest Expense', 'Adjusted Principal Payments',
+    'Adjusted Debt Scheduled Repayment', 'Adjusted Debt Early Prepayment', 'Adjusted Sale Proceeds',
+    'Adjusted Partner Buyout', 'Total Cash Flow'
+]
+
+
+class _Contribution(NamedTuple):
+    """One property's windowed cash flows and the part of the aggregate array they fill."""
+    property: 'Property'
+    key: tuple
+    frame: pd.DataFrame
+    index: Tuple[np.ndarray, List[int]]
+    values: np.ndarray
+    off_grid: Optional[pd.DataFrame]
+    unlevered: bool
+
+
+class _WindowState:
+    """Cached evaluation of one analysis window: per-property contributions, their totals and the last result."""
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.contributions = {}
+        self.totals = None
+        self.order = None
+        self.result = None
+        self.result_inputs = None
+        self.result_capital_flows = None
+
+
+def _init_process_worker(sofr):
+    """Give a worker process the SOFR curve so floating loans do not refetch it."""
+    if sofr is not None:
+        set_default_rate_provider(StaticRateProvider(sofr))
+
+
+def _hold_period_cash_flows(property: 'Property', start_date: date, end_date: date) -> pd.DataFrame:
+    return property.hold_period_cash_flows(start_date=start_date, end_date=end_date)
+
 
 class Portfolio:
-    def __init__(self, name: str, start_date: date, end_date: date, properties: List['Property'] = None, unsecured_loans: List['Loan'] = None, beg_cash = 0):
+    def __init__(self, name: str, start_date: date, end_date: date, properties: List['Property'] = None, unsecured_loans: List['Loan'] = None, beg_cash = 0,
+                 executor: str = 'serial', max_workers: Optional[int] = None):
         self.name = name
         self.start_date = start_date
         self.end_date = end_date
         self.properties = properties or []
         self.unsecured_loans = unsecured_loans or []
         self.beg_cash = beg_cash or 0
+        self.executor = executor
+        self.max_workers = max_workers
         self.capital_flows = pd.DataFrame(columns=['Capital Call', 'Redemption Payment']).rename_axis('Date')
+        self._version = 0
+        self._windows = OrderedDict()
+        self._unsecured = None
 
     def _standardize_date(self, d: date) -> date:
         """Standardize a date to the first of its month."""
         return date(d.year, d.month, 1)
         
     def add_property(self, property: 'Property'):
-
         self.properties.append(property)
 
     def add_capital_flows(self, df: pd.DataFrame):
@@ -48,6 +110,20 @@ class Portfolio:
                 return loan
         raise ValueError(f"Unsecured loan with ID {loan_id} not found in the portfolio.")
 
+    def content_hash(self) -> str:
+        """
+        Digest of the portfolio's inputs: its window, opening cash, capital flows, and the content
+        hashes of its properties and unsecured loans in order. The SOFR curve is not included.
+        """
+        return digest(
+            self.start_date,
+            self.end_date,
+            self.beg_cash,
+            frame_digest(self.capital_flows),
+            tuple(p.content_hash() for p in self.properties),
+            tuple(loan.content_hash() for loan in self.unsecured_loans)
+        )
+
     def validate_date_index(self, df: pd.DataFrame) -> bool:
         """
         Validate that the DataFrame index is of type date.
@@ -56,73 +132,247 @@ class Portfolio:
         df (pd.DataFrame): The DataFrame to validate.
     
         Returns:
-        bool: True if the index is of type date, False otherwise.
+        bool: True if the index dtype holds only dates, datetimes or Timestamps, False otherwise.
         """
-        return all(isinstance(idx, date) for idx in df.index)
+        return is_date_index(df.index)
     
-    def aggregate_hold_period_cash_flows(self, start_date: date=None, end_date: date=None) -> pd.DataFrame:
+    def _floating_loans(self) -> List['Loan']:
+        """Every floating loan of the portfolio, secured then unsecured."""
+        secured = [loan for property in self.properties for loan in property.loans]
+        return [loan for loan in secured + self.unsecured_loans if loan.fixed_floating != 'Fixed']
+
+    def _floating_curves(self) -> tuple:
+        """The distinct SOFR curves of the floating loans, secured and unsecured, in order of first use."""
+        curves = {}
+        for loan in self._floating_loans():
+            curve = loan.sofr_curve()
+            curves.setdefault(id(curve), curve)
+        return tuple(curves.values())
+
+    def _default_curve(self):
+        """The default provider's curve when a floating property loan prices off it, or None."""
+        for property in self.properties:
+            for loan in property.loans:
+                if loan.fixed_floating != 'Fixed' and loan.rate_provider is None:
+                    return get_default_rate_provider().monthly_curve()
+        return None
+
+    def _map_cash_flows(self, properties: List['Property'], start_date: date, end_date: date, executor: Optional[str] = None, max_workers: Optional[int] = None) -> List[pd.DataFrame]:
+        """Evaluate hold_period_cash_flows for the given properties, in order, on the chosen executor."""
+        executor = executor or self.executor
+        max_workers = max_workers or self.max_workers
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r}; expected one of {', '.join(EXECUTORS)}.")
+
+        count = len(properties)
+        starts = [start_date] * count
+        ends = [end_date] * count
+        if executor == 'serial' or count < 2:
+            return [_hold_period_cash_flows(p, start_date, end_date) for p in properties]
+        if executor == 'thread':
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                return list(pool.map(run_in_context(_hold_period_cash_flows), properties, starts, ends))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_process_worker, initargs=(self._default_curve(),)) as pool:
+            chunksize = max(1, count // (4 * (max_workers or os.cpu_count() or 1)))
+            return list(pool.map(_hold_period_cash_flows, properties, starts, ends, chunksize=chunksize))
+
+    def property_cash_flows(self, start_date: date, end_date: date, executor: Optional[str] = None, max_workers: Optional[int] = None) -> List[pd.DataFrame]:
+        """
+        Evaluate hold_period_cash_flows for every property, in portfolio order.
+
+        Parameters:
+        start_date (date): Start of the analysis window.
+        end_date (date): End of the analysis window.
+        executor (str): 'serial', 'thread' or 'process'. Defaults to the portfolio's executor.
+        max_workers (int): Worker count for the thread or process pool. Defaults to the portfolio's setting.
+
+        Returns:
+        List[pd.DataFrame]: One frame per property, in the same order as self.properties.
+        """
+        return self._map_cash_flows(self.properties, start_date, end_date, executor, max_workers)
+
+    def invalidate(self):
+        """
+        Force the next evaluation to recompute every property.
+
+        Assigning a property or loan attribute is detected through its version stamp; call this
+        after edits the stamps cannot see, such as changing a noi_capex frame or an ownership
+        share series in place.
+        """
+        self._version += 1
+        self._windows.clear()
+        self._unsecured = None
+
+    @staticmethod
+    def _property_key(property: 'Property') -> tuple:
+        """The version stamps a property's contribution depends on: its own and each of its loans'."""
+        return (property.stamp, tuple((id(loan), loan.stamp) for loan in property.loans))
+
+    def _contribution(self, property: 'Property', property_cf: pd.DataFrame, grid: np.ndarray, start_date: date, end_date: date, today: date) -> _Contribution:
+        columns = [COLUMNS_ORDER.index(col) for col in property_cf.columns if col in COLUMNS_ORDER]
+        values = property_cf.to_numpy(dtype=np.float64)[:, property_cf.columns.get_indexer([COLUMNS_ORDER[i] for i in columns])]
+
+        # Rows dated the first of a month are placed by month number: inside the window exactly when on the grid
+        months = month_index(property_cf.index)
+        if months is not None:
+            rows = (months - grid[0]) if len(grid) else np.full(len(months), -1)
+            on_grid = (rows >= 0) & (rows < len(grid))
+            off_grid = None
+            if not on_grid.all():
+                property_cf = property_cf[on_grid]
+        else:
+            # Ensure the DataFrame is within the specified date range
+            in_window = (property_cf.index >= start_date) & (property_cf.index <= end_date)
+            property_cf = property_cf[in_window]
+            values = values[in_window]
+            rows = pd.Index(month_dates(grid)).get_indexer(property_cf.index)
+            on_grid = rows >= 0
+            off_grid = None if on_grid.all() else property_cf[~on_grid]
+        return _Contribution(
+            property=property,
+            key=self._property_key(property),
+            frame=property_cf,
+            index=(rows[on_grid][:, None], columns),
+            values=values[on_grid],
+            off_grid=off_grid,
+            unlevered=not any(loan.get_current_balance(today) > 0 for loan in property.loans)
+        )
+
+    @profiled('Portfolio.evaluate')
+    def evaluate(self, start_date: date = None, end_date: date = None, executor: Optional[str] = None, max_workers: Optional[int] = None) -> PortfolioResult:
+        """
+        Evaluate the portfolio for the analysis window, recomputing only what changed since the last call.
+
+        Each property's contribution to the aggregate is cached with the version stamps of the
+        property and its loans. A later call recomputes only properties whose stamps moved, and
+        swaps their old contribution out of the running totals for the new one; the unsecured
+        loan schedules are likewise reused until one of those loans or its curve changes. The
+        state is kept separately for the last WINDOW_CACHE_SIZE windows, so alternating between
+        windows reuses each. Changing the SOFR curve of any floating loan, secured or unsecured,
+        or the day, or calling invalidate(), recomputes everything. Totals updated by differences
+        can differ from a full recompute in the last bits of precision.
+        """
         if not start_date:
             start_date = self.start_date
         if not end_date:
             end_date = self.end_date
-        date_range = pd.date_range(start_date, end_date, freq='MS').to_pydatetime()
-        # Initialize an empty DataFrame with date range index
-        columns_order = [
-            'Capital Call', 'Redemption Payment', 'Adjusted Purchase Price', 'Adjusted Loan Proceeds', 'Adjusted Net Operating Income',
-            'Adjusted Capital Expenditures', 'Adjusted Interest Expense', 'Adjusted Principal Payments',
-            'Adjusted Debt Scheduled Repayment', 'Adjusted Debt Early Prepayment', 'Adjusted Sale Proceeds',
-            'Adjusted Partner Buyout', 'Total Cash Flow'
-        ]
-        aggregate_cf = pd.DataFrame(0, index=date_range, columns=columns_order)
-        aggregate_cf.index = aggregate_cf.index.map(lambda x: x.date())  # Ensure index is in date format
-    
-        # Aggregate property cash flows
+        today = date.today()
+
+        key = (today, self._version, self._floating_curves())
+        state = self._windows.get((start_date, end_date))
+        if state is None or state.key != key:
+            state = _WindowState(key)
+            self._windows[(start_date, end_date)] = state
+        self._windows.move_to_end((start_date, end_date))
+        while len(self._windows) > WINDOW_CACHE_SIZE:
+            self._windows.popitem(last=False)
+
+        grid = month_range(start_date, end_date)
+
+        # Recompute the properties that are new or whose stamps moved, once each however often they appear
+        contributions = state.contributions
+        stale = {}
         for property in self.properties:
-            property_cf = property.hold_period_cash_flows(start_date=start_date, end_date=end_date)
-            # Ensure the DataFrame is within the specified date range
-            property_cf = property_cf.loc[(property_cf.index >= start_date) & (property_cf.index <= end_date)]
-            aggregate_cf = aggregate_cf.add(property_cf, fill_value=0)
+            cached = contributions.get(id(property))
+            if cached is None or cached.key != self._property_key(property):
+                stale[id(property)] = property
+        previous = {key: contributions.get(key) for key in stale}
+        count('Properties recomputed', len(stale))
+        count('Properties reused', len(self.properties) - len(stale))
+        frames = self._map_cash_flows(list(stale.values()), start_date, end_date, executor, max_workers)
+        for property, property_cf in zip(stale.values(), frames):
+            contributions[id(property)] = self._contribution(property, property_cf, grid, start_date, end_date, today)
+
+        order = [id(p) for p in self.properties]
+        for key in set(contributions) - set(order):
+            del contributions[key]
+
+        # Aggregate property cash flows into a preallocated array. A full build sums in portfolio
+        # order so every executor produces identical results; after an edit only the difference
+        # made by each changed property is applied
+        if state.totals is None or order != state.order or any(c is None for c in previous.values()):
+            totals = np.zeros((len(grid), len(COLUMNS_ORDER)))
+            for key in order:
+                np.add.at(totals, contributions[key].index, contributions[key].values)
+        else:
+            totals = state.totals.copy()
+            for key in order:
+                if key in previous:
+                    np.subtract.at(totals, previous[key].index, previous[key].values)
+                    np.add.at(totals, contributions[key].index, contributions[key].values)
+        state.totals = totals
+        state.order = order
+
+        # Unsecured loan schedules, computed in one batch and kept until one of the loans changes
+        unsecured_key = (
+            tuple((id(loan), loan.stamp) for loan in self.unsecured_loans),
+            tuple(loan.sofr_curve() for loan in self.unsecured_loans if loan.fixed_floating != 'Fixed')
+        )
+        if self._unsecured is None or self._unsecured[0] != unsecured_key:
+            schedule = LoanBook.from_loans(self.unsecured_loans).compute() if self.unsecured_loans else None
+            self._unsecured = (unsecured_key, schedule)
+        unsecured_schedule = self._unsecured[1]
+
+        inputs = ([contributions[key].key for key in order], unsecured_key)
+        if state.result is not None and state.result_inputs == inputs and state.result_capital_flows is self.capital_flows:
+            return state.result
+
+        aggregate_cf = pd.DataFrame(totals, index=pd.Index(month_dates(grid)), columns=COLUMNS_ORDER)
+        for key in order:
+            if contributions[key].off_grid is not None:
+                aggregate_cf = aggregate_cf.add(contributions[key].off_grid, fill_value=0)
 
         aggregate_cf = aggregate_cf.add(self.capital_flows, fill_value=0)
     
         # Aggregate loan cash flows
-        if self.unsecured_loans:
-            for loan in self.unsecured_loans:
-                loan_schedule = loan.get_unsecured_schedule()
-                loan_cf = pd.DataFrame(loan_schedule)
-                loan_cf['date'] = pd.to_datetime(loan_cf['date'], errors='coerce').dt.date
-                loan_cf.set_index('date', inplace=True)
-    
-                # Ensure columns match the order
-                for column in columns_order:
-                    if column not in loan_cf.columns:
-                        loan_cf[column] = 0
-    
-                loan_cf = loan_cf[columns_order]
-                aggregate_cf = aggregate_cf.add(loan_cf, fill_value=0)
+        if unsecured_schedule is not None:
+            loan_totals = unsecured_schedule.totals()
+            loan_cf = pd.DataFrame(0.0, index=loan_totals.index, columns=COLUMNS_ORDER)
+            loan_cf['Adjusted Loan Proceeds'] = loan_totals['Loan Proceeds']
+            loan_cf['Adjusted Interest Expense'] = -loan_totals['Interest Expense']
+            loan_cf['Adjusted Principal Payments'] = -loan_totals['Principal Payments']
+            loan_cf['Adjusted Debt Scheduled Repayment'] = -loan_totals['Debt Scheduled Repayment']
+            aggregate_cf = aggregate_cf.add(loan_cf, fill_value=0)
     
         # Reorder the columns
-        aggregate_cf = aggregate_cf[columns_order]
+        aggregate_cf = aggregate_cf[COLUMNS_ORDER]
         aggregate_cf.drop(columns=['Total Cash Flow'],inplace=True)
-    
-        # Ensure the dates are consistent
-        #aggregate_cf = aggregate_cf.loc[start_date:end_date]
-    
-        return aggregate_cf
 
-    def calculate_monthly_cash(self) -> pd.DataFrame:
-        aggregate_cf = self.aggregate_hold_period_cash_flows()
-        monthly_cash = pd.DataFrame(index=aggregate_cf.index, columns=['Beginning Cash', 'Monthly Cash Flow', 'Ending Cash'])
-        
-        monthly_cash['Monthly Cash Flow'] = aggregate_cf.sum(axis=1)
-        monthly_cash['Beginning Cash'].iloc[0] = self.beg_cash
-        monthly_cash['Ending Cash'].iloc[0] = self.beg_cash + monthly_cash['Monthly Cash Flow'].iloc[0]
-        
-        for i in range(1, len(monthly_cash)):
-            monthly_cash['Beginning Cash'].iloc[i] = monthly_cash['Ending Cash'].iloc[i-1]
-            monthly_cash['Ending Cash'].iloc[i] = monthly_cash['Beginning Cash'].iloc[i] + monthly_cash['Monthly Cash Flow'].iloc[i]
-        
-        return monthly_cash
+        state.result = PortfolioResult(
+            start_date=start_date,
+            end_date=end_date,
+            aggregate=aggregate_cf,
+            property_cash_flows={contributions[key].property.property_id: contributions[key].frame for key in order},
+            # Properties without an outstanding loan balance today, for the unsecured DSCR
+            unlevered_property_ids=[contributions[key].property.property_id for key in order if contributions[key].unlevered],
+            unsecured_schedule=unsecured_schedule
+        )
+        state.result_inputs = inputs
+        state.result_capital_flows = self.capital_flows
+        return state.result
+
+    def stress(self, shocks: Sequence[Union['CurveShock', float]], start_date: date = None, end_date: date = None,
+               shock_date: Optional[date] = None, floor: Optional[float] = None) -> 'StressResult':
+        """
+        Evaluate the portfolio under shocks to the SOFR curve, recomputing only floating-rate loans.
+
+        Parameters:
+        shocks (Sequence[CurveShock or float]): Parallel, key-rate or custom monthly shocks; a number is a parallel shift (0.01 is +100bp).
+        start_date (date): Analysis start, the portfolio's by default.
+        end_date (date): Analysis end, the portfolio's by default.
+        shock_date (date): First month the shocks move, the analysis start by default.
+        floor (float): Lowest shocked rate, or None for no floor.
+
+        Returns:
+        StressResult: Monthly cash flow, NOI and debt service per shock, with a summary() table.
+        """
+        return stress(self, shocks, start_date, end_date, shock_date=shock_date, floor=floor)
+
+    def aggregate_hold_period_cash_flows(self, start_date: date=None, end_date: date=None, executor: Optional[str] = None, max_workers: Optional[int] = None) -> pd.DataFrame:
+        return self.evaluate(start_date, end_date, executor, max_workers).aggregate.copy()
+
+    def calculate_monthly_cash(self, minimum_cash: Optional[float] = None) -> pd.DataFrame:
+        return self.evaluate().monthly_cash(self.beg_cash, minimum_cash)
 
     def calculate_monthly_dscr(self) -> pd.DataFrame:
         """
@@ -133,28 +383,7 @@ class Portfolio:
         Returns:
         pd.DataFrame: A DataFrame with the DSCR calculated for each month.
         """
-        # Aggregate the cash flows over the hold period
-        aggregate_cf = self.aggregate_hold_period_cash_flows()
-
-        # Extract the necessary columns for DSCR calculation
-        noi = aggregate_cf['Adjusted Net Operating Income']
-        interest_expense = -aggregate_cf['Adjusted Interest Expense']
-        principal_payments = -aggregate_cf['Adjusted Principal Payments']
-        
-        # Calculate the Debt Service Coverage Ratio
-        debt_service = interest_expense + principal_payments
-        dscr = noi / debt_service
-        
-        # Create a DataFrame to hold the results
-        dscr_df = pd.DataFrame({
-            'Net Operating Income': noi,
-            'Interest Expense': interest_expense,
-            'Principal Payments': principal_payments,
-            'Debt Service': debt_service,
-            'DSCR': dscr
-        })
-        
-        return dscr_df
+        return self.evaluate().monthly_dscr()
 
     def calculate_monthly_dscr_unsecured(self) -> pd.DataFrame:
         """
@@ -166,47 +395,4 @@ class Portfolio:
         Returns:
         pd.DataFrame: A DataFrame with the DSCR calculated for each month.
         """
-        # Aggregate the cash flows over the hold period
-        aggregate_cf = self.aggregate_hold_period_cash_flows()
-
-        # Extract the necessary columns for DSCR calculation
-        noi = aggregate_cf['Adjusted Net Operating Income']
-        
-        # Initialize NOI for properties without loans
-        noi_no_loans = pd.Series(0, index=aggregate_cf.index)
-
-        # Check if properties have any loan balances
-        for property in self.properties:
-            has_loans = False
-            for loan in property.loans:
-                if loan.get_current_balance(date.today()) > 0:  # Check if the loan balance is greater than 0
-                    has_loans = True
-                    break
-            if not has_loans:
-                noi_no_loans += property.hold_period_cash_flows()['Adjusted Net Operating Income']
-
-        # Extract unsecured loans' interest expense and principal payments
-        interest_expense_unsecured = pd.Series(0, index=aggregate_cf.index)
-        principal_payments_unsecured = pd.Series(0, index=aggregate_cf.index)
-        for loan in self.unsecured_loans:
-            loan_schedule = loan.get_unsecured_schedule()
-            loan_cf = pd.DataFrame(loan_schedule)
-            loan_cf['date'] = pd.to_datetime(loan_cf['date'], errors='coerce').dt.date
-            loan_cf.set_index('date', inplace=True)
-            interest_expense_unsecured += loan_cf['Adjusted Interest Expense']
-            principal_payments_unsecured += loan_cf['Adjusted Principal Payments']
-        
-        # Calculate the Debt Service Coverage Ratio for unsecured loans
-        debt_service_unsecured = interest_expense_unsecured + principal_payments_unsecured
-        dscr_unsecured = noi_no_loans / debt_service_unsecured
-        
-        # Create a DataFrame to hold the results
-        dscr_df_unsecured = pd.DataFrame({
-            'NOI (No Loans)': noi_no_loans,
-            'Interest Expense (Unsecured)': -interest_expense_unsecured,
-            'Principal Payments (Unsecured)': -principal_payments_unsecured,
-            'Debt Service (Unsecured)': -debt_service_unsecured,
-            'DSCR (Unsecured)': -dscr_unsecured
-        })
-        
-        return dscr_df_unsecured
+        return self.evaluate().monthly_dscr_unsecured()
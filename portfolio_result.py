@@ -0,0 +1,171 @@
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from loanbook import LoanBookSchedule
+from months import month_index
+from profiling import profiled
+
+
+def cash_balances(monthly_cash_flow: np.ndarray, beg_cash, minimum_cash: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    Beginning and ending cash for every month with a cumulative sum along the last axis.
+
+    monthly_cash_flow may be one series of months or a (scenarios x months) array, with beg_cash a
+    scalar or one value per scenario. Each ending balance equals the month-by-month recurrence
+    ending = beginning + cash flow exactly, since the opening balance is summed first.
+
+    Returns:
+    Dict[str, np.ndarray]: 'Beginning Cash' and 'Ending Cash', plus 'Liquidity Shortfall' and
+    'Capital Call Required' when minimum_cash is given.
+    """
+    flows = np.asarray(monthly_cash_flow, dtype=np.float64)
+    opening = np.broadcast_to(np.asarray(beg_cash, dtype=np.float64)[..., None], flows.shape[:-1] + (1,))
+    running = np.cumsum(np.concatenate((opening, flows), axis=-1), axis=-1)
+
+    balances = {
+        'Beginning Cash': running[..., :-1],
+        'Ending Cash': running[..., 1:]
+    }
+    if minimum_cash is not None:
+        shortfall = np.maximum(minimum_cash - balances['Ending Cash'], 0.0)
+        balances['Liquidity Shortfall'] = shortfall
+        balances['Capital Call Required'] = shortfall > 0
+    return balances
+
+
+class PortfolioResult:
+    """
+    One evaluation of a portfolio over an analysis window.
+
+    Holds the aggregated cash flows together with the per-property frames and the unsecured
+    loan schedules they were built from, so every report can be derived without re-evaluating
+    the portfolio.
+    """
+
+    def __init__(
+        self,
+        start_date: date,
+        end_date: date,
+        aggregate: pd.DataFrame,
+        property_cash_flows: Dict[str, pd.DataFrame],
+        unlevered_property_ids: List[str],
+        unsecured_schedule: Optional[LoanBookSchedule] = None
+    ):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.aggregate = aggregate
+        self.property_cash_flows = property_cash_flows
+        self.unlevered_property_ids = unlevered_property_ids
+        self.unsecured_schedule = unsecured_schedule
+
+    @profiled('PortfolioResult.monthly_cash')
+    def monthly_cash(self, beg_cash: float = 0, minimum_cash: Optional[float] = None) -> pd.DataFrame:
+        """
+        Running cash balance by month.
+
+        Parameters:
+        beg_cash (float): Cash on hand before the first month.
+        minimum_cash (float): Optional minimum balance. When given, adds a 'Liquidity Shortfall'
+            column and a 'Capital Call Required' flag for months that end below it.
+
+        Returns:
+        pd.DataFrame: Beginning Cash, Monthly Cash Flow and Ending Cash for each month.
+        """
+        monthly_cash_flow = self.aggregate.sum(axis=1)
+        balances = cash_balances(monthly_cash_flow.to_numpy(dtype=np.float64), beg_cash, minimum_cash)
+
+        monthly_cash = pd.DataFrame({
+            'Beginning Cash': balances['Beginning Cash'],
+            'Monthly Cash Flow': monthly_cash_flow.to_numpy(dtype=np.float64),
+            'Ending Cash': balances['Ending Cash']
+        }, index=self.aggregate.index)
+        if minimum_cash is not None:
+            monthly_cash['Liquidity Shortfall'] = balances['Liquidity Shortfall']
+            monthly_cash['Capital Call Required'] = balances['Capital Call Required']
+
+        return monthly_cash
+
+    @profiled('PortfolioResult.monthly_dscr')
+    def monthly_dscr(self) -> pd.DataFrame:
+        """
+        Calculate the Debt Service Coverage Ratio (DSCR) by month.
+
+        DSCR = Net Operating Income / (Interest Expense + Principal Payments)
+
+        Returns:
+        pd.DataFrame: A DataFrame with the DSCR calculated for each month.
+        """
+        aggregate_cf = self.aggregate
+
+        # Extract the necessary columns for DSCR calculation
+        noi = aggregate_cf['Adjusted Net Operating Income']
+        interest_expense = -aggregate_cf['Adjusted Interest Expense']
+        principal_payments = -aggregate_cf['Adjusted Principal Payments']
+
+        # Calculate the Debt Service Coverage Ratio
+        debt_service = interest_expense + principal_payments
+        dscr = noi / debt_service
+
+        # Create a DataFrame to hold the results
+        dscr_df = pd.DataFrame({
+            'Net Operating Income': noi,
+            'Interest Expense': interest_expense,
+            'Principal Payments': principal_payments,
+            'Debt Service': debt_service,
+            'DSCR': dscr
+        })
+
+        return dscr_df
+
+    @profiled('PortfolioResult.monthly_dscr_unsecured')
+    def monthly_dscr_unsecured(self) -> pd.DataFrame:
+        """
+        Calculate the Debt Service Coverage Ratio (DSCR) by month for assets without loans,
+        divided by the debt service of unsecured loans.
+
+        DSCR = NOI of assets without loans / (Interest Expense of unsecured loans + Principal Payments of unsecured loans)
+
+        Returns:
+        pd.DataFrame: A DataFrame with the DSCR calculated for each month.
+        """
+        index = self.aggregate.index
+
+        # NOI for properties without loan balances, taken from the per-property frames and summed by month number
+        noi_no_loans = np.zeros(len(index))
+        index_months = month_index(index)
+        if index_months is not None and (np.diff(index_months) <= 0).any():
+            index_months = None
+        for property_id in self.unlevered_property_ids:
+            property_noi = self.property_cash_flows[property_id]['Adjusted Net Operating Income']
+            property_months = month_index(property_noi.index) if index_months is not None else None
+            if property_months is not None:
+                rows = np.minimum(np.searchsorted(index_months, property_months), max(len(index_months) - 1, 0))
+                found = (index_months[rows] == property_months) if len(index_months) else np.zeros(len(rows), dtype=bool)
+                np.add.at(noi_no_loans, rows[found], property_noi.to_numpy(dtype=np.float64)[found])
+            else:
+                noi_no_loans += property_noi.groupby(level=0).sum().reindex(index, fill_value=0).to_numpy(dtype=np.float64)
+        noi_no_loans = pd.Series(noi_no_loans, index=index)
+
+        # Extract unsecured loans' interest expense and principal payments
+        interest_expense_unsecured = pd.Series(0.0, index=index)
+        principal_payments_unsecured = pd.Series(0.0, index=index)
+        if self.unsecured_schedule is not None:
+            dates = self.unsecured_schedule.dates
+            interest_expense_unsecured -= pd.Series(self.unsecured_schedule.interest.sum(axis=0), index=dates).reindex(index, fill_value=0)
+            principal_payments_unsecured -= pd.Series(self.unsecured_schedule.principal.sum(axis=0), index=dates).reindex(index, fill_value=0)
+
+        # Calculate the Debt Service Coverage Ratio for unsecured loans
+        debt_service_unsecured = interest_expense_unsecured + principal_payments_unsecured
+        dscr_unsecured = noi_no_loans / debt_service_unsecured
+
+        # Create a DataFrame to hold the results
+        dscr_df_unsecured = pd.DataFrame({
+            'NOI (No Loans)': noi_no_loans,
+            'Interest Expense (Unsecured)': -interest_expense_unsecured,
+            'Principal Payments (Unsecured)': -principal_payments_unsecured,
+            'Debt Service (Unsecured)': -debt_service_unsecured,
+            'DSCR (Unsecured)': -dscr_unsecured
+        })
+
+        return dscr_df_unsecured
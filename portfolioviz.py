@@ -1,6 +1,7 @@
 import pandas as pd
 import streamlit as st
 from portfolio import Portfolio
+from report_cache import loan_balance_over_time
 
 class Portfolioviz:
     def __init__(self, portfolio: Portfolio):
@@ -20,27 +21,15 @@ class Portfolioviz:
 
     def plot_loan_balance_over_time(self):
         """Plots the loan balances over time."""
-        data = []
-        for loan in self.portfolio.unsecured_loans:
-            schedule = loan.get_unsecured_schedule()
-            balance = 0
-            for entry in schedule:
-                date = entry['date']
-                balance = balance + entry['Adjusted Loan Proceeds'] + entry['Adjusted Principal Payments']
-                data.append({'date': date, 'balance': balance, 'loan_id': loan.loan_id})
-
-        if not data:
+        df = loan_balance_over_time(self.portfolio.unsecured_loans)
+
+        if df.empty:
             st.error("No data available to plot.")
             return
 
-        df = pd.DataFrame(data)
         st.write("DataFrame created from schedule data:")
         st.write(df)
 
-        if 'date' not in df.columns:
-            st.error("Date column is missing in the DataFrame.")
-            return
-
         df['date'] = pd.to_datetime(df['date'])
         df = df.groupby('date')['balance'].sum().reset_index()
 
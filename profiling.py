@@ -0,0 +1,170 @@
+"""
+Opt-in timers and counters around the model's hot paths.
+
+Functions decorated with @profiled, and blocks wrapped in timer(), add their wall time to the
+active Profile; count() bumps a named counter. Nothing is recorded until a profile is started,
+and while none is active each call costs one context-variable lookup:
+
+    with profile('fund.xlsx') as run:
+        portfolio.evaluate()
+    print(run.summary())
+    run.dump('profile.json')
+
+The active profile is held in a context variable, so it belongs to the thread (or task) that
+started it: concurrent Streamlit sessions, each served by its own thread, record only their own
+reruns. Work handed to a thread pool through run_in_context() records into the submitting
+thread's profile; process-pool workers have their own and record nothing unless they start one.
+Nested timers each record their own time, so a caller's total includes its callees'.
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional
+import pandas as pd
+
+
+class Profile:
+    """Call count, total and maximum seconds per timer, and a value per counter, for one run."""
+
+    def __init__(self, name: str = 'run'):
+        self.name = name
+        self.started = datetime.now()
+        self.elapsed: Optional[float] = None
+        self.timers: Dict[str, list] = {}
+        self.counters: Dict[str, int] = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            entry = self.timers.get(name)
+            if entry is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def add_count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self):
+        """Fix the run's wall time; later timers are still recorded."""
+        self.elapsed = time.perf_counter() - self._start
+
+    def summary(self) -> pd.DataFrame:
+        """One row per timer, slowest total first, with its share of the run's wall time."""
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self._start
+        rows = {
+            name: {'calls': calls, 'total_s': total, 'mean_ms': total / calls * 1000, 'max_ms': longest * 1000,
+                   'share': total / elapsed if elapsed else 0.0}
+            for name, (calls, total, longest) in self.timers.items()
+        }
+        summary = pd.DataFrame.from_dict(rows, orient='index', columns=['calls', 'total_s', 'mean_ms', 'max_ms', 'share'])
+        summary.index.name = 'timer'
+        return summary.sort_values('total_s', ascending=False)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'started': self.started.isoformat(timespec='seconds'),
+            'elapsed_s': self.elapsed,
+            'timers': {name: {'calls': calls, 'total_s': total, 'max_s': longest} for name, (calls, total, longest) in self.timers.items()},
+            'counters': dict(self.counters)
+        }
+
+    def dump(self, path: str):
+        """Write the profile as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+_active: contextvars.ContextVar = contextvars.ContextVar('profile', default=None)
+
+
+def get_profile() -> Optional[Profile]:
+    """The profile recording in this context, or None when profiling is off."""
+    return _active.get()
+
+
+def start_profile(name: str = 'run') -> Profile:
+    """Start recording this context into a new profile, replacing any active one."""
+    current = Profile(name)
+    _active.set(current)
+    return current
+
+
+def stop_profile() -> Optional[Profile]:
+    """Stop recording this context and return the profile that was active."""
+    stopped = _active.get()
+    _active.set(None)
+    if stopped is not None:
+        stopped.stop()
+    return stopped
+
+
+@contextmanager
+def profile(name: str = 'run') -> Iterator[Profile]:
+    """Record the block into a new profile, restoring the previously active one afterwards, even if the block raises."""
+    current = Profile(name)
+    token = _active.set(current)
+    try:
+        yield current
+    finally:
+        current.stop()
+        _active.reset(token)
+
+
+def run_in_context(func: Callable) -> Callable:
+    """
+    func bound to a copy of the caller's context, so calls made on pool threads record into the
+    caller's profile. Each call runs in its own copy, so the wrapper may run on many threads at once.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """Add the block's wall time to the active profile under name."""
+    active = _active.get()
+    if active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active.add_time(name, time.perf_counter() - start)
+
+
+def count(name: str, n: int = 1):
+    """Add n to a counter of the active profile."""
+    active = _active.get()
+    if active is not None:
+        active.add_count(name, n)
+
+
+def profiled(name: str) -> Callable:
+    """Decorate a function so each call's wall time is added to the active profile under name."""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            active = _active.get()
+            if active is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                active.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -4,9 +4,40 @@ from typing import Optional, Dict, List
 import pandas as pd
 import uuid
 from loan import Loan
-import streamlit as st
+from loanbook import LoanBook
+from cashflow_builder import CashFlowBuilder
+from months import month_index
+from ownership import OwnershipSeries
+from profiling import profiled
+from versioning import digest, frame_digest, next_stamp
+import numpy as np
+
+CASH_FLOW_COLUMNS = [
+    'Ownership Share',
+    'Purchase Price',
+    'Loan Proceeds',
+    'Net Operating Income',
+    'Capital Expenditures',
+    'Interest Expense',
+    'Principal Payments',
+    'Debt Scheduled Repayment',
+    'Debt Early Prepayment',
+    'Sale Proceeds',
+    'Partner Buyout'
+]
+
+# Columns hold_period_cash_flows reports as negative cash flows
+OUTFLOW_COLUMNS = ['Capital Expenditures', 'Purchase Price', 'Interest Expense', 'Principal Payments', 'Partner Buyout', 'Debt Scheduled Repayment', 'Debt Early Prepayment']
 
 class Property:
+    # Slots rather than an instance dict keep large books small; noi and capex are set by the Streamlit helpers
+    __slots__ = (
+        'property_id', 'name', 'address', 'property_type', 'square_footage', 'year_built', 'purchase_price',
+        'purchase_date', 'analysis_start_date', 'analysis_end_date', 'sale_date', 'sale_price', 'current_value',
+        'loans', 'ownership_share', '_ownership_share_series', 'buyout_date', 'buyout_amount', 'noi_capex',
+        'noi', 'capex', '_stamp', '_content_hash'
+    )
+
     def __init__(
         self,
         property_id: str,
@@ -48,6 +79,45 @@ class Property:
         self.buyout_amount = buyout_amount
         self.noi_capex = noi_capex
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self.touch()
+
+    def touch(self):
+        """Take a new version stamp; called on attribute assignment and by methods that edit in place."""
+        object.__setattr__(self, '_stamp', next_stamp())
+
+    @property
+    def stamp(self) -> int:
+        """Version stamp of the property's own inputs. Its loans carry their own stamps."""
+        return self._stamp
+
+    def content_hash(self) -> str:
+        """
+        Digest of everything the property's cash flows are computed from, including its loans.
+
+        The digest is memoized against the version stamps of the property and its loans, so like
+        Portfolio.evaluate it does not see in-place edits of noi_capex or the ownership series.
+        """
+        key = (self.stamp, tuple(loan.stamp for loan in self.loans))
+        memo = getattr(self, '_content_hash', None)
+        if memo is None or memo[0] != key:
+            fields = (
+                self.property_id, self.name, self.address, self.property_type, self.square_footage,
+                self.year_built, self.purchase_price, self.purchase_date, self.analysis_start_date,
+                self.analysis_end_date, self.current_value, self.sale_date, self.sale_price,
+                self.ownership_share, self.buyout_date, self.buyout_amount
+            )
+            memo = (key, digest(
+                fields,
+                self.ownership_share_series.digest(),
+                frame_digest(self.noi_capex),
+                tuple(loan.content_hash() for loan in self.loans)
+            ))
+            self._content_hash = memo
+        return memo[1]
+
     def to_dict(self):
         return {
             'property_id': self.property_id,
@@ -96,16 +166,26 @@ class Property:
         return {self._standardize_date(d): v for d, v in cash_flows.items()}
 
     def _initialize_ownership_share(self):
-        ownership_dict = {}
-        current_date = self.analysis_start_date
-        end_date = self.analysis_end_date
-        while current_date <= end_date:
-            ownership_dict[current_date] = self.ownership_share
-            current_date += relativedelta(months=1)
-        self.ownership_share_series = ownership_dict
+        self.ownership_share_series = self.default_ownership_share_series()
+
+    @property
+    def ownership_share_series(self) -> OwnershipSeries:
+        """Ownership share by month. Assigning a dict of date -> share converts it to an OwnershipSeries."""
+        return self._ownership_share_series
+
+    @ownership_share_series.setter
+    def ownership_share_series(self, series):
+        if not isinstance(series, OwnershipSeries):
+            series = OwnershipSeries.from_items(list(series.keys()), list(series.values()))
+        self._ownership_share_series = series
+
+    def default_ownership_share_series(self) -> OwnershipSeries:
+        """ownership_share on every month of the analysis period, the series a new property starts with."""
+        return OwnershipSeries.constant(self.analysis_start_date, self.analysis_end_date, self.ownership_share)
 
     def add_loan(self, loan: 'Loan'):
         self.loans.append(loan)
+        self.touch()
 
     def remove_loan(self, loan_id: str):
         self.loans = [loan for loan in self.loans if loan.loan_id != loan_id]
@@ -137,6 +217,7 @@ class Property:
         _date = self._standardize_date(_date)
         self.noi[_date] = noi
         self.capex[_date] = capex
+        self.touch()
 
     def streamlit_add_noi(self, noi: str):
         noi_length = len(noi.split())
@@ -155,89 +236,66 @@ class Property:
         new_capex = dict(zip(dates, capex))
         self.capex = new_capex
 
+    @profiled('Property.get_cash_flows_dataframe')
     def get_cash_flows_dataframe(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> pd.DataFrame:
         if start_date is None:
             start_date = self.analysis_start_date
         if end_date is None:
             end_date = self.analysis_end_date
-    
-        # Generate a date range for the entire analysis period
+        return self._cash_flow_builder(start_date, end_date).build(CASH_FLOW_COLUMNS + ["Adjusted " + col for col in CASH_FLOW_COLUMNS[1:]])
+
+    def _cash_flow_builder(self, start_date: date, end_date: date) -> CashFlowBuilder:
+        """The raw and ownership-adjusted cash-flow columns for the window, before any DataFrame is built."""
+        # Monthly rows for the entire analysis period, held as float64 columns until the end
         end_date = min(end_date, self.sale_date)
         start_date = max(start_date, self.purchase_date)
-        dates = pd.date_range(start=start_date, end=end_date, freq='MS')
-        dates = [date(d.year, d.month, d.day) for d in dates]
-    
-        # Create a DataFrame with these dates as the index
-        cash_flows_df = pd.DataFrame(index=dates, columns=[
-            'Ownership Share',
-            'Purchase Price',
-            'Net Operating Income',
-            'Capital Expenditures',
-            'Interest Expense',
-            'Principal Payments',
-            'Loan Proceeds',
-            'Sale Proceeds',
-            'Partner Buyout',
-            'Debt Scheduled Repayment',
-            'Debt Early Prepayment',
-        ])
-        cash_flows_df = cash_flows_df.fillna(0)  # Initialize with 0s
+        builder = CashFlowBuilder(start_date, end_date, columns=CASH_FLOW_COLUMNS)
     
-        cash_flows_df.at[self.purchase_date, 'Purchase Price'] = self.purchase_price
+        builder.set(self.purchase_date, 'Purchase Price', self.purchase_price)
     
-        # Fill in the DataFrame with cash flow data
-        for d in dates:
-            standardized_date = self._standardize_date(d)
-            cash_flows_df.at[standardized_date, 'Ownership Share'] = self.ownership_share_series.get(standardized_date, 1.0)
+        ownership_share = builder.column('Ownership Share')
+        ownership_share[:builder.window_length] = self.ownership_share_series.values_for(builder.window_months)
     
-        # Aggregate the values for duplicate dates
-        if self.noi_capex is not None:
+        # Add NOI and CapEx by month number, accumulating duplicate dates; other indexes are aligned by label
+        noi_capex_months = month_index(self.noi_capex.index) if self.noi_capex is not None else None
+        if noi_capex_months is not None:
+            rows = builder.row_positions(noi_capex_months)
+            found = rows >= 0
+            for col in ('Net Operating Income', 'Capital Expenditures'):
+                np.add.at(builder.column(col), rows[found], np.nan_to_num(self.noi_capex[col].to_numpy(dtype=np.float64)[found]))
+        elif self.noi_capex is not None:
             fin_df = self.noi_capex.groupby(self.noi_capex.index).sum()
+            fin_df = fin_df.reindex(builder.index, fill_value=0)
+            builder.column('Net Operating Income')[:] += fin_df['Net Operating Income'].to_numpy(dtype=np.float64)
+            builder.column('Capital Expenditures')[:] += fin_df['Capital Expenditures'].to_numpy(dtype=np.float64)
     
-            # Reindex fin_df to match cash_flows_df
-            fin_df = fin_df.reindex(cash_flows_df.index, fill_value=0)
-    
-            # Add financial data to the cash flows DataFrame
-            cash_flows_df['Net Operating Income'] = cash_flows_df['Net Operating Income'].add(fin_df['Net Operating Income'], fill_value=0)
-            cash_flows_df['Capital Expenditures'] = cash_flows_df['Capital Expenditures'].add(fin_df['Capital Expenditures'], fill_value=0)
-    
-        # Add loan cash flows to the DataFrame
-        for loan in self.loans:
-            loan_cash_flows = loan.get_schedule()
-            for loan_cf in loan_cash_flows:
-                standardized_date = self._standardize_date(loan_cf['date'])
-                if standardized_date in cash_flows_df.index:
-                    cash_flows_df.at[standardized_date, 'Interest Expense'] += loan_cf['Interest Expense']
-                    cash_flows_df.at[standardized_date, 'Principal Payments'] += loan_cf['Principal Payments']
-                    if standardized_date == loan.origination_date:
-                        cash_flows_df.at[standardized_date, 'Loan Proceeds'] += loan.original_balance
-                    if standardized_date == loan.maturity_date and not self.sale_date:
-                        cash_flows_df.at[standardized_date, 'Debt Scheduled Repayment'] += loan.get_current_balance(loan.maturity_date)
-                else:
-                    #st.error(f"Loan date {standardized_date} not in cash flows DataFrame index.")
-                    pass
+        # Add loan cash flows to the DataFrame, computing every loan's schedule in one batch
+        if self.loans:
+            # Months after the window are never read, so the schedules stop at its last month
+            book = LoanBook.from_loans(self.loans)
+            schedule = book.compute(end_month=builder.start_month + builder.window_length - 1)
+            months = schedule.months.astype(np.int64)
+            builder.scatter_add('Interest Expense', months, schedule.interest.sum(axis=0))
+            builder.scatter_add('Principal Payments', months, schedule.principal.sum(axis=0))
+            builder.scatter_add('Loan Proceeds', book.origination_month, book.original_balance)
+            if not self.sale_date:
+                matured = np.flatnonzero(schedule.maturity_index < len(months))
+                maturity_balance = schedule.balance[matured, schedule.maturity_index[matured]]
+                builder.scatter_add('Debt Scheduled Repayment', book.maturity_month[matured], maturity_balance)
     
         if self.sale_date is not None:
-            cash_flows_df.at[self.sale_date, 'Sale Proceeds'] = self.sale_price
+            builder.set(self.sale_date, 'Sale Proceeds', self.sale_price)
             for loan in self.loans:
-                cash_flows_df.at[self.sale_date, 'Debt Early Prepayment'] += loan.get_current_balance(self.sale_date)
-    
-        col_order = ['Ownership Share', 'Purchase Price', 'Loan Proceeds', 'Net Operating Income', 'Capital Expenditures', 'Interest Expense', 'Principal Payments', 'Debt Scheduled Repayment', 'Debt Early Prepayment', 'Sale Proceeds', 'Partner Buyout']
-        cash_flows_df = cash_flows_df[col_order]
+                builder.add(self.sale_date, 'Debt Early Prepayment', loan.get_current_balance(self.sale_date))
     
-        for col in cash_flows_df.columns[1:]:
-            adjusted_column = "Adjusted " + col
-            cash_flows_df[adjusted_column] = cash_flows_df[col] * cash_flows_df['Ownership Share']
+        for col in CASH_FLOW_COLUMNS[1:]:
+            builder.set_column("Adjusted " + col, builder.column(col) * builder.column('Ownership Share'))
     
         if self.buyout_date:
             standardized_buyout_date = self._standardize_date(self.buyout_date)
-            cash_flows_df.at[standardized_buyout_date, 'Partner Buyout'] = self.buyout_amount
-            cash_flows_df.at[standardized_buyout_date, 'Adjusted Partner Buyout'] = self.buyout_amount
-    
-        # Replace NaN values with 0
-        cash_flows_df.fillna(0, inplace=True)
-    
-        return cash_flows_df
+            builder.set(standardized_buyout_date, 'Partner Buyout', self.buyout_amount)
+            builder.set(standardized_buyout_date, 'Adjusted Partner Buyout', self.buyout_amount)
+        return builder
 
     def calculate_cash_flow_before_debt_service(self, start_date: date, end_date: date, ownership_adjusted: bool = True) -> Dict[date, float]:
         start_date = self._standardize_date(start_date)
@@ -267,6 +325,7 @@ class Property:
     
         return cf_after_debt
     
+    @profiled('Property.hold_period_cash_flows')
     def hold_period_cash_flows(self, ownership_adjusted: bool = True, start_date: Optional[date] = None, end_date: Optional[date] = None) -> pd.DataFrame:
         if start_date is None:
             start_date = self.analysis_start_date
@@ -279,45 +338,37 @@ class Property:
         if self.buyout_date:
             self.update_ownership_share(self.buyout_date, 1)
     
-        df = self.get_cash_flows_dataframe(start_date=start_date, end_date=end_date)
-    
-        columns_to_change_sign = ['Capital Expenditures', 'Purchase Price', 'Interest Expense', 'Principal Payments', 'Partner Buyout', 'Debt Scheduled Repayment', 'Debt Early Prepayment']
-    
-        adjusted_columns = [col for col in df.columns if 'Adjusted' in col]
-        if ownership_adjusted:
-            cf_df = df[adjusted_columns]
-            cf_df['Ownership Share'] = df['Ownership Share']
-            cf_df = cf_df[['Ownership Share', 'Adjusted Purchase Price', 'Adjusted Loan Proceeds', 'Adjusted Net Operating Income', 'Adjusted Capital Expenditures', 'Adjusted Interest Expense', 'Adjusted Principal Payments', 'Adjusted Debt Scheduled Repayment', 'Adjusted Debt Early Prepayment', 'Adjusted Sale Proceeds', 'Adjusted Partner Buyout']]
-        else:
-            non_adjusted_columns = [col for col in df.columns if 'Adjusted' not in col]
-            cf_df = df[non_adjusted_columns]
-            cf_df['Ownership Share'] = df['Ownership Share']
-    
-        for col in columns_to_change_sign:
-            adjusted_col_name = f'Adjusted {col}' if ownership_adjusted else col
-            if adjusted_col_name in cf_df.columns:
-                cf_df.loc[:, adjusted_col_name] = -cf_df[adjusted_col_name]
-    
-        cf_df.loc[:, 'Total Cash Flow'] = cf_df.drop(columns=['Ownership Share']).sum(axis=1)
-    
-        return cf_df
+        builder = self._cash_flow_builder(start_date, end_date)
+
+        # Outflows are negated; the frame is created once from the builder's columns
+        prefix = 'Adjusted ' if ownership_adjusted else ''
+        data = {'Ownership Share': builder.values('Ownership Share')}
+        for col in CASH_FLOW_COLUMNS[1:]:
+            values = builder.values(prefix + col)
+            data[prefix + col] = -values if col in OUTFLOW_COLUMNS else values
+        data['Total Cash Flow'] = np.stack(list(data.values())[1:], axis=1).sum(axis=1)
+
+        return pd.DataFrame(data, index=builder.index)
     
     def update_ownership_share(self, start_date: date, new_share: float):
-        start_date = self._standardize_date(start_date)
-    
-        for d in sorted(self.ownership_share_series.keys()):
-            if d >= start_date:
-                self.ownership_share_series[d] = new_share
-    
-        max_existing_date = max(self.ownership_share_series.keys(), default=start_date)
-        current_date = max(start_date, max_existing_date)
-    
-        try:
-            while current_date <= self.analysis_end_date:
-                self.ownership_share_series[current_date] = new_share
-                current_date += relativedelta(months=1)
-        except TypeError as e:
-            print(f"TypeError occurred: {e}")
+        self.set_ownership_steps({start_date: new_share})
+
+    def set_ownership_steps(self, steps: Dict[date, float]):
+        """
+        Apply step changes of the ownership share, such as several buyouts or partial sell-downs, at once.
+
+        Each share holds from its date until the next later date; the months through
+        analysis_end_date take the last share. Equivalent to update_ownership_share for each
+        step in date order.
+
+        Parameters:
+        steps (Dict[date, float]): The new ownership share from each date onward.
+        """
+        ordered = sorted(steps.items())
+        dates = [self._standardize_date(d) for d, _ in ordered]
+        # hold_period_cash_flows reapplies the buyout share on every call; only a real change is a new version
+        if self.ownership_share_series.apply_steps(dates, [share for _, share in ordered], self.analysis_end_date):
+            self.touch()
     
     def buy_out_partner(self, buyout_date: date, buyout_amount: float):
         standardized_date = self._standardize_date(buyout_date)
@@ -0,0 +1,58 @@
+import warnings
+from typing import Dict, Optional
+
+
+class RateProvider:
+    """
+    Source of the monthly SOFR curve used by floating-rate loans.
+
+    monthly_curve returns a dict of annual rates (decimal) keyed by 'YYYY-MM-01'. Implementations
+    should return the same dict object until the curve changes, since loans reuse their cached
+    schedule for as long as the curve object is unchanged.
+    """
+
+    def monthly_curve(self) -> Dict[str, float]:
+        raise NotImplementedError
+
+
+class StaticRateProvider(RateProvider):
+    """A fixed curve, for batch runs, worker processes and tests."""
+
+    def __init__(self, curve: Optional[Dict[str, float]] = None):
+        self.curve = curve if curve is not None else {}
+
+    def monthly_curve(self) -> Dict[str, float]:
+        return self.curve
+
+
+class ChathamRateProvider(RateProvider):
+    """The Chatham Financial forward curve, loaded on first use and kept for the life of the provider."""
+
+    def __init__(self, chatham: Optional['Chatham'] = None):
+        self.chatham = chatham
+        self.curve = None
+
+    def monthly_curve(self) -> Dict[str, float]:
+        if self.curve is None:
+            if self.chatham is None:
+                from chatham import Chatham
+                self.chatham = Chatham()
+            self.curve = self.chatham.get_monthly_rates()
+            if not self.curve:
+                warnings.warn(self.chatham.error or "The SOFR curve is empty; floating-rate loans will accrue at their spread alone.",
+                              RuntimeWarning)
+        return self.curve
+
+
+_default_provider: RateProvider = ChathamRateProvider()
+
+
+def get_default_rate_provider() -> RateProvider:
+    """The provider used by loans that were not given one."""
+    return _default_provider
+
+
+def set_default_rate_provider(provider: RateProvider):
+    """Replace the provider used by loans that were not given one."""
+    global _default_provider
+    _default_provider = provider
@@ -0,0 +1,200 @@
+"""
+Memoized portfolio reports keyed on model content hashes.
+
+Streamlit reruns Hello.py on every widget interaction. The wrappers here return the previous
+result while the portfolio's content hash, the analysis window and, for floating loans, the SOFR
+curve are unchanged, so a rerun that changed nothing recomputes nothing. Results are kept in
+process-wide LRU caches shared by every session and returned as copies, so callers can edit them.
+Nothing here imports Streamlit; batch runs and notebooks use the same wrappers.
+
+The model classes can also be passed to Streamlit's own cache:
+
+    @st.cache_data(hash_funcs=HASH_FUNCS)
+    def report(portfolio): ...
+"""
+import functools
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional
+import pandas as pd
+from loan import Loan
+from property import Property
+from portfolio import Portfolio
+from profiling import count, timer
+from versioning import digest
+
+CACHE_SIZE = 32
+
+HASH_FUNCS = {
+    Loan: Loan.content_hash,
+    Property: Property.content_hash,
+    Portfolio: Portfolio.content_hash
+}
+
+_MISSING = object()
+
+
+class LRUCache:
+    """A thread-safe mapping that keeps the maxsize most recently used entries."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _loans(value) -> Iterator['Loan']:
+    """Every loan reachable from a model object or a list of them."""
+    if isinstance(value, Loan):
+        yield value
+    elif isinstance(value, Property):
+        yield from value.loans
+    elif isinstance(value, Portfolio):
+        for property in value.properties:
+            yield from property.loans
+        yield from value.unsecured_loans
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _loans(item)
+
+
+# Digests of recently hashed curves, keyed by identity; each entry holds its curve so the id stays valid
+_curve_digests = LRUCache()
+
+
+def _curve_digest(curve) -> str:
+    entry = _curve_digests.get(id(curve))
+    if entry is None or entry[0] is not curve:
+        entry = (curve, digest(tuple(sorted((curve or {}).items()))))
+        _curve_digests.put(id(curve), entry)
+    return entry[1]
+
+
+def curve_key(*values) -> Optional[str]:
+    """Digest of every distinct SOFR curve used by floating loans among the values, or None when all are fixed."""
+    curves = {}
+    for loan in _loans(values):
+        if loan.fixed_floating != 'Fixed':
+            curve = loan.sofr_curve()
+            curves.setdefault(id(curve), curve)
+    if not curves:
+        return None
+    return digest(tuple(_curve_digest(curve) for curve in curves.values()))
+
+
+def _key(value):
+    if type(value) in HASH_FUNCS:
+        return (type(value).__name__, HASH_FUNCS[type(value)](value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_key(item) for item in value)
+    return value
+
+
+def _copy(value):
+    return value.copy() if isinstance(value, (pd.DataFrame, pd.Series)) else value
+
+
+def cached(maxsize: int = CACHE_SIZE) -> Callable:
+    """
+    Memoize a function of model objects on their content hashes, the other arguments and the SOFR curve.
+
+    The wrapped function gains a `cache` attribute holding its LRUCache.
+    """
+    def decorate(func: Callable) -> Callable:
+        cache = LRUCache(maxsize)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (_key(args), tuple(sorted((name, _key(value)) for name, value in kwargs.items())), curve_key(args, list(kwargs.values())))
+            with timer(f'report {func.__name__}'):
+                result = cache.get(key, _MISSING)
+                if result is _MISSING:
+                    count(f'report {func.__name__} misses')
+                    result = func(*args, **kwargs)
+                    cache.put(key, result)
+                else:
+                    count(f'report {func.__name__} hits')
+                return _copy(result)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorate
+
+
+@cached()
+def aggregate_cash_flows(portfolio: 'Portfolio', start_date: Optional[date] = None, end_date: Optional[date] = None) -> pd.DataFrame:
+    return portfolio.aggregate_hold_period_cash_flows(start_date, end_date)
+
+
+@cached()
+def monthly_cash(portfolio: 'Portfolio', start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 minimum_cash: Optional[float] = None) -> pd.DataFrame:
+    return portfolio.evaluate(start_date, end_date).monthly_cash(portfolio.beg_cash, minimum_cash)
+
+
+@cached()
+def monthly_dscr(portfolio: 'Portfolio', start_date: Optional[date] = None, end_date: Optional[date] = None) -> pd.DataFrame:
+    return portfolio.evaluate(start_date, end_date).monthly_dscr()
+
+
+@cached()
+def monthly_dscr_unsecured(portfolio: 'Portfolio', start_date: Optional[date] = None, end_date: Optional[date] = None) -> pd.DataFrame:
+    return portfolio.evaluate(start_date, end_date).monthly_dscr_unsecured()
+
+
+@cached()
+def loan_balance_over_time(loans: List['Loan']) -> pd.DataFrame:
+    """Running balance of each loan on every schedule date, from its proceeds and principal payments."""
+    frames = []
+    for loan in loans:
+        schedule = pd.DataFrame(loan.get_unsecured_schedule(), columns=['date', 'Adjusted Loan Proceeds', 'Adjusted Principal Payments'])
+        frames.append(pd.DataFrame({
+            'date': schedule['date'],
+            'balance': (schedule['Adjusted Loan Proceeds'] + schedule['Adjusted Principal Payments']).cumsum(),
+            'loan_id': loan.loan_id
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['date', 'balance', 'loan_id'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def clear_caches():
+    """Empty every report cache."""
+    for wrapper in (aggregate_cash_flows, monthly_cash, monthly_dscr, monthly_dscr_unsecured, loan_balance_over_time):
+        wrapper.cache.clear()
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hits, misses and size of each report cache."""
+    return {
+        wrapper.__name__: {'hits': wrapper.cache.hits, 'misses': wrapper.cache.misses, 'size': len(wrapper.cache)}
+        for wrapper in (aggregate_cash_flows, monthly_cash, monthly_dscr, monthly_dscr_unsecured, loan_balance_over_time)
+    }
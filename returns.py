@@ -0,0 +1,251 @@
+"""
+Return metrics over monthly cash flows: IRR, NPV, equity multiple and cash-on-cash.
+
+The metric functions take one series of monthly cash flows or a (series x months) matrix and
+compute every row at once. irr() solves all rows with vectorized Newton steps and falls back to
+bisection for rows Newton does not settle. property_returns, group_returns and portfolio_returns
+apply them to a portfolio's evaluated hold-period cash flows.
+"""
+from datetime import date
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from months import to_months
+from schedule import to_dates
+
+PERIODS_PER_YEAR = 12
+
+OPERATING_COLUMNS = [
+    'Adjusted Net Operating Income', 'Adjusted Capital Expenditures', 'Adjusted Interest Expense', 'Adjusted Principal Payments'
+]
+
+METRICS = ['IRR', 'NPV', 'Equity Multiple', 'Cash-on-Cash']
+
+
+def _matrix(cash_flows) -> np.ndarray:
+    return np.atleast_2d(np.asarray(cash_flows, dtype=np.float64))
+
+
+def _polynomial(cash_flows: np.ndarray, x: np.ndarray, weighted: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum of c[t] x^t for each row, with x one value per row, and its derivative in x when
+    weighted, the flows c[t] * t for t >= 1, is given.
+    """
+    powers = np.empty_like(cash_flows)
+    powers[:, 0] = 1.0
+    if cash_flows.shape[1] > 1:
+        powers[:, 1:] = x[:, None]
+        np.cumprod(powers[:, 1:], axis=1, out=powers[:, 1:])
+    value = np.einsum('ij,ij->i', cash_flows, powers)
+    if weighted is None:
+        return value, None
+    return value, np.einsum('ij,ij->i', weighted, powers[:, :-1])
+
+
+def _bisect(cash_flows: np.ndarray, low: float, high: float, iterations: int) -> np.ndarray:
+    """Periodic rate in [low, high] at which each row's NPV changes sign, NaN when it does not."""
+    low = np.full(len(cash_flows), low)
+    high = np.full(len(cash_flows), high)
+    # Long series overflow near -100%; an infinite value still carries the sign of the NPV
+    with np.errstate(over='ignore', invalid='ignore'):
+        f_low = _polynomial(cash_flows, 1 / (1 + low))[0]
+        f_high = _polynomial(cash_flows, 1 / (1 + high))[0]
+        bracketed = np.isfinite(f_high) & ~np.isnan(f_low) & (np.sign(f_low) != np.sign(f_high))
+        for _ in range(iterations):
+            middle = (low + high) / 2
+            f_middle = _polynomial(cash_flows, 1 / (1 + middle))[0]
+            left = np.sign(f_middle) == np.sign(f_low)
+            low = np.where(left, middle, low)
+            f_low = np.where(left, f_middle, f_low)
+            high = np.where(left, high, middle)
+    return np.where(bracketed, (low + high) / 2, np.nan)
+
+
+def irr(cash_flows, guess: float = 0.1, tol: float = 1e-10, max_iter: int = 50,
+        periods_per_year: int = PERIODS_PER_YEAR) -> Union[float, np.ndarray]:
+    """
+    Annualized internal rate of return of each series of periodic cash flows.
+
+    Newton steps run on x = 1 / (1 + r) for every row at once, dropping rows as they converge.
+    Rows that do not converge, or leave the valid range, are solved by bisection over periodic
+    rates from -99.99% to 100%; rows without a sign change there, such as all-positive flows,
+    return NaN.
+
+    Parameters:
+    cash_flows: One series of periodic cash flows, or a (series x periods) matrix.
+    guess (float): Starting annual rate.
+    tol (float): Convergence tolerance on the periodic rate.
+    max_iter (int): Newton iterations before falling back to bisection.
+    periods_per_year (int): Periods per year, 12 for monthly flows.
+
+    Returns:
+    float or np.ndarray: The annual effective rate, one per row for a matrix.
+    """
+    flows = _matrix(cash_flows)
+    rate = np.full(len(flows), (1 + guess) ** (1 / periods_per_year) - 1)
+    solvable = (flows > 0).any(axis=1) & (flows < 0).any(axis=1)
+    done = np.zeros(len(flows), dtype=bool)
+
+    # Rows still iterating, with their flows and t-weighted flows compacted as rows drop out
+    active = np.flatnonzero(solvable)
+    active_flows = flows if len(active) == len(flows) else flows[active]
+    active_weighted = active_flows[:, 1:] * np.arange(1, flows.shape[1])
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        x = 1 / (1 + rate[active])
+        value, derivative = _polynomial(active_flows, x, active_weighted)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_next = x - value / derivative
+        valid = np.isfinite(x_next) & (x_next > 0)
+        rate_next = 1 / np.where(valid, x_next, x) - 1
+        converged = valid & (np.abs(rate_next - rate[active]) < tol)
+        rate[active] = rate_next
+        done[active[converged]] = True
+        keep = valid & ~converged
+        if not keep.all():
+            active, active_flows, active_weighted = active[keep], active_flows[keep], active_weighted[keep]
+
+    rate[~done] = np.nan
+    retry = np.flatnonzero(solvable & ~done)
+    if len(retry):
+        rate[retry] = _bisect(flows[retry], -0.9999, 1.0, 100)
+
+    annual = (1 + rate) ** periods_per_year - 1
+    return annual if np.ndim(cash_flows) > 1 else float(annual[0])
+
+
+def npv(rate, cash_flows, periods_per_year: int = PERIODS_PER_YEAR) -> Union[float, np.ndarray]:
+    """
+    Net present value of each series, discounting period t by (1 + rate) ** (t / periods_per_year).
+
+    Parameters:
+    rate: Annual discount rate, a scalar or one per row.
+    cash_flows: One series of periodic cash flows, or a (series x periods) matrix. Period 0 is undiscounted.
+    """
+    flows = _matrix(cash_flows)
+    periods = np.arange(flows.shape[1]) / periods_per_year
+    discount = (1 + np.asarray(rate, dtype=np.float64).reshape(-1, 1)) ** -periods
+    values = (flows * discount).sum(axis=1)
+    return values if np.ndim(cash_flows) > 1 else float(values[0])
+
+
+def _contributions(flows: np.ndarray) -> np.ndarray:
+    """Equity contributed per row, the negated sum of negative flows; NaN where there is none."""
+    contributions = np.where(flows < 0, -flows, 0).sum(axis=1)
+    return np.where(contributions > 0, contributions, np.nan)
+
+
+def equity_multiple(cash_flows) -> Union[float, np.ndarray]:
+    """Distributions over contributions: positive cash flows divided by the negated negative ones, NaN without contributions."""
+    flows = _matrix(cash_flows)
+    contributions = _contributions(flows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        multiple = np.where(flows > 0, flows, 0).sum(axis=1) / contributions
+    return multiple if np.ndim(cash_flows) > 1 else float(multiple[0])
+
+
+def cash_on_cash(operating_cash_flows, cash_flows, periods_per_year: int = PERIODS_PER_YEAR) -> Union[float, np.ndarray]:
+    """
+    Average annual operating cash flow over the equity contributed.
+
+    Parameters:
+    operating_cash_flows: Cash flow from operations after debt service, per period.
+    cash_flows: All cash flows of the investment, per period. Its negative flows are the equity
+        contributed, and the periods from its first to its last non-zero flow are the holding period.
+    periods_per_year (int): Periods per year, 12 for monthly flows.
+    """
+    operating = _matrix(operating_cash_flows)
+    flows = _matrix(cash_flows)
+    nonzero = flows != 0
+    first = nonzero.argmax(axis=1)
+    last = flows.shape[1] - 1 - nonzero[:, ::-1].argmax(axis=1)
+    held = np.where(nonzero.any(axis=1), last - first + 1, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = operating.sum(axis=1) * periods_per_year / held / _contributions(flows)
+    return ratio if np.ndim(cash_flows) > 1 else float(ratio[0])
+
+
+def metrics(cash_flows: np.ndarray, operating_cash_flows: np.ndarray, discount_rate: float) -> pd.DataFrame:
+    """Every return metric for each row of a (series x months) cash-flow matrix."""
+    return pd.DataFrame({
+        'IRR': irr(cash_flows),
+        'NPV': npv(discount_rate, cash_flows),
+        'Equity Multiple': equity_multiple(cash_flows),
+        'Cash-on-Cash': cash_on_cash(operating_cash_flows, cash_flows)
+    }, columns=METRICS)
+
+
+def cash_flow_matrix(frames: Sequence[pd.DataFrame], columns: List[str]) -> Tuple[List[date], np.ndarray]:
+    """
+    Sum the given columns of each frame onto a shared monthly axis.
+
+    Returns:
+    Tuple[List[date], np.ndarray]: The months from the earliest to the latest row of any frame,
+    and a (frames x months) matrix.
+    """
+    months = [to_months(frame.index) for frame in frames]
+    present = [m for m in months if len(m)]
+    if not present:
+        return [], np.zeros((len(frames), 0))
+    first = min(m.min() for m in present)
+    last = max(m.max() for m in present)
+    matrix = np.zeros((len(frames), last - first + 1))
+    for row, (frame, frame_months) in enumerate(zip(frames, months)):
+        np.add.at(matrix[row], frame_months - first, frame[columns].to_numpy(dtype=np.float64).sum(axis=1))
+    return to_dates(np.arange(first, last + 1).astype('datetime64[M]')), matrix
+
+
+def _grouped(portfolio: 'Portfolio', keys: List, start_date: Optional[date], end_date: Optional[date], discount_rate: float) -> pd.DataFrame:
+    """Metrics of the property cash flows summed by key, in order of first appearance."""
+    result = portfolio.evaluate(start_date, end_date)
+    frames = [result.property_cash_flows[p.property_id] for p in portfolio.properties]
+    _, cash_flows = cash_flow_matrix(frames, ['Total Cash Flow'])
+    _, operating = cash_flow_matrix(frames, OPERATING_COLUMNS)
+
+    codes, groups = pd.factorize(pd.Series(keys, dtype=object))
+    summed = np.zeros((len(groups), cash_flows.shape[1]))
+    summed_operating = np.zeros_like(summed)
+    np.add.at(summed, codes, cash_flows)
+    np.add.at(summed_operating, codes, operating)
+    return metrics(summed, summed_operating, discount_rate).set_axis(pd.Index(groups))
+
+
+def property_returns(portfolio: 'Portfolio', start_date: Optional[date] = None, end_date: Optional[date] = None,
+                     discount_rate: float = 0.08) -> pd.DataFrame:
+    """
+    IRR, NPV, equity multiple and cash-on-cash of each property's hold-period cash flows in the window.
+
+    NPV is discounted to the first month any property has a cash flow, so values are comparable.
+
+    Returns:
+    pd.DataFrame: One row per property ID.
+    """
+    return _grouped(portfolio, [p.property_id for p in portfolio.properties], start_date, end_date, discount_rate).rename_axis('Property ID')
+
+
+def group_returns(portfolio: 'Portfolio', by: Union[str, Callable[['Property'], object]] = 'property_type',
+                  start_date: Optional[date] = None, end_date: Optional[date] = None, discount_rate: float = 0.08) -> pd.DataFrame:
+    """
+    Return metrics of the properties' combined cash flows, grouped by an attribute.
+
+    Parameters:
+    by: A Property attribute name such as 'property_type', 'vintage' for the purchase year, or a
+        function of a Property returning its group.
+
+    Returns:
+    pd.DataFrame: One row per group.
+    """
+    if callable(by):
+        keys = [by(p) for p in portfolio.properties]
+    elif by == 'vintage':
+        keys = [p.purchase_date.year for p in portfolio.properties]
+    else:
+        keys = [getattr(p, by) for p in portfolio.properties]
+    return _grouped(portfolio, keys, start_date, end_date, discount_rate).rename_axis(by if isinstance(by, str) else None)
+
+
+def portfolio_returns(portfolio: 'Portfolio', start_date: Optional[date] = None, end_date: Optional[date] = None,
+                      discount_rate: float = 0.08) -> pd.Series:
+    """Return metrics of all properties' cash flows combined."""
+    return _grouped(portfolio, [portfolio.name] * len(portfolio.properties), start_date, end_date, discount_rate).iloc[0]
@@ -0,0 +1,550 @@
+"""
+Monte Carlo SOFR scenarios for floating-rate loans.
+
+A RateScenarios holds simulated monthly SOFR paths, generated here from the forward curve or a
+short-rate model, or supplied directly. simulate() evaluates the portfolio once on its own curve,
+then re-solves only the floating loans under every path as one (paths x loans x months)
+calculation, and reports percentile bands of monthly cash and DSCR across the paths.
+
+Interest-only floating loans keep their balance, so their interest moves linearly with SOFR and
+all of them reduce to one weight per month. Only floating loans with amortizing periods are
+solved per path, in chunks of paths that bound memory.
+
+stress() runs the same calculation for deterministic curve shocks: parallel, key-rate or any
+monthly vector of shifts, each turned into one path of the portfolio's own curve shifted from the
+shock date. The floating exposure is kept for as long as the portfolio's evaluation is reused, so
+a later set of shocks solves only the floating loans again.
+"""
+import weakref
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from loanbook import LoanBook
+from months import month_dates, to_month
+from portfolio_result import cash_balances
+from schedule import to_dates
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Upper bound on paths x loans x months elements per chunk of amortizing floating loans
+CHUNK_ELEMENTS = 2 ** 22
+
+# Key-rate tenors, in months after the shock date
+KEY_RATE_TENORS = (1, 3, 6, 12, 24, 36, 60, 84, 120)
+
+
+class RateScenarios:
+    """
+    Simulated SOFR paths, shaped (paths x months), as annual decimal rates.
+
+    The rate in month m applies to loan periods starting in m, the same keying as the Chatham
+    monthly curve. Periods starting outside the simulated months keep each loan's own curve.
+    With relative, the paths are shifts added to each loan's own curve rather than rates, and
+    floor, when given, bounds the shifted rates from below.
+    """
+
+    def __init__(self, start_date: date, paths: np.ndarray, relative: bool = False, floor: Optional[float] = None):
+        self.paths = np.atleast_2d(np.asarray(paths, dtype=np.float64))
+        self.start_month = to_month(start_date)
+        self.relative = relative
+        self.floor = floor
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def horizon(self) -> int:
+        return self.paths.shape[1]
+
+    @property
+    def dates(self) -> List[date]:
+        return to_dates(np.arange(self.start_month, self.start_month + self.horizon).astype('datetime64[M]'))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Paths as a frame with one column per path, indexed by month."""
+        return pd.DataFrame(self.paths.T, index=self.dates)
+
+    def rates(self, months: np.ndarray, base: np.ndarray, paths: slice = slice(None)) -> np.ndarray:
+        """
+        SOFR of the given paths for the given datetime64[M] months, taking base where a month was
+        not simulated. base is one curve (months) or one per row (rows x months); the result is
+        (paths x months) or (paths x rows x months) to match.
+        """
+        offset = months.astype(np.int64) - self.start_month
+        simulated = (offset >= 0) & (offset < self.horizon)
+        selected = self.paths[paths]
+        rates = np.broadcast_to(base, (len(selected),) + np.shape(base)).copy()
+        values = selected[:, offset[simulated]]
+        if np.ndim(base) == 2:
+            values = values[:, None, :]
+        if self.relative:
+            values = values + base[..., simulated]
+        if self.floor is not None:
+            values = np.maximum(values, self.floor)
+        rates[..., simulated] = values
+        return rates
+
+
+def _forward_rates(curve: Dict[str, float], start_date: date, horizon: int) -> np.ndarray:
+    """Curve rates for each simulated month, carrying the nearest observation into months the curve lacks."""
+    months = pd.Series(
+        [curve.get(d.strftime("%Y-%m-%d")) for d in to_dates(np.arange(to_month(start_date), to_month(start_date) + horizon).astype('datetime64[M]'))],
+        dtype=np.float64
+    )
+    if months.isna().all():
+        raise ValueError("The SOFR curve has no rates to simulate from.")
+    return months.ffill().bfill().to_numpy()
+
+
+def _ou_paths(x0: float, mean_reversion: float, volatility: float, horizon: int, n_paths: int, rng: np.random.Generator) -> np.ndarray:
+    """Ornstein-Uhlenbeck paths around 0, sampled exactly at monthly steps, starting from x0."""
+    dt = 1 / 12
+    if mean_reversion > 0:
+        decay = np.exp(-mean_reversion * dt)
+        step_sd = volatility * np.sqrt((1 - decay ** 2) / (2 * mean_reversion))
+    else:
+        decay = 1.0
+        step_sd = volatility * np.sqrt(dt)
+    shocks = rng.standard_normal((n_paths, horizon - 1)) * step_sd
+    paths = np.empty((n_paths, horizon))
+    paths[:, 0] = x0
+    for m in range(1, horizon):
+        paths[:, m] = paths[:, m - 1] * decay + shocks[:, m - 1]
+    return paths
+
+
+def shifted_forward_paths(curve: Dict[str, float], start_date: date, horizon: int, n_paths: int,
+                          volatility: float = 0.01, floor: Optional[float] = 0.0, seed: Optional[int] = None) -> RateScenarios:
+    """
+    The forward curve shifted along each path by a Gaussian random walk.
+
+    Parameters:
+    curve (Dict[str, float]): Monthly SOFR curve keyed 'YYYY-MM-01', as returned by Chatham.get_monthly_rates.
+    start_date (date): First simulated month; the walk starts at 0 there.
+    horizon (int): Number of simulated months.
+    n_paths (int): Number of paths.
+    volatility (float): Annualized standard deviation of the shift.
+    floor (float): Lowest allowed rate, or None for no floor.
+    seed (int): Seed for the random generator.
+
+    Returns:
+    RateScenarios: The simulated paths.
+    """
+    forward = _forward_rates(curve, start_date, horizon)
+    shift = _ou_paths(0.0, 0.0, volatility, horizon, n_paths, np.random.default_rng(seed))
+    paths = forward + shift
+    return RateScenarios(start_date, paths if floor is None else np.maximum(paths, floor))
+
+
+def vasicek_paths(r0: float, mean_reversion: float, long_term_rate: float, volatility: float, start_date: date,
+                  horizon: int, n_paths: int, seed: Optional[int] = None) -> RateScenarios:
+    """
+    Vasicek short-rate paths, dr = a (b - r) dt + sigma dW, sampled exactly at monthly steps.
+
+    Parameters:
+    r0 (float): Rate in the first simulated month.
+    mean_reversion (float): Speed a at which rates revert to the long-term rate.
+    long_term_rate (float): Long-term mean b.
+    volatility (float): Annualized volatility sigma.
+    start_date (date): First simulated month.
+    horizon (int): Number of simulated months.
+    n_paths (int): Number of paths.
+    seed (int): Seed for the random generator.
+
+    Returns:
+    RateScenarios: The simulated paths.
+    """
+    paths = long_term_rate + _ou_paths(r0 - long_term_rate, mean_reversion, volatility, horizon, n_paths, np.random.default_rng(seed))
+    return RateScenarios(start_date, paths)
+
+
+def hull_white_paths(curve: Dict[str, float], mean_reversion: float, volatility: float, start_date: date,
+                     horizon: int, n_paths: int, seed: Optional[int] = None) -> RateScenarios:
+    """
+    Hull-White short-rate paths fitted to the forward curve.
+
+    The rate is r(t) = f(t) + sigma^2 / (2 a^2) (1 - e^(-a t))^2 + x(t), with f the curve's forward
+    rate for the month and x an Ornstein-Uhlenbeck process starting at 0, so the expected path
+    follows the curve.
+
+    Parameters:
+    curve (Dict[str, float]): Monthly SOFR curve keyed 'YYYY-MM-01'.
+    mean_reversion (float): Speed a of mean reversion.
+    volatility (float): Annualized volatility sigma.
+    start_date (date): First simulated month.
+    horizon (int): Number of simulated months.
+    n_paths (int): Number of paths.
+    seed (int): Seed for the random generator.
+
+    Returns:
+    RateScenarios: The simulated paths.
+    """
+    t = np.arange(horizon) / 12
+    if mean_reversion > 0:
+        drift = volatility ** 2 / (2 * mean_reversion ** 2) * (1 - np.exp(-mean_reversion * t)) ** 2
+    else:
+        drift = volatility ** 2 * t ** 2 / 2
+    x = _ou_paths(0.0, mean_reversion, volatility, horizon, n_paths, np.random.default_rng(seed))
+    return RateScenarios(start_date, _forward_rates(curve, start_date, horizon) + drift + x)
+
+
+class CurveShock:
+    """
+    A shift of the SOFR curve by month from the shock date, as decimals (0.01 is +100bp).
+
+    shifts[k] moves the rate for periods starting k months after the shock date; months past the
+    last shift hold it, so a single shift is a parallel move. Periods starting before the shock
+    date keep the curve.
+    """
+
+    def __init__(self, shifts: Sequence[float], name: Optional[str] = None):
+        self.shifts = np.atleast_1d(np.asarray(shifts, dtype=np.float64))
+        if self.shifts.ndim != 1 or len(self.shifts) == 0:
+            raise ValueError("A curve shock needs a non-empty vector of monthly shifts.")
+        self.name = name or ('Custom' if len(self.shifts) > 1 else f'{self.shifts[0] * 1e4:+g}bp')
+
+    def __repr__(self):
+        return f"CurveShock({self.name!r})"
+
+    @classmethod
+    def parallel(cls, size: float, name: Optional[str] = None) -> 'CurveShock':
+        """Every month shifted by size."""
+        return cls([size], name)
+
+    @classmethod
+    def key_rate(cls, tenor: int, size: float, tenors: Sequence[int] = KEY_RATE_TENORS, name: Optional[str] = None) -> 'CurveShock':
+        """
+        A shift of size at one key tenor, falling linearly to 0 at the neighbouring tenors.
+
+        Months before the first tenor or after the last move with it, so the key-rate shocks of
+        all the tenors add up to a parallel shock of the same size.
+
+        Parameters:
+        tenor (int): The shocked tenor, in months after the shock date; one of tenors.
+        size (float): Shift at the tenor, as a decimal.
+        tenors (Sequence[int]): Increasing key tenors in months.
+        name (str): Label, '<tenor>m <size>bp' by default.
+
+        Returns:
+        CurveShock: The key-rate shock.
+        """
+        tenors = np.asarray(tenors, dtype=np.int64)
+        if tenor not in tenors or np.any(np.diff(tenors) <= 0):
+            raise ValueError(f"Tenor {tenor} is not one of the increasing key tenors {list(tenors)}.")
+        bumps = np.where(tenors == tenor, size, 0.0)
+        return cls(np.interp(np.arange(tenors[-1] + 1), tenors, bumps), name or f'{tenor}m {size * 1e4:+g}bp')
+
+    def monthly(self, months: int) -> np.ndarray:
+        """The shift for each of the first months months from the shock date."""
+        if months <= len(self.shifts):
+            return self.shifts[:months]
+        return np.concatenate((self.shifts, np.full(months - len(self.shifts), self.shifts[-1])))
+
+
+class ScenarioResult:
+    """
+    Monthly cash flow, NOI and debt service of a portfolio under every rate path, shaped (paths x months).
+    """
+
+    def __init__(self, dates: List[date], monthly_cash_flow: np.ndarray, noi: np.ndarray, debt_service: np.ndarray, beg_cash: float = 0):
+        self.dates = dates
+        self.monthly_cash_flow = monthly_cash_flow
+        self.noi = noi
+        self.debt_service = debt_service
+        self.beg_cash = beg_cash
+
+    def ending_cash(self) -> np.ndarray:
+        return cash_balances(self.monthly_cash_flow, self.beg_cash)['Ending Cash']
+
+    def dscr(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.noi / self.debt_service
+
+    def _bands(self, values: np.ndarray, percentiles: Sequence[float]) -> pd.DataFrame:
+        with np.errstate(invalid='ignore'):
+            bands = np.percentile(values, percentiles, axis=0)
+        return pd.DataFrame(bands.T, index=self.dates, columns=[f'P{p:g}' for p in percentiles])
+
+    def cash_bands(self, percentiles: Sequence[float] = PERCENTILES) -> pd.DataFrame:
+        """Percentiles of the ending cash balance across paths, one column per percentile."""
+        return self._bands(self.ending_cash(), percentiles)
+
+    def dscr_bands(self, percentiles: Sequence[float] = PERCENTILES) -> pd.DataFrame:
+        """Percentiles of the monthly DSCR across paths, one column per percentile."""
+        return self._bands(self.dscr(), percentiles)
+
+    def shortfall_probability(self, minimum_cash: float) -> pd.Series:
+        """Share of paths whose ending cash falls below minimum_cash, by month."""
+        return pd.Series((self.ending_cash() < minimum_cash).mean(axis=0), index=self.dates, name='Shortfall Probability')
+
+
+class StressResult(ScenarioResult):
+    """
+    A ScenarioResult with one path per curve shock, named after the shocks, and the portfolio's
+    unshocked cash flow and debt service to compare them with.
+    """
+
+    def __init__(self, names: List[str], dates: List[date], monthly_cash_flow: np.ndarray, noi: np.ndarray, debt_service: np.ndarray,
+                 base_cash_flow: np.ndarray, base_debt_service: np.ndarray, beg_cash: float = 0):
+        super().__init__(dates, monthly_cash_flow, noi, debt_service, beg_cash)
+        self.names = names
+        self.base_cash_flow = base_cash_flow
+        self.base_debt_service = base_debt_service
+
+    def cash_flow_frame(self) -> pd.DataFrame:
+        """Monthly cash flow with one column per shock, indexed by month."""
+        return pd.DataFrame(self.monthly_cash_flow.T, index=self.dates, columns=self.names)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per shock with its total debt service, the change in debt service and in cash
+        flow from the unshocked portfolio over the window, its lowest DSCR and its lowest ending cash.
+        """
+        with np.errstate(invalid='ignore'):
+            dscr = np.where(self.debt_service > 0, self.dscr(), np.nan)
+            min_dscr = np.array([np.nanmin(row) if np.isfinite(row).any() else np.nan for row in dscr])
+        return pd.DataFrame({
+            'Debt Service': self.debt_service.sum(axis=1),
+            'Debt Service Change': self.debt_service.sum(axis=1) - self.base_debt_service.sum(),
+            'Cash Flow Change': self.monthly_cash_flow.sum(axis=1) - self.base_cash_flow.sum(),
+            'Min DSCR': min_dscr,
+            'Min Ending Cash': self.ending_cash().min(axis=1, initial=np.inf) if len(self.dates) else np.nan
+        }, index=pd.Index(self.names, name='Shock'))
+
+
+class _FloatingExposure:
+    """
+    The floating loans of a portfolio as LoanBook rows, each with its weight on every month of the
+    aggregate (the ownership share for secured loans, 1 for unsecured) and the month, if any, in
+    which its outstanding balance is paid: the property's sale or the unsecured loan's maturity.
+    """
+
+    def __init__(self, loans: List['Loan'], weights: List[pd.Series], event_dates: List[Optional[date]], dates: List[date]):
+        self.book = LoanBook.from_loans(loans)
+        self.months = self.book.calendar(max(to_month(d) for d in dates))
+        start = int(self.months[0].astype(np.int64))
+
+        # Aggregate rows on the book's month axis; rows before the first origination carry no floating flows
+        columns = np.array([to_month(d) - start for d in dates])
+        self.aggregate_columns = np.flatnonzero(columns >= 0)
+        self.book_columns = columns[self.aggregate_columns]
+        self.weights = np.zeros((len(loans), len(self.months)))
+        for row, weight in enumerate(weights):
+            self.weights[row, self.book_columns] = weight.to_numpy(dtype=np.float64)[self.aggregate_columns]
+
+        self.event_rows = np.array([row for row, d in enumerate(event_dates) if d is not None and 0 <= to_month(d) - start < len(self.months)], dtype=np.int64)
+        self.event_columns = np.array([to_month(event_dates[row]) - start for row in self.event_rows], dtype=np.int64)
+        self.event_weights = self.weights[self.event_rows, self.event_columns]
+
+        self.periods = self.book.periods(self.months)
+        self.fractions = self.book.year_fractions(self.months)
+        self.period_starts = np.concatenate((self.months[:1], self.months[:-1]))
+        self.curve_sofr = self.book.curve_sofr(self.months)
+        self.base_sofr = self.book.period_sofr(self.months)
+        self.amortizing_rows = np.flatnonzero(self.periods['amortizing'].any(axis=1))
+        self.linear_rows = np.flatnonzero(~self.periods['amortizing'].any(axis=1))
+
+        # Balance-preserving loans: interest = balance x fraction x (SOFR + spread) in term, one weight per month and curve
+        linear = self.linear_rows
+        self.linear_weight = np.zeros((len(self.book.curves), len(self.months)))
+        np.add.at(self.linear_weight, self.book.curve_index[linear],
+                  self.book.original_balance[linear, None] * self.fractions[linear] * self.periods['in_term'][linear] * self.weights[linear])
+
+        # Loans with amortizing periods are solved per path, continuing from their balance on the base curve
+        rows = self.amortizing_rows
+        book = self.book
+        self.amortizing = LoanBook(
+            loan_ids=[book.loan_ids[row] for row in rows],
+            origination_month=book.origination_month[rows],
+            maturity_month=book.maturity_month[rows],
+            original_balance=book.original_balance[rows],
+            note_rate=book.note_rate[rows],
+            interest_only_period=book.interest_only_period[rows],
+            amortization_period=book.amortization_period[rows],
+            day_count_code=book.day_count_code[rows],
+            spread=book.spread[rows],
+            floating=book.floating[rows]
+        )
+        self.amortizing_periods = {name: self.periods[name][rows] for name in ('in_term', 'outstanding', 'amortizing')}
+        self.amortizing_accrual = self.fractions[rows] * (self.base_sofr[rows] + (self.amortizing.spread / 100)[:, None])
+        self.base_balance = self.amortizing.solve(self.amortizing_accrual.copy(), self.amortizing_periods)[3]
+
+        in_rows = np.isin(self.event_rows, rows)
+        self.amortizing_events = (np.searchsorted(rows, self.event_rows[in_rows]), self.event_columns[in_rows], self.event_weights[in_rows])
+
+    def _solve(self, sofr: np.ndarray, origin: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Weighted debt service and balance payments of the amortizing loans in the months after
+        origin, under (paths x loans x months) SOFR for those months.
+        """
+        book = self.amortizing
+        periods = {name: mask[:, origin:].copy() for name, mask in self.amortizing_periods.items()}
+        periods['in_term'][:, 0] = False
+        periods['amortizing'][:, 0] = False
+        opening_balance = np.where(periods['outstanding'][:, 0], self.base_balance[:, origin], book.original_balance)
+
+        sofr = np.concatenate((np.zeros(sofr.shape[:2] + (1,)), sofr), axis=2)
+        accrual = (sofr + (book.spread / 100)[None, :, None]) * self.fractions[self.amortizing_rows, origin:][None, :, :]
+        interest, principal, _, balance = book.solve(accrual, periods, opening_balance)
+        debt_service = ((interest + principal) * self.weights[self.amortizing_rows, origin:]).sum(axis=1)
+
+        # Balances paid at sale or maturity, on their event month
+        payments = np.zeros_like(debt_service)
+        positions, columns, weights = self.amortizing_events
+        after = columns > origin
+        if after.any():
+            positions, columns, weights = positions[after], columns[after] - origin, weights[after]
+            np.add.at(payments.T, columns, (balance[:, positions, columns] * weights).T)
+        return debt_service[:, 1:], payments[:, 1:]
+
+    def changes(self, scenarios: RateScenarios, chunk_paths: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Change from the base curve in weighted debt service and in balance payments, (paths x months) on the book's axis.
+        """
+        debt_service = ((scenarios.rates(self.period_starts, self.curve_sofr) - self.curve_sofr) * self.linear_weight).sum(axis=1)
+        payments = np.zeros_like(debt_service)
+
+        # Months before the first simulated period keep the base curve, so the solve starts just before it
+        first = int(np.searchsorted(self.period_starts.astype(np.int64), scenarios.start_month))
+        if len(self.amortizing_rows) and first < len(self.months):
+            origin = max(first - 1, 0)
+            base_sofr = self.base_sofr[self.amortizing_rows, origin + 1:]
+            base_debt_service, base_payments = self._solve(base_sofr[None], origin)
+            for start in range(0, len(scenarios), chunk_paths):
+                chunk = slice(start, start + chunk_paths)
+                chunk_debt_service, chunk_payments = self._solve(scenarios.rates(self.period_starts[origin + 1:], base_sofr, chunk), origin)
+                debt_service[chunk, origin + 1:] += chunk_debt_service - base_debt_service
+                payments[chunk, origin + 1:] += chunk_payments - base_payments
+        return debt_service, payments
+
+
+# Floating exposures by the evaluation they were built from, reused while the portfolio is unchanged
+_exposures = weakref.WeakKeyDictionary()
+
+
+def _floating_exposure(portfolio: 'Portfolio', result: 'PortfolioResult') -> Optional[_FloatingExposure]:
+    """
+    The floating loans of the portfolio, weighted by the ownership shares of the evaluation, or
+    None when it has none.
+    """
+    if result in _exposures:
+        return _exposures[result]
+    loans, weights, event_dates = [], [], []
+    index = pd.Index(list(result.aggregate.index))
+    for property in portfolio.properties:
+        floating = [loan for loan in property.loans if loan.fixed_floating != 'Fixed']
+        if not floating:
+            continue
+        share = result.property_cash_flows[property.property_id]['Ownership Share']
+        share = share[~share.index.duplicated()].reindex(index, fill_value=0.0)
+        for loan in floating:
+            loans.append(loan)
+            weights.append(share)
+            event_dates.append(property.sale_date)
+    for loan in portfolio.unsecured_loans:
+        if loan.fixed_floating != 'Fixed':
+            loans.append(loan)
+            weights.append(pd.Series(1.0, index=index))
+            event_dates.append(loan.maturity_date if loan.maturity_date > loan.origination_date else None)
+
+    exposure = _FloatingExposure(loans, weights, event_dates, list(index)) if loans else None
+    _exposures[result] = exposure
+    return exposure
+
+
+def _base_flows(aggregate: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Monthly cash flow, NOI and debt service of the aggregate on the portfolio's own curve."""
+    cash_flow = aggregate.sum(axis=1).to_numpy(dtype=np.float64)
+    noi = aggregate['Adjusted Net Operating Income'].to_numpy(dtype=np.float64)
+    debt_service = -(aggregate['Adjusted Interest Expense'] + aggregate['Adjusted Principal Payments']).to_numpy(dtype=np.float64)
+    return cash_flow, noi, debt_service
+
+
+def _path_flows(result: 'PortfolioResult', exposure: Optional[_FloatingExposure], scenarios: RateScenarios,
+                chunk_elements: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Monthly cash flow, NOI and debt service of the evaluation under every path, each (paths x months)."""
+    base_cash_flow, noi, base_debt_service = _base_flows(result.aggregate)
+    n_paths, n_months = len(scenarios), len(base_cash_flow)
+
+    debt_service = np.broadcast_to(base_debt_service, (n_paths, n_months)).copy()
+    cash_flow = np.broadcast_to(base_cash_flow, (n_paths, n_months)).copy()
+    if exposure is not None:
+        chunk_paths = max(1, chunk_elements // max(1, len(exposure.amortizing_rows) * len(exposure.months)))
+        debt_service_change, payment_change = exposure.changes(scenarios, chunk_paths)
+        columns, book_columns = exposure.aggregate_columns, exposure.book_columns
+        debt_service[:, columns] += debt_service_change[:, book_columns]
+        cash_flow[:, columns] -= debt_service_change[:, book_columns] + payment_change[:, book_columns]
+    return cash_flow, np.broadcast_to(noi, (n_paths, n_months)), debt_service
+
+
+def simulate(portfolio: 'Portfolio', scenarios: RateScenarios, start_date: Optional[date] = None, end_date: Optional[date] = None,
+             beg_cash: Optional[float] = None, chunk_elements: int = CHUNK_ELEMENTS) -> ScenarioResult:
+    """
+    Evaluate a portfolio under every SOFR path.
+
+    Fixed-rate loans, NOI, CapEx, sales and capital flows come from one evaluation on the
+    portfolio's own curve; each path changes only the interest, principal and balance payments
+    of floating loans, weighted by the ownership share of the property that carries them.
+
+    Parameters:
+    portfolio (Portfolio): The portfolio to evaluate.
+    scenarios (RateScenarios): SOFR paths.
+    start_date (date): Analysis start, the portfolio's by default.
+    end_date (date): Analysis end, the portfolio's by default.
+    beg_cash (float): Opening cash, the portfolio's beg_cash by default.
+    chunk_elements (int): Upper bound on paths x loans x months elements solved at once.
+
+    Returns:
+    ScenarioResult: Monthly cash flow, NOI and debt service for each path.
+    """
+    result = portfolio.evaluate(start_date, end_date)
+    beg_cash = portfolio.beg_cash if beg_cash is None else beg_cash
+    cash_flow, noi, debt_service = _path_flows(result, _floating_exposure(portfolio, result), scenarios, chunk_elements)
+    return ScenarioResult(list(result.aggregate.index), cash_flow, noi, debt_service, beg_cash)
+
+
+def _shocked_curves(exposure: Optional[_FloatingExposure], shocks: List[CurveShock], shock_month: int, floor: Optional[float]) -> RateScenarios:
+    """
+    One path per shock: its shifts of each loan's own curve for every period starting from the
+    shock month through the exposure's last period.
+    """
+    last = int(exposure.period_starts[-1].astype(np.int64)) if exposure is not None else shock_month - 1
+    horizon = max(last - shock_month + 1, 0)
+    shifts = np.array([shock.monthly(horizon) for shock in shocks]).reshape(len(shocks), horizon)
+    return RateScenarios(month_dates([shock_month])[0], shifts, relative=True, floor=floor)
+
+
+def stress(portfolio: 'Portfolio', shocks: Sequence[Union[CurveShock, float]], start_date: Optional[date] = None, end_date: Optional[date] = None,
+           shock_date: Optional[date] = None, beg_cash: Optional[float] = None, floor: Optional[float] = None,
+           chunk_elements: int = CHUNK_ELEMENTS) -> StressResult:
+    """
+    Evaluate a portfolio under deterministic shocks to its SOFR curve.
+
+    The evaluation on the portfolio's own curve provides everything a shock cannot move: NOI,
+    CapEx, sales, capital flows and fixed-rate loans. Each shock re-solves only the floating
+    loans, all shocks together, so many shocks cost little more than one.
+
+    Parameters:
+    portfolio (Portfolio): The portfolio to stress.
+    shocks (Sequence[CurveShock or float]): Curve shocks; a number is a parallel shift as a decimal (0.01 is +100bp).
+    start_date (date): Analysis start, the portfolio's by default.
+    end_date (date): Analysis end, the portfolio's by default.
+    shock_date (date): First month the shocks move, the analysis start by default.
+    beg_cash (float): Opening cash, the portfolio's beg_cash by default.
+    floor (float): Lowest shocked rate, or None for no floor.
+    chunk_elements (int): Upper bound on shocks x loans x months elements solved at once.
+
+    Returns:
+    StressResult: Monthly cash flow, NOI and debt service for each shock.
+    """
+    shocks = [shock if isinstance(shock, CurveShock) else CurveShock.parallel(shock) for shock in shocks]
+    result = portfolio.evaluate(start_date, end_date)
+    beg_cash = portfolio.beg_cash if beg_cash is None else beg_cash
+    exposure = _floating_exposure(portfolio, result)
+    scenarios = _shocked_curves(exposure, shocks, to_month(shock_date or result.start_date), floor)
+
+    cash_flow, noi, debt_service = _path_flows(result, exposure, scenarios, chunk_elements)
+    base_cash_flow, _, base_debt_service = _base_flows(result.aggregate)
+    return StressResult([shock.name for shock in shocks], list(result.aggregate.index), cash_flow, noi, debt_service,
+                        base_cash_flow, base_debt_service, beg_cash)
@@ -0,0 +1,348 @@
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+DAY_COUNT_BASIS = {
+    "30/360": 360,
+    "Actual/360": 360,
+    "Actual/365": 365,
+}
+
+
+def month_grid(start_date: date, end_date: date) -> np.ndarray:
+    """Return the first-of-month dates from start_date to end_date inclusive as datetime64[M]."""
+    start = np.datetime64(start_date, 'M')
+    end = np.datetime64(end_date, 'M')
+    if end < start:
+        return np.array([start])
+    return np.arange(start, end + 1, dtype='datetime64[M]')
+
+
+def day_count_fractions(grid: np.ndarray, day_count_method: str) -> np.ndarray:
+    """Accrual fraction of a year for each period between consecutive grid dates."""
+    basis = DAY_COUNT_BASIS.get(day_count_method, 365)
+    if day_count_method == "30/360":
+        days = np.full(len(grid) - 1, 30.0)
+    else:
+        days = np.diff(grid.astype('datetime64[D]')).astype(np.float64)
+    return days / basis
+
+
+def to_dates(grid: np.ndarray) -> List[date]:
+    """Convert a datetime64 month grid to a list of datetime.date objects."""
+    return grid.astype('datetime64[D]').astype(object).tolist()
+
+
+def annuity_balance(amortized, original_balance: float, accrual: float, monthly_payment: float):
+    """
+    Balances after `amortized` level payments at a constant accrual per period:
+    b0 * g**m - P * (g**m - 1) / (g - 1) with g = 1 + accrual, for a float64 array of payment counts.
+    """
+    if accrual == 0:
+        return original_balance - monthly_payment * amortized
+    growth = (1.0 + accrual) ** amortized
+    return original_balance * growth - monthly_payment * (growth - 1.0) / accrual
+
+
+def fixed_rate_balances(
+    rows: np.ndarray,
+    grid: Optional[np.ndarray],
+    original_balance: float,
+    note_rate: float,
+    day_count_method: str,
+    interest_only_period: int,
+    amortization_period: int,
+    monthly_payment: float
+) -> np.ndarray:
+    """
+    Ending balance of the given schedule rows of a fixed-rate loan, without building the schedule.
+
+    Under 30/360 every amortizing period grows the balance by the same factor, so the balance is
+    the annuity_balance of the amortizing periods before the row, O(1) per row. Actual day counts
+    vary the factor with the month's length; their balances come from the cumulative product of
+    the growth factors up to the last requested row, the closed form build_schedule uses, and equal
+    its balances exactly. The 30/360 annuity equals them to floating-point rounding.
+
+    Parameters:
+    rows (np.ndarray): Schedule rows, 0 for origination, each within the grid.
+    grid (np.ndarray): datetime64[M] period dates, origination first; only read for Actual day counts.
+    original_balance (float): Balance disbursed at origination.
+    note_rate (float): Annual note rate (decimal).
+    day_count_method (str): One of "30/360", "Actual/360", "Actual/365".
+    interest_only_period (int): Number of interest-only months from origination.
+    amortization_period (int): Amortization term in months, 0 for interest-only loans.
+    monthly_payment (float): Level payment applied in amortizing periods.
+
+    Returns:
+    np.ndarray: float64 balances shaped like rows.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if (interest_only_period == 0 and amortization_period == 0) or not rows.size:
+        return np.full(rows.shape, float(original_balance))
+
+    if day_count_method == "30/360":
+        amortized = np.maximum(rows - interest_only_period, 0).astype(np.float64)
+        return annuity_balance(amortized, original_balance, note_rate * (30.0 / 360), monthly_payment)
+
+    last = int(rows.max())
+    accrual = note_rate * day_count_fractions(grid[:last + 1], day_count_method)
+    amortizing = np.arange(last) >= interest_only_period
+    growth = np.where(amortizing, 1.0 + accrual, 1.0)
+    payments = np.where(amortizing, monthly_payment, 0.0)
+    cumulative_growth = np.concatenate(([1.0], np.cumprod(growth)))
+    discounted_payments = np.concatenate(([0.0], np.cumsum(payments / cumulative_growth[1:])))
+    balances = cumulative_growth[rows] * (original_balance - discounted_payments[rows])
+    balances[rows == 0] = original_balance
+    return balances
+
+
+class AmortizationSchedule:
+    """Column arrays for a loan schedule. Row 0 is the disbursement, rows 1..n are the monthly periods."""
+
+    def __init__(self, grid: np.ndarray, beginning_balance: np.ndarray, interest: np.ndarray,
+                 principal: np.ndarray, payment: np.ndarray, ending_balance: np.ndarray):
+        self.grid = grid
+        self.beginning_balance = beginning_balance
+        self.interest = interest
+        self.principal = principal
+        self.payment = payment
+        self.ending_balance = ending_balance
+        self.first_date = grid[0].astype('datetime64[D]').astype(object)
+        self.last_date = grid[-1].astype('datetime64[D]').astype(object)
+        self._records = None
+        self._unsecured_records = None
+
+    def __len__(self):
+        return len(self.grid)
+
+    def row_index(self, as_of_date: date) -> Optional[int]:
+        """
+        O(1) lookup of the last row dated on or before as_of_date.
+
+        Returns None when as_of_date falls before the first row or after the last row.
+        """
+        if as_of_date < self.first_date or as_of_date > self.last_date:
+            return None
+        return (as_of_date.year - self.first_date.year) * 12 + as_of_date.month - self.first_date.month
+
+    def balance_at(self, as_of_date: date) -> float:
+        """Ending balance of the row covering as_of_date, or 0 outside the schedule."""
+        idx = self.row_index(as_of_date)
+        if idx is None:
+            return 0
+        return float(self.ending_balance[idx])
+
+    @property
+    def dates(self) -> List[date]:
+        return to_dates(self.grid)
+
+    def to_records(self) -> List[Dict[str, float]]:
+        """Rows in the format historically returned by Loan.get_schedule."""
+        if self._records is None:
+            self._records = self._build_records()
+        return self._records
+
+    def to_unsecured_records(self) -> List[Dict[str, float]]:
+        """Rows in the format historically returned by Loan.get_unsecured_schedule."""
+        if self._unsecured_records is None:
+            self._unsecured_records = self._build_unsecured_records()
+        return self._unsecured_records
+
+    def iter_records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, float]]:
+        """Rows start to stop - 1 in the to_records format, created one at a time."""
+        stop = len(self.grid) if stop is None else min(stop, len(self.grid))
+        for row in range(start, stop):
+            yield {
+                'date': self.grid[row].astype('datetime64[D]').astype(object),
+                'Beginning Balance': self.beginning_balance[row].item(),
+                'Interest Expense': self.interest[row].item(),
+                'Principal Payments': self.principal[row].item(),
+                'Total Payment': self.payment[row].item(),
+                'Ending Balance': self.ending_balance[row].item()
+            }
+
+    def _build_records(self) -> List[Dict[str, float]]:
+        return [
+            {
+                'date': d,
+                'Beginning Balance': bb,
+                'Interest Expense': i,
+                'Principal Payments': p,
+                'Total Payment': pmt,
+                'Ending Balance': eb
+            }
+            for d, bb, i, p, pmt, eb in zip(
+                self.dates,
+                self.beginning_balance.tolist(),
+                self.interest.tolist(),
+                self.principal.tolist(),
+                self.payment.tolist(),
+                self.ending_balance.tolist()
+            )
+        ]
+
+    def _build_unsecured_records(self) -> List[Dict[str, float]]:
+        repayment = np.zeros(len(self.grid))
+        if len(self.grid) > 1:
+            repayment[-1] = -self.ending_balance[-1]
+        loan_proceeds = np.zeros(len(self.grid))
+        loan_proceeds[0] = self.beginning_balance[0]
+        return [
+            {
+                'date': d,
+                'Adjusted Loan Proceeds': lp,
+                'Adjusted Interest Expense': i,
+                'Adjusted Principal Payments': p,
+                'Adjusted Debt Scheduled Repayment': r
+            }
+            for d, lp, i, p, r in zip(
+                self.dates,
+                loan_proceeds.tolist(),
+                (-self.interest).tolist(),
+                (-self.principal).tolist(),
+                repayment.tolist()
+            )
+        ]
+
+
+def build_schedule(
+    grid: np.ndarray,
+    original_balance: float,
+    period_rates: np.ndarray,
+    day_count_method: str,
+    interest_only_period: int,
+    amortization_period: int,
+    monthly_payment: float
+) -> AmortizationSchedule:
+    """
+    Compute a full loan schedule in one vectorized pass.
+
+    Each period's ending balance follows b[k+1] = b[k] * g[k] - P[k], where g[k] is the accrual
+    growth factor in amortizing periods (1 in interest-only periods) and P[k] the level payment.
+    The recursion is solved in closed form with a cumulative product of the growth factors.
+
+    Parameters:
+    grid (np.ndarray): datetime64[M] period dates, origination first.
+    original_balance (float): Balance disbursed at origination.
+    period_rates (np.ndarray): Annual note rate (decimal) applied to each period, len(grid) - 1.
+    day_count_method (str): One of "30/360", "Actual/360", "Actual/365".
+    interest_only_period (int): Number of interest-only months from origination.
+    amortization_period (int): Amortization term in months, 0 for interest-only loans.
+    monthly_payment (float): Level payment applied in amortizing periods.
+
+    Returns:
+    AmortizationSchedule: Schedule columns including the disbursement row.
+    """
+    n = len(grid) - 1
+    accrual = np.asarray(period_rates, dtype=np.float64) * day_count_fractions(grid, day_count_method)
+
+    amortizing = np.arange(n) >= interest_only_period
+    if interest_only_period == 0 and amortization_period == 0:
+        amortizing[:] = False
+
+    growth = np.where(amortizing, 1.0 + accrual, 1.0)
+    payments = np.where(amortizing, monthly_payment, 0.0)
+
+    # b[k] = G[k] * (b0 - sum_{j<k} P[j] / G[j+1]) with G[k] = prod_{i<k} g[i]
+    cumulative_growth = np.concatenate(([1.0], np.cumprod(growth)))
+    discounted_payments = np.concatenate(([0.0], np.cumsum(payments / cumulative_growth[1:])))
+    balance = cumulative_growth * (original_balance - discounted_payments)
+    balance[0] = original_balance
+
+    interest = balance[:-1] * accrual
+    principal = np.where(amortizing, payments - interest, 0.0)
+    payment = np.where(amortizing, payments, interest)
+
+    beginning_balance = np.concatenate(([original_balance], balance[:-1]))
+    return AmortizationSchedule(
+        grid=grid,
+        beginning_balance=beginning_balance,
+        interest=np.concatenate(([0.0], interest)),
+        principal=np.concatenate(([0.0], principal)),
+        payment=np.concatenate(([-original_balance], payment)),
+        ending_balance=balance
+    )
+
+
+def iter_schedule(
+    grid: np.ndarray,
+    original_balance: float,
+    period_rates: np.ndarray,
+    day_count_method: str,
+    interest_only_period: int,
+    amortization_period: int,
+    monthly_payment: float,
+    start: int = 0
+) -> Iterator[Dict[str, float]]:
+    """
+    Yield the rows of build_schedule one at a time, in the to_records format, from row start.
+
+    period_rates may cover only the first periods of the grid; the rows stop after the last
+    period it covers, so a caller bounded by an analysis end prices only the months up to it.
+    The balance entering row start is reached in closed form, b[k] = G[k] * (b0 - sum_{j<k} P[j] / G[j+1]),
+    from the skipped periods' growth factors rather than by building their rows. Every value is
+    computed with the same operations as build_schedule, so the rows are equal bit for bit.
+
+    Parameters:
+    grid (np.ndarray): datetime64[M] period dates, origination first.
+    original_balance (float): Balance disbursed at origination.
+    period_rates (np.ndarray): Annual note rate (decimal) of each period, for up to len(grid) - 1 periods.
+    day_count_method (str): One of "30/360", "Actual/360", "Actual/365".
+    interest_only_period (int): Number of interest-only months from origination.
+    amortization_period (int): Amortization term in months, 0 for interest-only loans.
+    monthly_payment (float): Level payment applied in amortizing periods.
+    start (int): First row to yield; row 0 is the disbursement.
+    """
+    n = min(len(grid) - 1, len(period_rates))
+    if start > n:
+        return
+    accrual = np.asarray(period_rates[:n], dtype=np.float64) * day_count_fractions(grid[:n + 1], day_count_method)
+
+    amortizing = np.arange(n) >= interest_only_period
+    if interest_only_period == 0 and amortization_period == 0:
+        amortizing[:] = False
+    growth = np.where(amortizing, 1.0 + accrual, 1.0)
+    payments = np.where(amortizing, monthly_payment, 0.0)
+
+    # Cumulative growth and discounted payments entering the period before row start
+    skipped = max(start - 1, 0)
+    cumulative_growth, discounted_payments, balance = 1.0, 0.0, original_balance
+    if skipped:
+        prefix_growth = np.cumprod(growth[:skipped])
+        cumulative_growth = prefix_growth[-1].item()
+        discounted_payments = np.cumsum(payments[:skipped] / prefix_growth)[-1].item()
+        balance = cumulative_growth * (original_balance - discounted_payments)
+
+    dates = to_dates(grid[start:n + 1])
+    if start == 0:
+        yield {
+            'date': dates[0],
+            'Beginning Balance': original_balance,
+            'Interest Expense': 0.0,
+            'Principal Payments': 0.0,
+            'Total Payment': -original_balance,
+            'Ending Balance': original_balance
+        }
+
+    # The yielded periods as Python floats, read one row at a time
+    first = max(start, 1) - 1
+    periods = zip(dates[1:] if start == 0 else dates, growth[first:].tolist(), payments[first:].tolist(),
+                  accrual[first:].tolist(), amortizing[first:].tolist())
+    for d, period_growth, period_payment, period_accrual, period_amortizing in periods:
+        cumulative_growth *= period_growth
+        discounted_payments += period_payment / cumulative_growth
+        ending_balance = cumulative_growth * (original_balance - discounted_payments)
+        interest = balance * period_accrual
+        if period_amortizing:
+            principal, payment = period_payment - interest, period_payment
+        else:
+            principal, payment = 0.0, interest
+        yield {
+            'date': d,
+            'Beginning Balance': balance,
+            'Interest Expense': interest,
+            'Principal Payments': principal,
+            'Total Payment': payment,
+            'Ending Balance': ending_balance
+        }
+        balance = ending_balance
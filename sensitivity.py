@@ -0,0 +1,199 @@
+"""
+Sensitivity grids over sale timing, sale price, NOI and interest rates.
+
+sensitivity_grid() evaluates every combination of the given axes for a property or a portfolio
+and returns one row per grid point with its IRR, equity multiple and minimum DSCR.
+
+Each property is evaluated once, as if never sold, and its hold-period cash flows are split into
+NOI, debt service, flows that stop at the sale and flows that do not. Its loan schedules are
+solved once for all rate shocks together. A grid point is then a recombination of those parts:
+flows are cut off after the shifted sale month, NOI is scaled, the shocked debt service and loan
+balances are swapped in, and sale proceeds less the loan payoff are placed on the sale month.
+"""
+import copy
+import itertools
+from datetime import date
+from typing import Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from loanbook import LoanBook
+from months import to_month, to_months
+from property import Property
+from portfolio import Portfolio
+from returns import equity_multiple, irr
+
+# The sale date Property uses for properties that are not sold
+NO_SALE = date(2100, 12, 1)
+
+
+def _unsold(property: 'Property') -> 'Property':
+    """A copy of the property with its sale removed, sharing everything but the ownership series."""
+    unsold = copy.copy(property)
+    unsold.ownership_share_series = property.ownership_share_series.copy()
+    unsold.sale_date = NO_SALE
+    return unsold
+
+
+def _on_axis(frame: pd.DataFrame, column: str, start_month: int, months: int) -> np.ndarray:
+    """A frame column summed onto the window's month axis; rows outside the window are dropped."""
+    values = np.zeros(months)
+    offsets = to_months(frame.index) - start_month
+    inside = (offsets >= 0) & (offsets < months)
+    np.add.at(values, offsets[inside], frame[column].to_numpy(dtype=np.float64)[inside])
+    return values
+
+
+def _loan_paths(property: 'Property', rate_shocks: np.ndarray, start_month: int, months: int):
+    """
+    Change in raw debt service and the raw loan balance by window month under each rate shock,
+    both shaped (shocks x months).
+    """
+    shock_count = len(rate_shocks)
+    if not property.loans:
+        return np.zeros((shock_count, months)), np.zeros((shock_count, months))
+    book = LoanBook.from_loans(property.loans)
+    book_months = book.calendar()
+    periods = book.periods(book_months)
+    sofr = book.period_sofr(book_months)
+
+    # Fixed loans keep their note rate; floating loans take their own SOFR curve plus spread, shifted by each shock
+    shocks = np.concatenate(([0.0], rate_shocks))
+    floating = book.floating[None, :, None]
+    rates = np.where(floating, sofr[None, :, :] + (book.spread / 100)[None, :, None] + shocks[:, None, None], book.note_rate[None, :, None])
+    accrual = book.year_fractions(book_months)[None, :, :] * rates
+    interest, principal, _, balance = book.solve(accrual, periods)
+    debt_service = (interest + principal).sum(axis=1)
+    balance = balance.sum(axis=1)
+
+    # Book columns on the window axis
+    offsets = book_months.astype(np.int64) - start_month
+    inside = (offsets >= 0) & (offsets < months)
+    debt_service_change = np.zeros((shock_count, months))
+    balances = np.zeros((shock_count, months))
+    debt_service_change[:, offsets[inside]] = (debt_service[1:] - debt_service[:1])[:, inside]
+    balances[:, offsets[inside]] = balance[1:, inside]
+    return debt_service_change, balances
+
+
+def _forward_noi(property: 'Property', sale_months: np.ndarray) -> np.ndarray:
+    """
+    Unadjusted NOI of the twelve months after each sale month, annualized from the months the
+    NOI/CapEx data covers, or from the twelve months before the sale when it covers none after.
+    """
+    forward = np.full(len(sale_months), np.nan)
+    if property.noi_capex is None or property.noi_capex.empty:
+        return forward
+    noi = property.noi_capex['Net Operating Income']
+    months = to_months(noi.index)
+    values = noi.to_numpy(dtype=np.float64)
+    for i, sale_month in enumerate(sale_months):
+        for first, last in ((sale_month + 1, sale_month + 12), (sale_month - 11, sale_month)):
+            covered = (months >= first) & (months <= last)
+            if covered.any():
+                forward[i] = values[covered].sum() * 12 / len(np.unique(months[covered]))
+                break
+    return forward
+
+
+def sensitivity_grid(target: Union['Portfolio', 'Property'], sale_offsets: Sequence[int] = (0,),
+                     sale_price_scales: Optional[Sequence[float]] = None, exit_caps: Optional[Sequence[float]] = None,
+                     noi_scales: Sequence[float] = (1.0,), rate_shocks: Sequence[float] = (0.0,),
+                     start_date: Optional[date] = None, end_date: Optional[date] = None,
+                     executor: Optional[str] = None, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Evaluate the Cartesian grid of the given axes for a property or a portfolio.
+
+    The grid's cash flows are the properties' combined hold-period cash flows in the analysis
+    window, so the window should cover the acquisitions for the IRR to be meaningful. Min DSCR
+    is the lowest monthly ratio of the properties' NOI to their own debt service.
+
+    Parameters:
+    target (Portfolio or Property): What to evaluate. A property uses its own analysis window.
+    sale_offsets (Sequence[int]): Months to move each sold property's sale date; unsold properties stay unsold.
+    sale_price_scales (Sequence[float]): Multipliers on each property's sale price.
+    exit_caps (Sequence[float]): Exit cap rates, pricing each sale at the forward twelve months of
+        NOI (after the NOI scale) divided by the cap rate. Give this or sale_price_scales, not both.
+    noi_scales (Sequence[float]): Multipliers on NOI.
+    rate_shocks (Sequence[float]): Parallel shifts of SOFR for floating loans, as decimals (0.01 is +100bp).
+    start_date (date): Analysis start, the target's by default.
+    end_date (date): Analysis end, the target's by default.
+    executor (str): Executor for the one evaluation of each property, the portfolio's by default.
+    max_workers (int): Worker count for that executor.
+
+    Returns:
+    pd.DataFrame: One row per grid point with the axis values, IRR, Equity Multiple and Min DSCR.
+    """
+    if sale_price_scales is not None and exit_caps is not None:
+        raise ValueError("Give either sale_price_scales or exit_caps, not both.")
+    if isinstance(target, Property):
+        target = Portfolio(name=target.name, start_date=target.analysis_start_date, end_date=target.analysis_end_date, properties=[target])
+    start_date = start_date or target.start_date
+    end_date = end_date or target.end_date
+
+    price_column = 'Exit Cap' if exit_caps is not None else 'Sale Price Scale'
+    prices = np.asarray(exit_caps if exit_caps is not None else (sale_price_scales or (1.0,)), dtype=np.float64)
+    offsets = np.asarray(sale_offsets, dtype=np.int64)
+    noi_scale = np.asarray(noi_scales, dtype=np.float64)
+    shocks = np.asarray(rate_shocks, dtype=np.float64)
+
+    start_month = to_month(start_date)
+    months = max(to_month(end_date) - start_month + 1, 0)
+    t = np.arange(months)
+
+    # Property totals by axis: flows cut off at the sale, NOI, debt service and the sale-month amounts
+    other = np.zeros((len(offsets), months))
+    noi = np.zeros((len(offsets), months))
+    debt_service = np.zeros((len(shocks), len(offsets), months))
+    sale = np.zeros((len(offsets), len(prices), len(noi_scale), len(shocks), months))
+    uncut = np.zeros(months)
+
+    properties = target.properties
+    frames = target._map_cash_flows([_unsold(p) for p in properties], start_date, end_date, executor, max_workers)
+    for property, frame in zip(properties, frames):
+        share = _on_axis(frame[~frame.index.duplicated()], 'Ownership Share', start_month, months)
+        property_noi = _on_axis(frame, 'Adjusted Net Operating Income', start_month, months)
+        property_debt_service = _on_axis(frame, 'Adjusted Interest Expense', start_month, months) + _on_axis(frame, 'Adjusted Principal Payments', start_month, months)
+        buyout = _on_axis(frame, 'Adjusted Partner Buyout', start_month, months)
+        rest = _on_axis(frame, 'Total Cash Flow', start_month, months) - property_noi - property_debt_service - buyout
+        debt_service_change, balances = _loan_paths(property, shocks, start_month, months)
+
+        # A buyout is written on its own date even after a sale, so it is never cut off
+        uncut += buyout
+        sold = property.sale_date is not None and property.sale_date != NO_SALE
+        sale_months = to_month(property.sale_date) + offsets - start_month if sold else np.full(len(offsets), months)
+        held = t[None, :] <= sale_months[:, None]
+        other += rest * held
+        noi += property_noi * held
+        debt_service += (property_debt_service - debt_service_change * share)[:, None, :] * held[None, :, :]
+
+        if not sold:
+            continue
+        if exit_caps is not None:
+            forward = np.nan_to_num(_forward_noi(property, sale_months + start_month))
+            price = forward[:, None, None] * noi_scale[None, None, :] / prices[None, :, None]
+        else:
+            price = np.broadcast_to((property.sale_price or 0) * prices[None, :, None], (len(offsets), len(prices), len(noi_scale)))
+        for i, sale_month in enumerate(sale_months):
+            if 0 <= sale_month < months:
+                payoff = balances[:, sale_month] * share[sale_month]
+                sale[i, :, :, :, sale_month] += price[i][:, :, None] * share[sale_month] - payoff[None, None, :]
+
+    # Every grid point's monthly cash flow: (offsets, prices, noi scales, shocks, months)
+    cash_flows = (
+        other[:, None, None, None, :]
+        + noi[:, None, None, None, :] * noi_scale[None, None, :, None, None]
+        + debt_service.transpose(1, 0, 2)[:, None, None, :, :]
+        + sale
+        + uncut
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dscr = noi[:, None, None, :] * noi_scale[None, :, None, None] / -debt_service.transpose(1, 0, 2)[:, None, :, :]
+    dscr = np.where(debt_service.transpose(1, 0, 2)[:, None, :, :] < 0, dscr, np.inf).min(axis=-1)
+    dscr = np.where(np.isinf(dscr), np.nan, dscr)
+
+    flat = cash_flows.reshape(-1, months)
+    grid = pd.DataFrame(list(itertools.product(offsets, prices, noi_scale, shocks)), columns=['Sale Offset', price_column, 'NOI Scale', 'Rate Shock'])
+    grid['IRR'] = irr(flat)
+    grid['Equity Multiple'] = equity_multiple(flat)
+    grid['Min DSCR'] = np.broadcast_to(dscr[:, None, :, :], (len(offsets), len(prices), len(noi_scale), len(shocks))).reshape(-1)
+    return grid
@@ -0,0 +1,255 @@
+"""
+Lossless portfolio snapshots stored as Arrow IPC files.
+
+A snapshot is a directory with one uncompressed Arrow file per table, read back through memory maps:
+
+    properties.arrow     one row per property, in portfolio order; portfolio settings in the schema metadata
+    ownership.arrow      ownership share series that differ from the property's default series
+    loans.arrow          one row per distinct Loan object, secured or unsecured
+    property_loans.arrow which loans each property carries, in order
+    noi_capex.arrow      the NOI/CapEx rows of every property
+    capital_flows.arrow  the portfolio's capital calls and redemptions
+
+Loans shared by several properties stay shared after loading. Rate providers are runtime settings and
+are not stored; loaded floating loans use the default provider.
+"""
+import json
+import os
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from loan import Loan
+from property import Property
+from portfolio import Portfolio
+from ownership import OwnershipSeries
+
+FORMAT_VERSION = 1
+
+PROPERTY_FIELDS = [
+    'property_id', 'name', 'address', 'property_type', 'square_footage', 'year_built', 'purchase_price',
+    'current_value', 'sale_price', 'ownership_share', 'buyout_amount'
+]
+PROPERTY_DATES = ['purchase_date', 'analysis_start_date', 'analysis_end_date', 'sale_date', 'buyout_date']
+LOAN_FIELDS = [
+    'loan_id', 'original_balance', 'note_rate', 'interest_only_period', 'amortization_period',
+    'day_count_method', 'fixed_floating', 'spread'
+]
+LOAN_DATES = ['origination_date', 'maturity_date']
+NOI_CAPEX_COLUMNS = ['Net Operating Income', 'Capital Expenditures']
+CAPITAL_FLOW_COLUMNS = ['Capital Call', 'Redemption Payment']
+
+
+def _write_table(table: pa.Table, path: str):
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_table(path: str) -> pa.Table:
+    """Read an Arrow file through a memory map, so column buffers are not copied."""
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _dates(values: List[Optional[date]]) -> pa.Array:
+    return pa.array(values, type=pa.date32())
+
+
+def _date_values(column: pa.ChunkedArray) -> np.ndarray:
+    """A date32 column as an object array of datetime.date."""
+    return column.to_numpy().astype('datetime64[D]').astype(object)
+
+
+def _frame_table(df: pd.DataFrame, columns: List[str], position: Optional[np.ndarray] = None) -> pa.Table:
+    """A date-indexed frame as a table, with the index name kept in the schema metadata."""
+    data = {} if position is None else {'position': pa.array(position, type=pa.int64())}
+    data['Date'] = _dates(list(df.index))
+    for column in columns:
+        data[column] = pa.array(pd.to_numeric(df[column]).to_numpy(dtype=np.float64))
+    return pa.table(data).replace_schema_metadata({'index_name': json.dumps(df.index.name)})
+
+
+def _table_frame(table: pa.Table, columns: List[str]) -> pd.DataFrame:
+    index_name = json.loads(table.schema.metadata[b'index_name'])
+    return pd.DataFrame(
+        {column: table.column(column).to_numpy() for column in columns},
+        index=pd.Index(_date_values(table.column('Date')), name=index_name)
+    )
+
+
+def save_snapshot(portfolio: 'Portfolio', path: str):
+    """
+    Write a portfolio to a snapshot directory, replacing any snapshot already there.
+
+    Parameters:
+    portfolio (Portfolio): The portfolio to store.
+    path (str): Snapshot directory, created if needed.
+    """
+    os.makedirs(path, exist_ok=True)
+    properties = portfolio.properties
+
+    # Every distinct Loan object gets one row, so shared loans are stored once
+    loan_keys: Dict[int, int] = {}
+    loans: List['Loan'] = []
+
+    def loan_key(loan: 'Loan') -> int:
+        if id(loan) not in loan_keys:
+            loan_keys[id(loan)] = len(loans)
+            loans.append(loan)
+        return loan_keys[id(loan)]
+
+    # A property that was never re-shared gets its ownership series back from the constructor
+    custom_ownership = [p.ownership_share_series != p.default_ownership_share_series() for p in properties]
+
+    links = [(position, loan_key(loan)) for position, property in enumerate(properties) for loan in property.loans]
+    unsecured = [loan_key(loan) for loan in portfolio.unsecured_loans]
+
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'name': portfolio.name,
+        'start_date': portfolio.start_date.isoformat(),
+        'end_date': portfolio.end_date.isoformat(),
+        'beg_cash': portfolio.beg_cash,
+        'executor': portfolio.executor,
+        'max_workers': portfolio.max_workers,
+        'unsecured_loans': unsecured
+    }
+    property_data = {field: pa.array([getattr(p, field) for p in properties]) for field in PROPERTY_FIELDS}
+    property_data.update({field: _dates([getattr(p, field) for p in properties]) for field in PROPERTY_DATES})
+    property_data['custom_ownership'] = pa.array(custom_ownership, type=pa.bool_())
+    property_data['has_noi_capex'] = pa.array([p.noi_capex is not None for p in properties], type=pa.bool_())
+    properties_table = pa.table(property_data).replace_schema_metadata({'portfolio': json.dumps(metadata)})
+    _write_table(properties_table, os.path.join(path, 'properties.arrow'))
+
+    ownership = [
+        (position, d, share)
+        for position, p in enumerate(properties) if custom_ownership[position]
+        for d, share in p.ownership_share_series.items()
+    ]
+    _write_table(pa.table({
+        'position': pa.array([row[0] for row in ownership], type=pa.int64()),
+        'Date': _dates([row[1] for row in ownership]),
+        'share': pa.array([row[2] for row in ownership], type=pa.float64())
+    }), os.path.join(path, 'ownership.arrow'))
+
+    loan_data = {field: pa.array([getattr(loan, field) for loan in loans]) for field in LOAN_FIELDS}
+    loan_data.update({field: _dates([getattr(loan, field) for loan in loans]) for field in LOAN_DATES})
+    _write_table(pa.table(loan_data), os.path.join(path, 'loans.arrow'))
+
+    _write_table(pa.table({
+        'position': pa.array([link[0] for link in links], type=pa.int64()),
+        'loan': pa.array([link[1] for link in links], type=pa.int64())
+    }), os.path.join(path, 'property_loans.arrow'))
+
+    frames = [p.noi_capex for p in properties if p.noi_capex is not None]
+    positions = [np.full(len(p.noi_capex), position) for position, p in enumerate(properties) if p.noi_capex is not None]
+    noi_capex = pd.concat(frames) if frames else pd.DataFrame(columns=NOI_CAPEX_COLUMNS)
+    position = np.concatenate(positions) if positions else np.array([], dtype=np.int64)
+    _write_table(_frame_table(noi_capex, NOI_CAPEX_COLUMNS, position), os.path.join(path, 'noi_capex.arrow'))
+
+    _write_table(_frame_table(portfolio.capital_flows, CAPITAL_FLOW_COLUMNS), os.path.join(path, 'capital_flows.arrow'))
+
+
+def load_snapshot(path: str) -> 'Portfolio':
+    """
+    Read a portfolio written by save_snapshot.
+
+    Parameters:
+    path (str): Snapshot directory.
+
+    Returns:
+    Portfolio: The stored portfolio, with its properties, loans, NOI/CapEx and capital flows.
+    """
+    properties_table = _read_table(os.path.join(path, 'properties.arrow'))
+    metadata = json.loads(properties_table.schema.metadata[b'portfolio'])
+    if metadata['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {metadata['format_version']}.")
+
+    loans_table = _read_table(os.path.join(path, 'loans.arrow'))
+    loan_columns = {field: loans_table.column(field).to_pylist() for field in LOAN_FIELDS + LOAN_DATES}
+    loans = []
+    for i in range(loans_table.num_rows):
+        loan = Loan(
+            loan_id=loan_columns['loan_id'][i],
+            origination_date=loan_columns['origination_date'][i],
+            maturity_date=loan_columns['maturity_date'][i],
+            original_balance=loan_columns['original_balance'][i],
+            note_rate=loan_columns['note_rate'][i] * 100,
+            interest_only_period=loan_columns['interest_only_period'][i],
+            amortization_period=loan_columns['amortization_period'][i],
+            day_count_method=loan_columns['day_count_method'][i],
+            fixed_floating=loan_columns['fixed_floating'][i],
+            spread=loan_columns['spread'][i]
+        )
+        # Restore the stored decimal rate exactly rather than relying on the percent round trip
+        loan.note_rate = loan_columns['note_rate'][i]
+        loan.monthly_payment = loan._calculate_monthly_payment()
+        loans.append(loan)
+
+    links = _read_table(os.path.join(path, 'property_loans.arrow'))
+    property_loans: Dict[int, List['Loan']] = {}
+    for position, key in zip(links.column('position').to_pylist(), links.column('loan').to_pylist()):
+        property_loans.setdefault(position, []).append(loans[key])
+
+    columns = {field: properties_table.column(field).to_pylist() for field in PROPERTY_FIELDS + PROPERTY_DATES}
+    custom_ownership = properties_table.column('custom_ownership').to_pylist()
+    has_noi_capex = properties_table.column('has_noi_capex').to_pylist()
+    properties = []
+    for i in range(properties_table.num_rows):
+        property = Property(
+            property_id=columns['property_id'][i],
+            name=columns['name'][i],
+            address=columns['address'][i],
+            property_type=columns['property_type'][i],
+            square_footage=columns['square_footage'][i],
+            year_built=columns['year_built'][i],
+            purchase_price=columns['purchase_price'][i],
+            purchase_date=columns['purchase_date'][i],
+            analysis_start_date=columns['analysis_start_date'][i],
+            analysis_end_date=columns['analysis_end_date'][i],
+            current_value=columns['current_value'][i],
+            sale_date=columns['sale_date'][i],
+            sale_price=columns['sale_price'][i],
+            loans=property_loans.get(i, []),
+            ownership_share=columns['ownership_share'][i],
+            buyout_date=columns['buyout_date'][i],
+            buyout_amount=columns['buyout_amount'][i]
+        )
+        properties.append(property)
+
+    ownership = _read_table(os.path.join(path, 'ownership.arrow'))
+    entries = {i: ([], []) for i in range(len(properties)) if custom_ownership[i]}
+    for position, d, share in zip(ownership.column('position').to_pylist(), _date_values(ownership.column('Date')),
+                                  ownership.column('share').to_pylist()):
+        entries[position][0].append(d)
+        entries[position][1].append(share)
+    for position, (dates, shares) in entries.items():
+        properties[position].ownership_share_series = OwnershipSeries.from_items(dates, shares)
+
+    # Rows are stored grouped by property, so each property's frame is one slice
+    noi_capex = _read_table(os.path.join(path, 'noi_capex.arrow'))
+    position = noi_capex.column('position').to_numpy()
+    frame = _table_frame(noi_capex, NOI_CAPEX_COLUMNS)
+    bounds = np.searchsorted(position, np.arange(len(properties) + 1))
+    for i, property in enumerate(properties):
+        if has_noi_capex[i]:
+            property.noi_capex = frame.iloc[bounds[i]:bounds[i + 1]]
+
+    portfolio = Portfolio(
+        name=metadata['name'],
+        start_date=date.fromisoformat(metadata['start_date']),
+        end_date=date.fromisoformat(metadata['end_date']),
+        properties=properties,
+        unsecured_loans=[loans[key] for key in metadata['unsecured_loans']],
+        beg_cash=metadata['beg_cash'],
+        executor=metadata['executor'],
+        max_workers=metadata['max_workers']
+    )
+
+    capital_flows = _read_table(os.path.join(path, 'capital_flows.arrow'))
+    if capital_flows.num_rows:
+        # Appended the way Portfolio.add_capital_flows builds the frame, so the dtypes match too
+        portfolio.capital_flows = pd.concat([portfolio.capital_flows, _table_frame(capital_flows, CAPITAL_FLOW_COLUMNS)])
+    return portfolio
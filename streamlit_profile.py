@@ -0,0 +1,39 @@
+import json
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import pandas as pd
+import streamlit as st
+from profiling import Profile, profile
+
+
+@contextmanager
+def page_profile(name: str) -> Iterator[Optional[Profile]]:
+    """
+    Profile the page body when 'Profile this run' is ticked in the sidebar, then show its timing panel.
+
+    The profile belongs to this session's script thread only, and is stopped when the body ends,
+    including through an exception, st.stop() or st.rerun(); the panel is shown only after a
+    body that finished.
+    """
+    if not st.sidebar.checkbox('Profile this run', key='profile_run', help='Time loan schedules, cash flows, reports and the SOFR fetch'):
+        yield None
+        return
+    with profile(name) as run:
+        yield run
+    show_timing_panel(run)
+
+
+def show_timing_panel(profile: Optional[Profile]):
+    """Show a stopped profile's timers and counters in an expander, with a JSON download."""
+    if profile is None:
+        return
+    if profile.elapsed is None:
+        profile.stop()
+    with st.expander(f"Timing: {profile.elapsed:.2f}s"):
+        summary = profile.summary()
+        st.dataframe(summary.style.format({'total_s': '{:.3f}', 'mean_ms': '{:.2f}', 'max_ms': '{:.2f}', 'share': '{:.1%}'}),
+                     use_container_width=True)
+        if profile.counters:
+            st.dataframe(pd.Series(profile.counters, name='count').rename_axis('counter'), use_container_width=True)
+        st.download_button('Download profile JSON', json.dumps(profile.to_dict(), indent=2),
+                           file_name=f'{profile.name}_profile.json', mime='application/json')
@@ -0,0 +1,23 @@
+import streamlit as st
+from chatham import Chatham
+from rates import RateProvider, get_default_rate_provider, set_default_rate_provider
+
+
+class SessionStateRateProvider(RateProvider):
+    """Keeps the Chatham monthly curve in st.session_state.sofr so it is fetched once per session."""
+
+    def monthly_curve(self):
+        if 'sofr' not in st.session_state:
+            chatham = Chatham()
+            st.session_state.sofr = chatham.get_monthly_rates()
+            if chatham.error:
+                st.error(chatham.error)
+            elif not st.session_state.sofr:
+                st.warning("The SOFR curve is empty; floating-rate loans will accrue at their spread alone.")
+        return st.session_state.sofr
+
+
+def use_session_state_rates():
+    """Make the session-state curve the default for loans; called at the top of the app and each page."""
+    if not isinstance(get_default_rate_provider(), SessionStateRateProvider):
+        set_default_rate_provider(SessionStateRateProvider())
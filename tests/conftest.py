@@ -0,0 +1,19 @@
+import os
+import sys
+from datetime import date
+import pytest
+from dateutil.relativedelta import relativedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rates  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def flat_curve():
+    """A static upward-sloping SOFR curve from 2015, so floating loans never reach the network."""
+    previous = rates.get_default_rate_provider()
+    curve = {(date(2015, 1, 1) + relativedelta(months=m)).isoformat(): 0.03 + 0.0001 * m for m in range(360)}
+    rates.set_default_rate_provider(rates.StaticRateProvider(curve))
+    yield curve
+    rates.set_default_rate_provider(previous)
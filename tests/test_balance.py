@@ -0,0 +1,98 @@
+from datetime import date
+import numpy as np
+import pytest
+from dateutil.relativedelta import relativedelta
+from loan import Loan
+from schedule import fixed_rate_balances, month_grid
+
+DAY_COUNTS = ["30/360", "Actual/360", "Actual/365"]
+
+# (interest-only months, amortization months)
+TERMS = {
+    'interest only then level payment': (24, 0),
+    'amortizing after interest only': (12, 360),
+    'amortizing from the start': (0, 300),
+    'no amortization': (0, 0),
+}
+
+
+def iterative_balances(loan: Loan) -> dict:
+    """Ending balance by month start, stepping the loan one period at a time as the original get_schedule did."""
+    balances = {loan.origination_date: loan.original_balance}
+    current_date, balance = loan.origination_date, loan.original_balance
+    while current_date < loan.maturity_date:
+        next_date = min(current_date + relativedelta(months=1), loan.maturity_date)
+        interest = loan._calculate_interest(balance, current_date, next_date)
+        months_since_origination = (current_date.year - loan.origination_date.year) * 12 + current_date.month - loan.origination_date.month
+        if not (loan.interest_only_period == 0 and loan.amortization_period == 0) and months_since_origination >= loan.interest_only_period:
+            balance -= loan._calculate_monthly_payment() - interest
+        balances[next_date.replace(day=1)] = balance
+        current_date = next_date
+    return balances
+
+
+def expected_balance(loan: Loan, balances: dict, d: date) -> float:
+    if d < loan.origination_date or d > loan.maturity_date:
+        return 0.0
+    return balances[d.replace(day=1)]
+
+
+def query_dates(loan: Loan) -> list:
+    """Month starts and mid-months from a year before origination to a year after maturity."""
+    first = loan.origination_date - relativedelta(months=12)
+    months = [first + relativedelta(months=m) for m in range(loan.total_months + 25)]
+    return months + [d.replace(day=15) for d in months]
+
+
+@pytest.mark.parametrize('day_count_method', DAY_COUNTS)
+@pytest.mark.parametrize('terms', list(TERMS), ids=list(TERMS))
+def test_closed_form_balances_match_iterative_schedule(day_count_method, terms):
+    interest_only_period, amortization_period = TERMS[terms]
+    loan = Loan(
+        origination_date=date(2023, 3, 1), maturity_date=date(2033, 3, 1), original_balance=25_000_000, note_rate=6.25,
+        interest_only_period=interest_only_period, amortization_period=amortization_period,
+        day_count_method=day_count_method, loan_id='L1'
+    )
+    balances = iterative_balances(loan)
+    dates = query_dates(loan)
+    expected = np.array([expected_balance(loan, balances, d) for d in dates])
+
+    # The scalar path, before and after the schedule is cached, and the vectorized path
+    single = np.array([loan.get_current_balance(d) for d in dates])
+    vectorized = loan.balances_at(dates)
+    loan.get_schedule()
+    cached = np.array([loan.get_current_balance(d) for d in dates])
+
+    tolerance = 1e-12 * loan.original_balance
+    np.testing.assert_allclose(single, expected, rtol=0, atol=tolerance)
+    np.testing.assert_allclose(vectorized, expected, rtol=0, atol=tolerance)
+    np.testing.assert_allclose(cached, expected, rtol=0, atol=tolerance)
+    assert np.array_equal(single, vectorized)
+
+
+def test_balances_after_maturity_are_zero():
+    loan = Loan(origination_date=date(2020, 1, 1), maturity_date=date(2025, 1, 1), original_balance=1_000_000, note_rate=5,
+                amortization_period=360, day_count_method="Actual/365", loan_id='L2')
+    after = [date(2025, 1, 2), date(2025, 2, 1), date(2040, 6, 1)]
+    assert [loan.get_current_balance(d) for d in after] == [0, 0, 0]
+    assert not loan.balances_at(after).any()
+    assert loan.get_payoff_amount(date(2025, 2, 1)) == 0
+
+
+@pytest.mark.parametrize('day_count_method', DAY_COUNTS)
+def test_fixed_rate_balances_match_schedule_rows(day_count_method):
+    loan = Loan(origination_date=date(2024, 1, 1), maturity_date=date(2034, 1, 1), original_balance=10_000_000, note_rate=5.5,
+                interest_only_period=6, amortization_period=360, day_count_method=day_count_method, loan_id='L3')
+    rows = np.arange(loan.total_months + 1)
+    balances = fixed_rate_balances(
+        rows=rows,
+        grid=month_grid(loan.origination_date, loan.maturity_date) if day_count_method != "30/360" else None,
+        original_balance=loan.original_balance,
+        note_rate=loan.note_rate,
+        day_count_method=day_count_method,
+        interest_only_period=loan.interest_only_period,
+        amortization_period=loan.amortization_period,
+        monthly_payment=loan._calculate_monthly_payment()
+    )
+    expected = iterative_balances(loan)
+    np.testing.assert_allclose(balances, list(expected.values()), rtol=0, atol=1e-12 * loan.original_balance)
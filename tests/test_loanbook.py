@@ -0,0 +1,52 @@
+from datetime import date
+import numpy as np
+import pytest
+from dateutil.relativedelta import relativedelta
+from loan import Loan
+from loanbook import LoanBook
+
+DAY_COUNTS = ["30/360", "Actual/360", "Actual/365"]
+
+# (interest-only months, amortization months)
+TERMS = {
+    'interest only': (120, 0),
+    'amortizing after interest only': (24, 360),
+    'amortizing from the start': (0, 300),
+    'no amortization': (0, 0),
+}
+
+
+def make_loans(day_count_method: str, terms: str, fixed_floating: str) -> list:
+    """Loans of the same terms, originated months apart so the book's shared calendar offsets them."""
+    interest_only_period, amortization_period = TERMS[terms]
+    return [
+        Loan(
+            origination_date=date(2021, 1, 1) + relativedelta(months=7 * i),
+            maturity_date=date(2021, 1, 1) + relativedelta(months=7 * i + term),
+            original_balance=5_000_000 * (i + 1), note_rate=4.5 + i, interest_only_period=min(interest_only_period, term),
+            amortization_period=amortization_period, day_count_method=day_count_method,
+            fixed_floating=fixed_floating, spread=2.5, loan_id=f'L{i}'
+        )
+        for i, term in enumerate((60, 84, 120))
+    ]
+
+
+@pytest.mark.parametrize('fixed_floating', ['Fixed', 'Floating'])
+@pytest.mark.parametrize('day_count_method', DAY_COUNTS)
+@pytest.mark.parametrize('terms', list(TERMS), ids=list(TERMS))
+def test_book_matches_loan_schedules(terms, day_count_method, fixed_floating):
+    loans = make_loans(day_count_method, terms, fixed_floating)
+    schedule = LoanBook.from_loans(loans).compute()
+    columns = {d: j for j, d in enumerate(schedule.dates)}
+    active = schedule.active()
+
+    for row, loan in enumerate(loans):
+        records = loan.get_schedule()
+        positions = [columns[record['date']] for record in records]
+        tolerance = 1e-9 * loan.original_balance
+        for name, values in (('Interest Expense', schedule.interest), ('Principal Payments', schedule.principal), ('Ending Balance', schedule.balance)):
+            np.testing.assert_allclose(values[row, positions], [record[name] for record in records], rtol=0, atol=tolerance, err_msg=name)
+        # Columns outside the loan's schedule carry nothing
+        assert active[row].sum() == len(records)
+        outside = ~active[row]
+        assert not schedule.interest[row, outside].any() and not schedule.balance[row, outside].any()
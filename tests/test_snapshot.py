@@ -0,0 +1,40 @@
+from datetime import date
+import pandas as pd
+import pytest
+from benchmarks.generators import make_portfolio
+from loan import Loan
+from snapshot import load_snapshot, save_snapshot
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = make_portfolio(8, date(2025, 1, 1), 5, seed=3, loans_per_property=2, floating_share=0.5)
+    portfolio.beg_cash = 2_500_000
+    portfolio.properties[0].ownership_share = 1
+    portfolio.properties[1].set_ownership_steps({date(2026, 4, 1): 0.6, date(2027, 1, 15): 0.8})
+    portfolio.properties[2].loans.append(portfolio.properties[3].loans[0])
+    portfolio.add_unsecured_loan(Loan(
+        origination_date=date(2024, 6, 1), maturity_date=date(2029, 6, 1), original_balance=20_000_000, note_rate=5,
+        interest_only_period=12, amortization_period=300, day_count_method='Actual/360', fixed_floating='Floating',
+        spread=2, loan_id='U1'
+    ))
+    portfolio.add_capital_flows(pd.DataFrame({'Capital Call': [1_000_000.0], 'Redemption Payment': [0.0]}, index=[date(2025, 3, 1)]))
+    return portfolio
+
+
+def test_round_trip_keeps_cash_flows_and_content_hash(portfolio, tmp_path):
+    save_snapshot(portfolio, str(tmp_path))
+    loaded = load_snapshot(str(tmp_path))
+
+    pd.testing.assert_frame_equal(loaded.aggregate_hold_period_cash_flows(), portfolio.aggregate_hold_period_cash_flows())
+    assert loaded.content_hash() == portfolio.content_hash()
+    assert [p.content_hash() for p in loaded.properties] == [p.content_hash() for p in portfolio.properties]
+    assert loaded.beg_cash == portfolio.beg_cash
+
+
+def test_round_trip_keeps_shared_loans_shared(portfolio, tmp_path):
+    save_snapshot(portfolio, str(tmp_path))
+    loaded = load_snapshot(str(tmp_path))
+
+    assert loaded.properties[2].loans[-1] is loaded.properties[3].loans[0]
+    assert [loan.loan_id for loan in loaded.unsecured_loans] == ['U1']
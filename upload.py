@@ -1,68 +1,234 @@
 from loan import Loan
 from property import Property
+from portfolio import Portfolio
+from profiling import profiled
+import importlib.util
+import numpy as np
 import pandas as pd
 from datetime import date
+from typing import Dict, List, Optional, Tuple
 
-def load_properties_and_loans(file_path):
-    properties_df = pd.read_excel(file_path, sheet_name='Properties')
-    loans_df = pd.read_excel(file_path, sheet_name='Loans')
+# python-calamine is optional; when installed it reads workbooks several times faster than openpyxl
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
+REQUIRED_COLUMNS = {
+    'Properties': [
+        'Property ID', 'Name', 'Address', 'Property Type', 'Square Footage', 'Year Built', 'Purchase Price',
+        'Purchase Date', 'Analysis Start Date', 'Analysis End Date', 'Sale Date', 'Loan ID', 'Buyout Date'
+    ],
+    'Loans': ['Loan ID', 'Origination Date', 'Maturity Date', 'Original Balance', 'Note Rate'],
+    'Cashflows': ['Property ID', 'Date', 'Net Operating Income', 'Capital Expenditures'],
+}
+
+DAY_COUNT_METHODS = ["Actual/360", "Actual/365", "30/360"]
+
+
+@profiled('upload.read_workbook')
+def read_workbook(file_path, sheet_names: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Read the workbook sheets in one pd.read_excel call and check their columns.
+
+    Parameters:
+    file_path: Path or file-like object of the workbook.
+    sheet_names (List[str]): Sheets to read, all of Properties, Loans and Cashflows by default.
+
+    Returns:
+    Dict[str, pd.DataFrame]: One DataFrame per sheet name.
+    """
+    sheet_names = sheet_names or list(REQUIRED_COLUMNS)
+    try:
+        sheets = pd.read_excel(file_path, sheet_name=sheet_names, engine=EXCEL_ENGINE)
+    except ValueError as e:
+        raise ValueError(f"Workbook is missing a required sheet: {e}") from e
+    for name in sheet_names:
+        missing = [column for column in REQUIRED_COLUMNS[name] if column not in sheets[name].columns]
+        if missing:
+            raise ValueError(f"Sheet '{name}' is missing columns: {', '.join(missing)}")
+    return sheets
+
+
+def _invalid_rows(mask: pd.Series) -> str:
+    """Excel row numbers (header is row 1) of the rows flagged by mask."""
+    rows = (np.flatnonzero(mask.to_numpy()) + 2).tolist()
+    return ', '.join(map(str, rows[:10])) + (' ...' if len(rows) > 10 else '')
+
+
+def _dates(df: pd.DataFrame, column: str, sheet: str, required: bool = True) -> List[Optional[date]]:
+    """A date column as datetime.date values, None where the cell is empty."""
+    values = pd.to_datetime(df[column], errors='coerce')
+    empty = values.isna()
+    if required and empty.any():
+        raise ValueError(f"Sheet '{sheet}' has missing or invalid '{column}' in rows {_invalid_rows(empty)}")
+    days = values.to_numpy(dtype='datetime64[D]').astype(object)
+    days[empty.to_numpy()] = None
+    return days.tolist()
+
+
+def _numbers(df: pd.DataFrame, column: str, sheet: str) -> pd.Series:
+    values = pd.to_numeric(df[column], errors='coerce')
+    invalid = values.isna()
+    if invalid.any():
+        raise ValueError(f"Sheet '{sheet}' has missing or non-numeric '{column}' in rows {_invalid_rows(invalid)}")
+    return values
+
+
+def _months(df: pd.DataFrame, column: str) -> pd.Series:
+    """A whole-month count column, 0 where the cell or the column is empty."""
+    if column not in df.columns:
+        return pd.Series(0, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').fillna(0).astype(int)
+
+
+def _optional(df: pd.DataFrame, column: str, default=None) -> list:
+    """Column values as a list, or the default for every row when the column is absent."""
+    if column in df.columns:
+        return df[column].tolist()
+    return [default] * len(df)
+
+
+def build_loans(loans_df: pd.DataFrame) -> Dict[str, 'Loan']:
+    """Create a Loan for every row of the Loans sheet, keyed by loan ID."""
+    sheet = 'Loans'
+    original_balance = _numbers(loans_df, 'Original Balance', sheet)
+    note_rate = _numbers(loans_df, 'Note Rate', sheet)
+    interest_only_period = _months(loans_df, 'Interest Only Period')
+    amortization_period = _months(loans_df, 'Amortization Period')
+    day_count_method = loans_df['Day Count Method'].fillna('30/360') if 'Day Count Method' in loans_df.columns else pd.Series('30/360', index=loans_df.index)
+
+    invalid = ~day_count_method.isin(DAY_COUNT_METHODS)
+    if invalid.any():
+        raise ValueError(f"Sheet '{sheet}' has an invalid 'Day Count Method' in rows {_invalid_rows(invalid)}")
+    invalid = (interest_only_period < 0) | (amortization_period < 0)
+    if invalid.any():
+        raise ValueError(f"Sheet '{sheet}' has negative interest-only or amortization periods in rows {_invalid_rows(invalid)}")
 
     loans = {}
-    for _, row in loans_df.iterrows():
-        loan = Loan(
-            loan_id=row['Loan ID'],
-            origination_date=row['Origination Date'].date(),
-            maturity_date=row['Maturity Date'].date(),
-            original_balance=row['Original Balance'],
-            note_rate=row['Note Rate'],
-            interest_only_period=row.get('Interest Only Period'),
-            amortization_period=row.get('Amortization Period'),
-            day_count_method=row.get('Day Count Method', '30/360')
+    for loan_id, origination_date, maturity_date, balance, rate, io, amort, day_count in zip(
+        loans_df['Loan ID'].tolist(),
+        _dates(loans_df, 'Origination Date', sheet),
+        _dates(loans_df, 'Maturity Date', sheet),
+        original_balance.tolist(),
+        note_rate.tolist(),
+        interest_only_period.tolist(),
+        amortization_period.tolist(),
+        day_count_method.tolist()
+    ):
+        loans[loan_id] = Loan(
+            loan_id=loan_id,
+            origination_date=origination_date,
+            maturity_date=maturity_date,
+            original_balance=balance,
+            note_rate=rate,
+            interest_only_period=io,
+            amortization_period=amort,
+            day_count_method=day_count
         )
-        loans[loan.loan_id] = loan
+    return loans
+
+
+def build_properties(properties_df: pd.DataFrame, loans: Dict[str, 'Loan']) -> List['Property']:
+    """Create a Property for every row of the Properties sheet, attaching its loans by ID."""
+    sheet = 'Properties'
+    loan_ids = [[loan_id.strip() for loan_id in str(ids).split(',')] for ids in properties_df['Loan ID'].tolist()]
+    sale_dates = _dates(properties_df, 'Sale Date', sheet, required=False)
+    buyout_dates = _dates(properties_df, 'Buyout Date', sheet, required=False)
 
     properties = []
-    for _, row in properties_df.iterrows():
-        property_loan_ids = [loan_id.strip() for loan_id in str(row['Loan ID']).split(',')]
-        property_loans = [loans[loan_id] for loan_id in property_loan_ids if loan_id in loans]
-        property_obj = Property(
-            property_id=row['Property ID'],
-            name=row['Name'],
-            address=row['Address'],
-            property_type=row['Property Type'],
-            square_footage=row['Square Footage'],
-            year_built=row['Year Built'],
-            purchase_price=row['Purchase Price'],
-            purchase_date=row['Purchase Date'].date(),
-            analysis_start_date=row['Analysis Start Date'].date(),
-            analysis_end_date=row['Analysis End Date'].date(),
-            current_value=row.get('Current Value'),
-            sale_date=row['Sale Date'].date() if pd.notna(row['Sale Date']) else None,
-            sale_price=row.get('Sale Price'),
-            loans=property_loans,
-            ownership_share=row.get('Ownership Share', 1),
-            buyout_date=row['Buyout Date'].date() if pd.notna(row['Buyout Date']) else date(2100, 12, 1),
-            buyout_amount=row.get('Buyout Amount', 0)
-        )
-        properties.append(property_obj)
+    for (property_id, name, address, property_type, square_footage, year_built, purchase_price, purchase_date,
+         analysis_start_date, analysis_end_date, current_value, sale_date, sale_price, property_loan_ids,
+         ownership_share, buyout_date, buyout_amount) in zip(
+        properties_df['Property ID'].tolist(),
+        properties_df['Name'].tolist(),
+        properties_df['Address'].tolist(),
+        properties_df['Property Type'].tolist(),
+        properties_df['Square Footage'].tolist(),
+        properties_df['Year Built'].tolist(),
+        properties_df['Purchase Price'].tolist(),
+        _dates(properties_df, 'Purchase Date', sheet),
+        _dates(properties_df, 'Analysis Start Date', sheet),
+        _dates(properties_df, 'Analysis End Date', sheet),
+        _optional(properties_df, 'Current Value'),
+        sale_dates,
+        _optional(properties_df, 'Sale Price'),
+        loan_ids,
+        _optional(properties_df, 'Ownership Share', 1),
+        buyout_dates,
+        _optional(properties_df, 'Buyout Amount', 0)
+    ):
+        properties.append(Property(
+            property_id=property_id,
+            name=name,
+            address=address,
+            property_type=property_type,
+            square_footage=square_footage,
+            year_built=year_built,
+            purchase_price=purchase_price,
+            purchase_date=purchase_date,
+            analysis_start_date=analysis_start_date,
+            analysis_end_date=analysis_end_date,
+            current_value=current_value,
+            sale_date=sale_date,
+            sale_price=sale_price,
+            loans=[loans[loan_id] for loan_id in property_loan_ids if loan_id in loans],
+            ownership_share=ownership_share,
+            buyout_date=buyout_date if buyout_date is not None else date(2100, 12, 1),
+            buyout_amount=buyout_amount
+        ))
+    return properties
 
+
+@profiled('upload.load_properties_and_loans')
+def load_properties_and_loans(file_path, sheets: Optional[Dict[str, pd.DataFrame]] = None):
+    if sheets is None:
+        sheets = read_workbook(file_path, ['Properties', 'Loans'])
+    loans = build_loans(sheets['Loans'])
+    properties = build_properties(sheets['Properties'], loans)
     return properties, loans
 
 def _standardize_date(d: date) -> date:
     """Standardize a date to the first of its month."""
     return date(d.year, d.month, 1)
 
-def load_cashflows(file_path):
-    df = pd.read_excel(file_path, sheet_name='Cashflows')
-    
-    # Convert the Date column to datetime.date and standardize the dates
-    df['Date'] = pd.to_datetime(df['Date']).dt.date.apply(_standardize_date)
-    
+@profiled('upload.load_cashflows')
+def load_cashflows(file_path, sheets: Optional[Dict[str, pd.DataFrame]] = None):
+    if sheets is None:
+        sheets = read_workbook(file_path, ['Cashflows'])
+    df = sheets['Cashflows']
+
+    # Standardize the dates to the first of their month in one pass over the column
+    dates = pd.to_datetime(df['Date'], errors='coerce')
+    if dates.isna().any():
+        raise ValueError(f"Sheet 'Cashflows' has missing or invalid 'Date' in rows {_invalid_rows(dates.isna())}")
+    months = dates.to_numpy(dtype='datetime64[M]').astype('datetime64[D]').astype(object)
+
     # Ensure that Net Operating Income and Capital Expenditures are numbers and convert them to float64
-    df['Net Operating Income'] = pd.to_numeric(df['Net Operating Income'], errors='coerce').fillna(0).astype('float64')
-    df['Capital Expenditures'] = pd.to_numeric(df['Capital Expenditures'], errors='coerce').fillna(0).astype('float64')
-    
-    # Select and set the index
-    df = df[['Property ID', 'Date', 'Net Operating Income', 'Capital Expenditures']]
-    
-    return df
+    return pd.DataFrame({
+        'Property ID': df['Property ID'].to_numpy(),
+        'Date': months,
+        'Net Operating Income': pd.to_numeric(df['Net Operating Income'], errors='coerce').fillna(0).to_numpy(dtype='float64'),
+        'Capital Expenditures': pd.to_numeric(df['Capital Expenditures'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    })
+
+@profiled('upload.add_cashflows_to_properties')
+def add_cashflows_to_properties(properties: List['Property'], df: pd.DataFrame):
+    """Give each property its rows of the Cashflows sheet as NOI and CapEx, split in one pass over the rows."""
+    codes, property_ids = pd.factorize(df['Property ID'], sort=False)
+    order = np.argsort(codes, kind='stable')
+    fin_df = df[['Net Operating Income', 'Capital Expenditures']].set_axis(pd.Index(df['Date'], name='Date')).take(order)
+    bounds = np.searchsorted(codes[order], np.arange(len(property_ids) + 1))
+    groups = {property_id: fin_df.iloc[bounds[i]:bounds[i + 1]] for i, property_id in enumerate(property_ids)}
+    empty = fin_df.iloc[:0]
+    for property_obj in properties:
+        property_obj.add_noi_capex(groups.get(property_obj.property_id, empty))
+
+def load_workbook(file_path) -> Tuple[List['Property'], Dict[str, 'Loan']]:
+    """Read a workbook once and return its properties, with NOI and CapEx attached, and loans."""
+    sheets = read_workbook(file_path)
+    properties, loans = load_properties_and_loans(file_path, sheets)
+    add_cashflows_to_properties(properties, load_cashflows(file_path, sheets))
+    return properties, loans
+
+def load_portfolio(file_path, name: str, start_date: date, end_date: date) -> Portfolio:
+    """Build a portfolio from a workbook with Properties, Loans and Cashflows sheets."""
+    properties, loans = load_workbook(file_path)
+    return Portfolio(name=name, properties=properties, start_date=start_date, end_date=end_date)
@@ -0,0 +1,61 @@
+"""Version stamps and content digests for the model objects."""
+import hashlib
+import itertools
+from datetime import date, datetime, time
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+# Process-wide counter, so a stamp identifies one state of one object
+_stamps = itertools.count(1)
+
+
+def next_stamp() -> int:
+    """A stamp no object has been given before; objects take a new one whenever they change."""
+    return next(_stamps)
+
+
+def _canonical(value):
+    """
+    The value with equal content in one form: numpy scalars as Python values, numbers as floats,
+    dates and midnight datetimes as ISO dates, other datetimes as ISO timestamps, and lists and
+    tuples as tuples.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool) or value is None or isinstance(value, (str, bytes)):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == time() and value.tzinfo is None else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (tuple, list)):
+        return tuple(_canonical(item) for item in value)
+    return value
+
+
+def digest(*parts) -> str:
+    """
+    Stable hex digest of the given values, the same in every process and session.
+
+    Values should be built from strings, numbers, dates, None and tuples of those; pass frames
+    through frame_digest first. They are hashed through the repr of their canonical form, so
+    1, 1.0 and np.float64(1.0), or a date and the same day as a midnight datetime, hash alike.
+    """
+    return hashlib.blake2b(repr(_canonical(parts)).encode(), digest_size=16).hexdigest()
+
+
+def frame_digest(df: Optional[pd.DataFrame]) -> str:
+    """Digest of a DataFrame's index, columns and values. Dates in the index are hashed by their day."""
+    if df is None:
+        return digest(None)
+    buffers = hashlib.blake2b(digest_size=16)
+    try:
+        # The model's frames are numeric with month-start date indexes; hash their buffers directly
+        buffers.update(np.fromiter((d.toordinal() for d in df.index), dtype=np.int64, count=len(df)).tobytes())
+        buffers.update(df.to_numpy(dtype=np.float64).tobytes())
+    except (AttributeError, TypeError, ValueError):
+        buffers = hashlib.blake2b(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes(), digest_size=16)
+    return digest(tuple(df.columns), df.index.name, df.shape, buffers.hexdigest())